@@ -0,0 +1,158 @@
+"""
+自动保存日志
+
+每次修改题目的选择状态时，只把这一道题的修改追加到日志文件（每行一条JSON记录），
+不再重写整个题库。写入由后台线程在修改停止一段时间后批量进行，日志过长时压缩为
+每道题只保留最后一条记录。下次恢复会话时按日志重放修改。
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = '_autosave.journal'
+
+
+def journal_path_for(source_path: str) -> str:
+    """题库文件对应的自动保存日志路径"""
+    file_dir, file_name = os.path.split(source_path)
+    file_base = os.path.splitext(file_name)[0]
+    return os.path.join(file_dir, f"{file_base}{JOURNAL_SUFFIX}")
+
+
+def load_journal(path: str) -> Dict[int, dict]:
+    """
+    读取日志，返回 {题目位置: 最后一条记录}
+
+    最后一行可能因程序异常退出而不完整，无法解析的行会被跳过。
+    """
+    records = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and isinstance(record.get('position'), int):
+                    records[record['position']] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+
+class AutosaveJournal:
+    """
+    追加写入的自动保存日志
+
+    Args:
+        path: 日志文件路径
+        delay: 最后一次修改后等待多少秒再写入
+        compact_every: 追加多少条记录后压缩一次日志
+    """
+
+    def __init__(self, path: str, delay: float = 0.5, compact_every: int = 500):
+        self.path = path
+        self.delay = delay
+        self.compact_every = compact_every
+        self._pending: Dict[int, dict] = {}
+        self._appended = 0
+        self._last_change = 0.0
+        self._closing = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, position: int, number: int, source_hash: str, selected_options: List[str],
+               with_quotes: str, without_quotes: str):
+        """
+        记录一道题目的当前状态，同一道题在写入前的多次修改只保留最后一次
+
+        Args:
+            position: 题目在题库中的位置
+            number: 题目序号
+            source_hash: 题目原始内容的哈希，重放时用于确认题库没有变化
+            selected_options: 已选中的选项
+            with_quotes: 修改后的带引用部分
+            without_quotes: 修改后的不带引用部分
+        """
+        with self._cond:
+            self._pending[position] = {
+                'position': position,
+                'index': number,
+                'hash': source_hash,
+                'selected_options': list(selected_options),
+                'with_quotes': with_quotes,
+                'without_quotes': without_quotes,
+            }
+            self._last_change = time.monotonic()
+            if self._thread is None or not self._thread.is_alive():
+                self._closing = False
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def flush(self, timeout: Optional[float] = None):
+        """立即写入所有未写入的记录并停止后台线程（退出程序或切换题库前调用）"""
+        with self._cond:
+            thread = self._thread
+            self._closing = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join(timeout)
+
+    def load(self) -> Dict[int, dict]:
+        """读取日志中每道题的最后一条记录"""
+        return load_journal(self.path)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                # 防抖：等到最后一次修改后 delay 秒内没有新的修改再写入
+                while self._pending and not self._closing:
+                    remaining = self._last_change + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, {}
+                closing = self._closing
+
+            if batch:
+                self._append(batch.values())
+            if closing:
+                return
+
+    def _append(self, records):
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False))
+                    f.write('\n')
+                    self._appended += 1
+            logger.debug("自动保存成功，日志文件: %s", self.path)
+        except OSError as e:
+            logger.error("自动保存失败: %s", e)
+            return
+
+        if self._appended >= self.compact_every:
+            self._compact()
+
+    def _compact(self):
+        """把日志压缩为每道题只保留最后一条记录"""
+        records = load_journal(self.path)
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for position in sorted(records):
+                    f.write(json.dumps(records[position], ensure_ascii=False))
+                    f.write('\n')
+            os.replace(tmp_path, self.path)
+            self._appended = 0
+            logger.debug("自动保存日志已压缩，保留 %s 条记录", len(records))
+        except OSError as e:
+            logger.error("压缩自动保存日志失败: %s", e)
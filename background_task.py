@@ -0,0 +1,106 @@
+"""
+后台任务
+
+在工作线程中运行耗时操作，进度和结果通过 root.after 轮询送回 Tk 界面线程，
+界面线程的回调中可以放心地更新控件。
+"""
+import logging
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TaskCancelled(Exception):
+    """后台任务被取消"""
+
+
+class BackgroundTask:
+    """
+    后台任务
+
+    Args:
+        root: Tk 根窗口，用于 after 轮询
+        work: 在工作线程中执行的函数，参数为任务本身，返回值交给 on_done
+        on_progress: 收到进度时在界面线程中调用，参数为 report() 传入的内容
+        on_done: 任务完成时在界面线程中调用，参数为 work 的返回值
+        on_error: 任务出错时在界面线程中调用，参数为异常对象
+        on_cancel: 任务被取消后在界面线程中调用
+        poll_ms: 轮询间隔（毫秒）
+    """
+
+    def __init__(self, root, work: Callable[["BackgroundTask"], Any],
+                 on_progress: Optional[Callable[[Any], None]] = None,
+                 on_done: Optional[Callable[[Any], None]] = None,
+                 on_error: Optional[Callable[[BaseException], None]] = None,
+                 on_cancel: Optional[Callable[[], None]] = None,
+                 poll_ms: int = 50):
+        self.root = root
+        self.work = work
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.poll_ms = poll_ms
+
+        self._queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread = None
+        self.finished = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def start(self) -> "BackgroundTask":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        """请求取消任务，工作函数在下一次 report() 或 check_cancelled() 时退出"""
+        self._cancel_event.set()
+
+    def report(self, payload: Any):
+        """在工作线程中调用，把进度送回界面线程"""
+        self.check_cancelled()
+        self._queue.put(('progress', payload))
+
+    def check_cancelled(self):
+        """在工作线程中调用，任务已被取消时抛出 TaskCancelled"""
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def _run(self):
+        try:
+            result = self.work(self)
+            self.check_cancelled()
+            self._queue.put(('done', result))
+        except TaskCancelled:
+            self._queue.put(('cancelled', None))
+        except Exception as e:
+            logger.exception("后台任务出错: %s", e)
+            self._queue.put(('error', e))
+
+    def _poll(self):
+        try:
+            while True:
+                kind, payload = self._queue.get_nowait()
+                if kind == 'progress':
+                    if self.on_progress and not self.cancelled:
+                        self.on_progress(payload)
+                    continue
+
+                self.finished = True
+                if kind == 'done' and self.on_done:
+                    self.on_done(payload)
+                elif kind == 'error' and self.on_error:
+                    self.on_error(payload)
+                elif kind == 'cancelled' and self.on_cancel:
+                    self.on_cancel()
+                return
+        except queue.Empty:
+            pass
+        self.root.after(self.poll_ms, self._poll)
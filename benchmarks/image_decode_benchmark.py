@@ -0,0 +1,96 @@
+"""
+图片解码缩放的性能测试
+
+生成几种格式和模式的大尺寸图片（JPEG、真彩色PNG、调色板PNG、带透明色的调色板PNG、GIF、黑白PNG），
+对比直接 resize() 和 image_cache.decode_scaled 的耗时，并检查每种图片都能缩放到显示区域内。
+调色板和黑白图片直接 resize() 时 Pillow 只能用最近邻插值，所以比 decode_scaled 快，但缩小后锯齿明显。
+
+用法：
+    python benchmarks/image_decode_benchmark.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from PIL import Image  # noqa: E402
+
+from image_cache import decode_scaled, fit_size  # noqa: E402
+
+# 原图尺寸和显示区域大小，原图至少是显示区域的2倍，decode_scaled 会先整数倍缩小
+IMAGE_SIZE = (4000, 3000)
+BOX = (800, 600)
+REPEAT = 3
+
+
+def make_source():
+    """有渐变和色块的真彩色图片"""
+    gradient = Image.linear_gradient('L').resize(IMAGE_SIZE)
+    return Image.merge('RGB', (gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT), Image.new('L', IMAGE_SIZE, 128)))
+
+
+def make_images(directory):
+    """写入各种格式和模式的测试图片，返回 [(名称, 路径)]"""
+    source = make_source()
+    palette = source.convert('P', palette=Image.ADAPTIVE, colors=64)
+    transparent = palette.copy()
+    transparent.info['transparency'] = 0
+
+    images = [
+        ("JPEG", "photo.jpg", source, {'quality': 85}),
+        ("PNG RGB", "rgb.png", source, {}),
+        ("PNG 调色板", "palette.png", palette, {}),
+        ("PNG 调色板+透明色", "transparent.png", transparent, {'transparency': 0}),
+        ("GIF", "animation.gif", palette, {}),
+        ("PNG 黑白", "mono.png", source.convert('1'), {}),
+    ]
+    result = []
+    for name, filename, image, options in images:
+        path = os.path.join(directory, filename)
+        image.save(path, **options)
+        result.append((name, path))
+    return result
+
+
+def decode_plain(path, box):
+    """不做整数倍缩小，直接高质量缩放"""
+    with Image.open(path) as image:
+        return image.resize(fit_size(image.size, box), Image.LANCZOS)
+
+
+def measure(function, path):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        image = function(path, BOX)
+    return (time.perf_counter() - start) / REPEAT, image
+
+
+def main():
+    expected = fit_size(IMAGE_SIZE, BOX)
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"原图 {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]}，显示区域 {BOX[0]}x{BOX[1]}，每项重复 {REPEAT} 次")
+        print(f"{'图片':<16}{'直接缩放(秒)':>14}{'decode_scaled(秒)':>20}{'结果模式':>10}")
+        for name, path in make_images(directory):
+            plain, _ = measure(decode_plain, path)
+            try:
+                scaled, image = measure(decode_scaled, path)
+            except Exception as e:
+                failures += 1
+                print(f"{name:<16}{plain:>14.3f}{'失败: ' + str(e):>20}")
+                continue
+            if image.size != expected:
+                failures += 1
+                print(f"{name}: 尺寸为 {image.size}，应为 {expected}")
+            print(f"{name:<16}{plain:>14.3f}{scaled:>20.3f}{image.mode:>10}")
+
+    if failures:
+        print(f"{failures} 种图片解码失败")
+        sys.exit(1)
+    print("所有图片都能正确缩放")
+
+
+if __name__ == '__main__':
+    main()
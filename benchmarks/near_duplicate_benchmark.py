@@ -0,0 +1,100 @@
+"""
+相似题目查找的性能测试
+
+生成含有改写副本（全角标点换成半角、打乱选项顺序、题号不同）的题库，
+对比两两比较签名和 question_similar.SimilarQuestions 按 LSH 分桶的耗时与找到的组数。
+两两比较的耗时随题目数的平方增长，LSH 分桶的耗时与题目数大致成正比。
+
+用法：
+    python benchmarks/near_duplicate_benchmark.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from question_similar import SimilarQuestions, estimate_similarity  # noqa: E402
+
+# 测试的题目数，两两比较只测试到 PAIRWISE_MAX 道，再多耗时过长
+SIZES = [1000, 2000, 10000, 100000]
+PAIRWISE_MAX = 2000
+# 改写副本所占的比例
+VARIANT_RATIO = 0.1
+
+WORDS = "细胞 光合作用 叶绿体 线粒体 能量 氧气 二氧化碳 蛋白质 遗传 基因 染色体 酶 温度 浓度 反应 结构 功能 过程 物质 条件".split()
+PUNCTUATION = {"，": ",", "。": ".", "？": "?", "（": "(", "）": ")"}
+
+
+def make_question(rng):
+    stem = "".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+    options = ["".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))) for _ in range(4)]
+    return stem, options
+
+
+def render(number, stem, options, rewrite=False, rng=None):
+    """题目的 Markdown；rewrite 时换成半角标点并打乱选项顺序"""
+    text = f"关于{stem}，下列说法正确的是？（  ）"
+    if rewrite:
+        for full, half in PUNCTUATION.items():
+            text = text.replace(full, half)
+        options = options[:]
+        rng.shuffle(options)
+    lines = [f"> ## 第{number}题", f"> {text}"]
+    lines += [f"> - [ ] {letter}. {option}" for letter, option in zip("ABCD", options)]
+    return "\n".join(lines)
+
+
+def make_bank(n, seed=0):
+    rng = random.Random(seed)
+    originals = []
+    texts = []
+    for number in range(1, n + 1):
+        if originals and rng.random() < VARIANT_RATIO:
+            stem, options = rng.choice(originals)
+            texts.append(render(number, stem, options, rewrite=True, rng=rng))
+        else:
+            stem, options = make_question(rng)
+            originals.append((stem, options))
+            texts.append(render(number, stem, options))
+    return texts
+
+
+def pairwise_pairs(finder):
+    """两两比较签名，返回相似度达到阈值的题目对数"""
+    signatures = finder.signatures
+    pairs = 0
+    for i in range(len(signatures)):
+        for j in range(i + 1, len(signatures)):
+            if estimate_similarity(signatures[i], signatures[j]) >= finder.threshold:
+                pairs += 1
+    return pairs
+
+
+def main():
+    print(f"{'题目数':>8}{'签名(s)':>10}{'LSH分桶(s)':>12}{'相似组':>8}{'组内题目':>10}{'两两比较(s)':>14}")
+    for n in SIZES:
+        texts = make_bank(n)
+        finder = SimilarQuestions()
+
+        start = time.perf_counter()
+        for text in texts:
+            finder.add(text)
+        signing = time.perf_counter() - start
+
+        start = time.perf_counter()
+        groups = finder.clusters()
+        bucketing = time.perf_counter() - start
+
+        pairwise = "-"
+        if n <= PAIRWISE_MAX:
+            start = time.perf_counter()
+            pairwise_pairs(finder)
+            pairwise = f"{time.perf_counter() - start:.2f}"
+        grouped = sum(len(group) for group in groups)
+        print(f"{n:>8}{signing:>10.2f}{bucketing:>12.2f}{len(groups):>8}{grouped:>10}{pairwise:>14}")
+
+
+if __name__ == "__main__":
+    main()
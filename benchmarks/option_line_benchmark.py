@@ -0,0 +1,97 @@
+"""
+选项行切分的性能测试
+
+对比原来的8组回溯正则和 question_grammar.split_option_line 在病态选项行上的耗时。
+原正则的耗时随行长度急剧增长，split_option_line 的耗时与行长度成正比。
+
+用法：
+    python benchmarks/option_line_benchmark.py
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from question_core import fix_option_format  # noqa: E402
+from question_grammar import split_option_line  # noqa: E402
+
+# 修改前 fix_option_format 使用的正则
+LEGACY_MULTI_OPTION_LINE_RE = re.compile(
+    r'^\s*[-]\s*\[([ x])\]\s*([A-D])\.?\s*([^ABCD]*?)\s*([A-D])\.?\s*([^ABCD]*?)\s*([A-D])\.?\s*([^ABCD]*?)\s*([A-D])\.?\s*(.*?)$',
+    re.MULTILINE,
+)
+
+# 病态输入：(生成函数, 测试的规模, 原正则测试的最大规模，再大耗时过长)
+PATHOLOGICAL_LINES = {
+    # 只有一个选项字母，后面是很长的空白分隔内容
+    "单个选项+长内容": (lambda n: "- [ ] A. " + "甲 " * n, [100, 1000, 10000, 100000], 10000),
+    # 只有三个选项，第四个选项永远找不到
+    "缺少D选项": (lambda n: "- [ ] A. " + "甲 " * n + "B. 乙 C. 丙", [100, 1000, 10000, 100000], 10000),
+    # 选项之间是大量空白，原正则的回溯次数随空白数量的高次方增长
+    "大量空白": (lambda n: "- [ ] A." + " " * n + "B." + " " * n + "C.", [10, 20, 40, 1000, 100000], 40),
+    # 正常的一行四个选项，内容很长
+    "正常四个选项": (lambda n: "- [ ] A. " + "甲" * n + " B. 乙 C. 丙 D. 丁", [100, 1000, 10000, 100000], 100000),
+    # 选项之间没有空格（中文题库常见）
+    "无空格选项": (lambda n: "- [ ] A." + "甲" * n + "B.乙C.丙D.丁", [100, 1000, 10000, 100000], 100000),
+}
+
+# 切分结果检查：(选项行, 期望的 [(选项字母, 选项内容), ...]，不应切分时为 None)
+EXPECTED_SPLITS = [
+    ("- [ ] A.正确B.错误C.不确定D.无法判断", [("A", "正确"), ("B", "错误"), ("C", "不确定"), ("D", "无法判断")]),
+    ("- [ ] A.苹果  B.香蕉C.梨 D.桃", [("A", "苹果"), ("B", "香蕉"), ("C", "梨"), ("D", "桃")]),
+    ("> - [ ] A、甲B、乙C．丙D．丁", [("A", "甲"), ("B", "乙"), ("C", "丙"), ("D", "丁")]),
+    ("- [ ] A. DNA复制 B. RNA转录 C. 翻译 D. 逆转录",
+     [("A", "DNA复制"), ("B", "RNA转录"), ("C", "翻译"), ("D", "逆转录")]),
+    # 以下都是正确的单个选项，修复选项格式时必须保持不变
+    ("- [ ] A. DNA和RNA", None),
+    ("- [ ] A. Plan B is ok", None),
+    ("> - [ ] A. 维生素 B 和维生素C", None),
+    ("- [ ] A. 见图B.1所示", None),
+    ("- [ ] B. 选 C 或 D 都不对", None),
+    ("- [ ] A. 用PCB.板连接 C. 和 D. 端", None),
+    ("- [ ] A. 第B.2节 C.3 D.4", None),
+]
+
+
+def measure(func, line, repeat=3):
+    """多次运行取最短耗时（毫秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(line)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def check_splits():
+    """检查切分结果，返回不符合期望的行数"""
+    failures = 0
+    for line, expected in EXPECTED_SPLITS:
+        result = split_option_line(line)
+        options = result[2] if result is not None else None
+        if options != expected:
+            failures += 1
+            print(f"切分结果不符: {line!r}\n  期望 {expected}\n  实际 {options}")
+        elif expected is None and fix_option_format(line) != (line, False):
+            failures += 1
+            print(f"修复选项格式改动了不应切分的行: {line!r}")
+    print(f"切分结果检查: {len(EXPECTED_SPLITS) - failures}/{len(EXPECTED_SPLITS)} 通过")
+    return failures
+
+
+def main():
+    check_splits()
+    print()
+    print(f"{'输入':<12}{'长度':>8}{'原正则(ms)':>14}{'单遍切分(ms)':>16}")
+    for name, (make_line, sizes, legacy_max) in PATHOLOGICAL_LINES.items():
+        for n in sizes:
+            line = make_line(n)
+            legacy = f"{measure(LEGACY_MULTI_OPTION_LINE_RE.search, line):.3f}" if n <= legacy_max else "-"
+            linear = measure(split_option_line, line)
+            print(f"{name:<12}{len(line):>8}{legacy:>14}{linear:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
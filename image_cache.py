@@ -0,0 +1,147 @@
+"""
+图片缓存
+
+按 (路径, 修改时间, 显示区域大小) 缓存缩放后的图片，容量有限，超出时淘汰最久未使用的条目。
+JPEG 解码时用 draft() 直接按接近目标的尺寸解码，其他格式先用 reduce() 整数倍缩小，
+再做一次高质量缩放，大尺寸扫描件也能很快显示。相邻图片可以交给后台线程预先解码。
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from PIL import Image, ImageTk
+
+from question_images import is_image_file
+
+logger = logging.getLogger(__name__)
+
+# 显示区域四周留出的边距（像素）
+IMAGE_MARGIN = 20
+
+ImageKey = Tuple[str, int, Tuple[int, int]]
+
+# 调色板模式
+PALETTE_MODES = ('P', 'PA')
+
+
+def fit_size(image_size: Tuple[int, int], box: Tuple[int, int]) -> Tuple[int, int]:
+    """保持宽高比缩放到显示区域内（四周留出边距）时的尺寸"""
+    image_width, image_height = image_size
+    width, height = box
+    img_ratio = image_width / image_height
+    frame_ratio = width / height
+
+    if img_ratio > frame_ratio:
+        # 图片更宽，按宽度缩放
+        new_width = width - IMAGE_MARGIN
+        new_height = int(new_width / img_ratio)
+    else:
+        # 图片更高，按高度缩放
+        new_height = height - IMAGE_MARGIN
+        new_width = int(new_height * img_ratio)
+    return max(1, new_width), max(1, new_height)
+
+
+def decode_scaled(path: str, box: Tuple[int, int]) -> Image.Image:
+    """读取图片并缩放到显示区域内，可以在后台线程中调用"""
+    with Image.open(path) as image:
+        target = fit_size(image.size, box)
+        # JPEG 按 1/2、1/4、1/8 直接解码，其他格式忽略
+        image.draft(None, target)
+        # 调色板图片（GIF、8位PNG）和黑白图片不能 reduce()，缩放时也只能用最近邻，
+        # 先转换为真彩色或灰度
+        if image.mode in PALETTE_MODES:
+            image = image.convert('RGBA' if image.mode == 'PA' or 'transparency' in image.info else 'RGB')
+        elif image.mode == '1':
+            image = image.convert('L')
+        factor = min(image.width // target[0], image.height // target[1])
+        if factor >= 2:
+            image = image.reduce(factor)
+        return image.resize(target, Image.LANCZOS)
+
+
+class ImageCache:
+    """
+    缩放后图片的 LRU 缓存
+
+    PIL 图片可以在任何线程中写入（后台预先解码），转换为 PhotoImage 只在界面线程中进行，
+    转换结果和 PIL 图片一起缓存。
+
+    Args:
+        max_entries: 最多缓存的图片数
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, list]" = OrderedDict()   # 键 -> [PIL图片, PhotoImage或None]
+        self._folders: Dict[str, Tuple[int, List[str]]] = {}           # 文件夹 -> (修改时间, 图片列表)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    @staticmethod
+    def key_for(path: str, box: Tuple[int, int]) -> ImageKey:
+        """缓存键，文件被修改后修改时间改变，旧的缓存不会再被使用"""
+        return os.path.abspath(path), os.stat(path).st_mtime_ns, box
+
+    def put(self, key: Hashable, image: Image.Image):
+        """写入缩放后的图片，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._entries[key] = [image, None]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_photo(self, path: str, box: Tuple[int, int]) -> ImageTk.PhotoImage:
+        """取得缩放到显示区域内的 PhotoImage，未缓存时当场解码（只在界面线程中调用）"""
+        key = self.key_for(path, box)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is None:
+            self.misses += 1
+            self.put(key, decode_scaled(path, box))
+            with self._lock:
+                entry = self._entries[key]
+        if entry[1] is None:
+            entry[1] = ImageTk.PhotoImage(entry[0])
+        return entry[1]
+
+    def prefetch_job(self, path: str, box: Tuple[int, int]):
+        """预先解码一张图片的任务 (缓存键, 解码函数)，交给 RenderPrefetcher 执行"""
+        return self.key_for(path, box), lambda: decode_scaled(path, box)
+
+    def folder_images(self, folder: str) -> List[str]:
+        """文件夹中所有图片的路径（已排序），文件夹内容没有变化时使用缓存的列表"""
+        mtime = os.stat(folder).st_mtime_ns
+        cached = self._folders.get(folder)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        images = sorted(os.path.join(folder, name) for name in os.listdir(folder) if is_image_file(name))
+        self._folders[folder] = (mtime, images)
+        logger.debug("列出文件夹 %s 中的 %s 张图片", folder, len(images))
+        return images
+
+    def invalidate(self, folder: Optional[str] = None):
+        """丢弃缓存的文件夹列表（为 None 时丢弃全部）"""
+        if folder is None:
+            self._folders.clear()
+        else:
+            self._folders.pop(folder, None)
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits * 100 / total if total else 0
+        return f"图片缓存: {len(self._entries)}/{self.max_entries} 张，命中 {self.hits} 次，未命中 {self.misses} 次，命中率 {rate:.0f}%"
@@ -1,10 +1,28 @@
 import re
 import os
 import sys
+import json
 import argparse
-from typing import List
+import bisect
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import accumulate, chain
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
 from pathlib import Path
 
+from question_dedup import DEDUP_MODES, Deduplicator, HashStore
+from question_grammar import BLOCK_FALLBACK_RE, BLOCK_RE, DIGITS_SPLIT_RE, VALID_BLOCK_RE
+from question_index import (
+    INDEX_SUFFIX,
+    SCHEME_BLOCKS,
+    QuestionIndex,
+    content_hash,
+    index_path_for,
+    iter_block_spans,
+    load_or_build_index,
+    read_block,
+)
+
 def split_markdown_by_questions(input_file: str, output_prefix: str = "questions", questions_per_file: int = 100):
     """
     按题目块分割Markdown文件
@@ -24,7 +42,7 @@ def split_markdown_by_questions(input_file: str, output_prefix: str = "questions
     valid_blocks = []
     for block in blocks:
         # 检查块中是否包含引用格式的二级标题
-        if re.search(r'^> ## ', block, re.MULTILINE):
+        if VALID_BLOCK_RE.search(block):
             valid_blocks.append(block)
     
     print(f"总共找到 {len(valid_blocks)} 个有效的题目块")
@@ -62,14 +80,12 @@ def split_markdown_by_questions_v2(input_file: str, output_prefix: str = "questi
     
     # 使用更准确的正则表达式匹配题目块
     # 每个题目块包含一个以 "> ##" 开头的标题，以及后续的内容直到下一个 "---" 或文件结束
-    pattern = r'(> ##.*?)(?=\n---\n> ##|\Z)'
-    blocks = re.findall(pattern, content, re.DOTALL)
+    blocks = BLOCK_RE.findall(content)
     
     # 如果没有找到匹配的块，尝试另一种模式
     if len(blocks) <= 1:
         # 尝试匹配以 "> ##" 开始的块，直到下一个 "> ##" 或文件结束
-        pattern2 = r'(> ##.*?)(?=\n> ##|\Z)'
-        blocks = re.findall(pattern2, content, re.DOTALL)
+        blocks = BLOCK_FALLBACK_RE.findall(content)
     
     print(f"总共找到 {len(blocks)} 个题目块")
     
@@ -92,40 +108,429 @@ def split_markdown_by_questions_v2(input_file: str, output_prefix: str = "questi
         print(f"已保存 {output_path}，包含 {len(chunk)} 个题目块")
 
 
-def merge_markdown_files(input_dir: str, output_file: str, file_pattern: str = r"questions_\d+\.md"):
+def iter_question_blocks(input_file: str) -> Iterator[str]:
+    """
+    流式读取所有题目块，内存占用只与单个题目块的大小有关
+
+    Args:
+        input_file: 输入的Markdown文件路径
+
+    Yields:
+        题目块文本
+    """
+    # 已有索引时直接按索引中的偏移读取，不再扫描文件
+    index = QuestionIndex.load(input_file, SCHEME_BLOCKS)
+    if index is not None:
+        yield from index.iter_texts()
+        return
+
+    with open(input_file, 'rb') as f:
+        for offset, length in iter_block_spans(input_file):
+            yield read_block(f, offset, length)
+
+
+def split_markdown_by_questions_streaming(input_file: str, output_prefix: str = "questions", questions_per_file: int = 100):
+    """
+    流式分割Markdown文件，输出与 split_markdown_by_questions_v2 完全相同，
+    但不会把整个文件读入内存，每写满一个分割文件就立即关闭
+
+    Args:
+        input_file: 输入的Markdown文件路径
+        output_prefix: 输出文件前缀
+        questions_per_file: 每个文件包含的题目块数量
+    """
+    output_dir = os.path.dirname(input_file) if os.path.dirname(input_file) else "."
+
+    total = 0
+    chunk_size = 0
+    output_path = None
+    out = None
+
+    try:
+        for block in iter_question_blocks(input_file):
+            if out is None:
+                file_number = (total // questions_per_file + 1) * questions_per_file
+                output_path = os.path.join(output_dir, f"{output_prefix}_{file_number}.md")
+                out = open(output_path, 'w', encoding='utf-8')
+                chunk_size = 0
+            else:
+                out.write("\n---\n")
+
+            out.write(block.strip())
+            chunk_size += 1
+            total += 1
+
+            if chunk_size == questions_per_file:
+                out.close()
+                out = None
+                print(f"已保存 {output_path}，包含 {chunk_size} 个题目块")
+
+        if out is not None:
+            out.close()
+            out = None
+            print(f"已保存 {output_path}，包含 {chunk_size} 个题目块")
+    finally:
+        if out is not None:
+            out.close()
+
+    print(f"总共找到 {total} 个题目块")
+
+
+class SplitPart(NamedTuple):
+    """一个分割文件包含的题目块范围"""
+    name: str                    # 分割文件名
+    start: int                   # 第一个题目块的序号（从0开始）
+    stop: int                    # 最后一个题目块的下一个序号
+
+
+def plan_parts_by_count(total: int, output_prefix: str = "questions", questions_per_file: int = 100) -> List[SplitPart]:
+    """按固定题目块数量划分分割文件，文件名与 split_markdown_by_questions_v2 相同"""
+    return [
+        SplitPart(f"{output_prefix}_{(start // questions_per_file + 1) * questions_per_file}.md",
+                  start, min(start + questions_per_file, total))
+        for start in range(0, total, questions_per_file)
+    ]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估计文本的 token 数：中日韩字符约每个字 1 个 token，其他字符约每 4 个 1 个 token
+
+    UTF-8 中非 ASCII 字符（几乎都是中文）多占 2 个字节，用字节数与字符数之差估计中文字数，
+    不需要逐个字符判断
+    """
+    chars = len(text)
+    wide = min(chars, (len(text.encode('utf-8')) - chars) // 2)
+    return wide + (chars - wide + 3) // 4
+
+
+def _greedy_stops(weights: List[int], capacity: int) -> List[int]:
+    """按顺序装入题目块，装满 capacity 就开始下一个文件；返回每个文件的结束序号"""
+    stops = []
+    total = 0
+    for i, weight in enumerate(weights):
+        if total and total + weight > capacity:
+            stops.append(i)
+            total = 0
+        total += weight
+    if weights:
+        stops.append(len(weights))
+    return stops
+
+
+def _balanced_stops(weights: List[int], count: int, capacity: int) -> Optional[List[int]]:
+    """
+    把题目块按顺序分为 count 个文件，每个文件的大小尽量接近平均值，且不超过 capacity
+    （超过 capacity 的单个题目块除外）；做不到时返回 None
+    """
+    prefix = list(accumulate(weights))
+    total = prefix[-1]
+    stops = []
+    previous = 0
+    for j in range(1, count):
+        # 第j个分界点取累计大小最接近 j/count 的位置，并给后面的文件各留至少一个题目块
+        target = total * j / count
+        i = bisect.bisect_left(prefix, target)
+        stop = i + 1 if i < len(prefix) and (i == 0 or prefix[i] - target < target - prefix[i - 1]) else i
+        # 不超过容量：最多装到累计大小不超过 前面文件的总大小 + capacity 的位置
+        base = prefix[previous - 1] if previous else 0
+        stop = min(stop, max(bisect.bisect_right(prefix, base + capacity), previous + 1))
+        stop = min(max(stop, previous + 1), len(weights) - (count - j))
+        stops.append(stop)
+        previous = stop
+    stops.append(len(weights))
+
+    start = 0
+    for stop in stops:
+        if sum(weights[start:stop]) > capacity and stop - start > 1:
+            return None
+        start = stop
+    return stops
+
+
+def plan_parts_by_budget(weights: List[int], budget: int, output_prefix: str = "questions",
+                         balance: bool = False) -> List[SplitPart]:
+    """
+    按大小预算划分分割文件，不改变题目顺序
+
+    Args:
+        weights: 每个题目块的大小（字节数或 token 数）
+        budget: 每个文件的大小上限；超过上限的单个题目块单独成为一个文件
+        output_prefix: 输出文件前缀，文件名中的数字为文件中最后一个题目块的序号
+        balance: 为 True 时文件数不变，各文件大小尽量接近平均值（仍不超过上限）
+
+    Returns:
+        分割方案
+    """
+    stops = _greedy_stops(weights, budget)
+    if balance and len(stops) > 1:
+        stops = _balanced_stops(weights, len(stops), budget) or stops
+
+    parts = []
+    start = 0
+    for stop in stops:
+        parts.append(SplitPart(f"{output_prefix}_{stop}.md", start, stop))
+        start = stop
+    return parts
+
+
+def block_weights(index: QuestionIndex, unit: str = 'bytes') -> List[int]:
+    """每个题目块的大小：'bytes' 直接使用索引中的字节长度，'tokens' 读取内容估计 token 数"""
+    if unit == 'bytes':
+        return [entry.length for entry in index.entries]
+    return [estimate_tokens(text) for text in index.iter_texts()]
+
+
+def write_atomic(path: str, text: str):
+    """先写入同一目录下的临时文件，再重命名为目标文件，读取方不会看到写了一半的文件"""
+    # 临时文件名各不相同，并行写入时不会冲突；用 open 创建，文件权限与直接写入时相同
+    directory = os.path.dirname(path) or "."
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'x', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_part(index: QuestionIndex, part: SplitPart, path: str) -> Dict:
+    """读取一个分割文件的题目块并原子写入（在线程池中执行）"""
+    text = "\n---\n".join(block.strip() for block in index.iter_texts(part.start, part.stop))
+    write_atomic(path, text)
+    return {
+        'blocks': part.stop - part.start,
+        'bytes': len(text.encode('utf-8')),
+        'hash': content_hash(text),
+    }
+
+
+def split_markdown_parallel(input_file: str, output_prefix: str = "questions", questions_per_file: int = 100,
+                            output_dir: Optional[str] = None, jobs: Optional[int] = None,
+                            shard_size: int = 0, manifest: bool = True,
+                            parts: Optional[List[SplitPart]] = None,
+                            max_bytes: Optional[int] = None, max_tokens: Optional[int] = None,
+                            balance: bool = False, dedup: Optional[Deduplicator] = None) -> List[Dict]:
+    """
+    用线程池并行写入分割文件，输出内容与 split_markdown_by_questions_v2 相同
+
+    每个文件先写入临时文件再重命名；每写完一个文件就在清单
+    <输出前缀>_manifest.jsonl 中追加一行（文件名、题目块范围、哈希），
+    下游任务可以边读清单边处理已经写好的文件。
+
+    Args:
+        input_file: 输入的Markdown文件路径
+        output_prefix: 输出文件前缀
+        questions_per_file: 每个文件包含的题目块数量
+        output_dir: 输出目录，默认为输入文件所在目录
+        jobs: 写入线程数，默认为 min(32, CPU核数 + 4)
+        shard_size: 每个子目录存放的文件数，为0时不分子目录（子目录名为 000、001…）
+        manifest: 是否写入清单
+        parts: 自定义的分割方案，为 None 时按预算或 questions_per_file 划分
+        max_bytes: 每个文件的字节数上限，指定后不再按题目块数量划分
+        max_tokens: 每个文件的估计 token 数上限
+        balance: 按预算划分时让各文件的大小尽可能平均
+        dedup: 去重，丢弃重复的题目块时清单中的序号为去重后的序号
+
+    Returns:
+        清单记录，按分割文件的顺序
+    """
+    if output_dir is None:
+        output_dir = os.path.dirname(input_file) or "."
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 按索引中的字节范围读取题目块，不需要把整个文件读入内存
+    index = load_or_build_index(input_file, SCHEME_BLOCKS)
+    if dedup is not None:
+        # 只保留不重复的题目块，后面按过滤后的索引划分和写入
+        kept = [index.entries[number - 1] for number, _ in dedup.filter(index.iter_texts(), input_file)]
+        index = QuestionIndex(index.source_path, index.scheme, kept, index.size, index.mtime_ns)
+        print(dedup.summary())
+    if parts is None and (max_bytes or max_tokens):
+        unit, budget = ('bytes', max_bytes) if max_bytes else ('tokens', max_tokens)
+        parts = plan_parts_by_budget(block_weights(index, unit), budget, output_prefix, balance)
+    elif parts is None:
+        parts = plan_parts_by_count(len(index), output_prefix, questions_per_file)
+    print(f"总共找到 {len(index)} 个题目块，分为 {len(parts)} 个文件")
+
+    def relative_path(number: int, part: SplitPart) -> str:
+        if not shard_size:
+            return part.name
+        return os.path.join(f"{number // shard_size:03d}", part.name)
+
+    if shard_size:
+        for shard in range((len(parts) + shard_size - 1) // shard_size):
+            os.makedirs(os.path.join(output_dir, f"{shard:03d}"), exist_ok=True)
+
+    manifest_path = os.path.join(output_dir, f"{output_prefix}_manifest.jsonl")
+    manifest_file = open(manifest_path, 'w', encoding='utf-8') if manifest else None
+    records: List[Optional[Dict]] = [None] * len(parts)
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(_write_part, index, part, os.path.join(output_dir, relative_path(number, part))): number
+                for number, part in enumerate(parts)
+            }
+            # 按完成顺序记录，已写好的文件立即出现在清单中
+            for future in as_completed(futures):
+                number = futures[future]
+                part = parts[number]
+                record = {
+                    'part': relative_path(number, part).replace(os.sep, '/'),
+                    'first': part.start + 1,
+                    'last': part.stop,
+                    **future.result(),
+                }
+                records[number] = record
+                if manifest_file is not None:
+                    manifest_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    manifest_file.flush()
+                print(f"已保存 {os.path.join(output_dir, record['part'])}，包含 {record['blocks']} 个题目块")
+
+        if manifest_file is not None:
+            # 最后一行标记全部文件已经写完
+            manifest_file.write(json.dumps({'complete': True, 'parts': len(parts), 'blocks': len(index)}) + "\n")
+    finally:
+        if manifest_file is not None:
+            manifest_file.close()
+
+    if manifest:
+        print(f"清单已保存到 {manifest_path}")
+    return records
+
+
+def natural_sort_key(name: str) -> Tuple:
+    """自然排序的键：文件名中的数字按数值比较，questions_100.md 排在 questions_1000.md 前面"""
+    parts = DIGITS_SPLIT_RE.split(name)
+    # 切分结果总是文字、数字交替，对应位置的类型相同，可以直接比较
+    parts[1::2] = [int(part) for part in parts[1::2]]
+    return tuple(parts)
+
+
+def copy_stripped(src: Iterable[str], dst: TextIO) -> Tuple[int, int]:
+    """
+    逐行把 src 的内容去掉首尾空白后写入 dst，结果与 dst.write(src.read().strip()) 相同，
+    但内存占用只与单行的长度有关；同时统计题目块标题行和分隔行的数量
+
+    Returns:
+        (题目块标题行数, 分隔行数)
+    """
+    started = False
+    pending = ""  # 暂不写入的空白，后面还有内容时才写入
+    headings = 0
+    separators = 0
+
+    for line in src:
+        if not started:
+            line = line.lstrip()
+            if not line:
+                continue
+            started = True
+
+        if line.startswith("> ## "):
+            headings += 1
+        elif line.rstrip("\n") == "---":
+            separators += 1
+
+        body = line.rstrip()
+        if not body:
+            pending += line
+            continue
+        if pending:
+            dst.write(pending)
+        dst.write(body)
+        pending = line[len(body):]
+
+    return headings, separators
+
+
+def drop_duplicate_blocks(lines: Iterable[str], dedup: Deduplicator, file: str) -> Iterator[str]:
+    """
+    按 "---" 分隔行把内容分段，跳过重复的题目块（连同它前面的分隔行），其余行原样产生
+
+    分段方式与不去重的合并相同，没有重复时产生的内容与原文件完全一致；
+    没有题目块标题行的段（题目块之外的文字）总是保留，不参与去重和编号
+
+    Args:
+        lines: 文件的各行
+        dedup: 去重
+        file: 文件路径（用于记录重复题目的位置）
+    """
+    piece: List[str] = []
+    separator = None  # 这一段前面的分隔行
+    emitted = False
+    index = 0
+
+    # 末尾补一个 None，让最后一段也在循环中处理
+    for line in chain(lines, [None]):
+        if line is not None and line.rstrip("\n") != "---":
+            piece.append(line)
+            continue
+
+        keep = True
+        if any(text.startswith("> ## ") for text in piece):
+            index += 1
+            keep = dedup.check("".join(piece), file, index)
+        if keep:
+            if emitted and separator is not None:
+                yield separator
+            yield from piece
+            emitted = True
+
+        separator = line
+        piece = []
+
+
+def merge_markdown_files(input_dir: str, output_file: str, file_pattern: str = r"questions_\d+\.md",
+                         dedup: Optional[Deduplicator] = None):
     """
     合并分割的Markdown文件
     
+    逐个文件流式复制到输出文件，内存占用不随文件总大小增长；
+    复制的同时检查每个文件的题目块数量
+    
     Args:
         input_dir: 包含分割文件的目录
         output_file: 合并后的输出文件路径
         file_pattern: 文件名匹配模式
+        dedup: 去重；指定后跳过重复的题目块，其余内容和不去重时相同
     """
     # 获取所有匹配的文件
-    files = [f for f in os.listdir(input_dir) if re.match(file_pattern, f)]
+    pattern = re.compile(file_pattern)
+    files = [f for f in os.listdir(input_dir) if pattern.match(f) and not f.endswith(INDEX_SUFFIX)]
     
-    # 按数字排序文件
-    files.sort(key=lambda x: int(re.findall(r'\d+', x)[0]) if re.findall(r'\d+', x) else 0)
+    # 按文件名中的数字自然排序
+    files.sort(key=natural_sort_key)
     
-    merged_content = []
     file_count = 0
+    block_count = 0
     
-    for file in files:
-        file_path = os.path.join(input_dir, file)
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            if content:  # 只有当文件不为空时才添加
-                merged_content.append(content)
-                file_count += 1
-    
-    # 用 "---" 连接所有内容
-    final_content = "\n---\n".join(merged_content)
+    with open(output_file, 'w', encoding='utf-8', buffering=1024 * 1024) as out:
+        for file in files:
+            file_path = os.path.join(input_dir, file)
+            with open(file_path, 'r', encoding='utf-8') as f:
+                lines = iter(f) if dedup is None else drop_duplicate_blocks(f, dedup, file_path)
+                # 跳过空文件（或题目块全部重复的文件）：读到第一行非空内容就能判断，
+                # 开头的空行 copy_stripped 本来也会去掉
+                first = next((line for line in lines if line.strip()), None)
+                if first is None:
+                    continue
+                if file_count:
+                    out.write("\n---\n")
+                headings, separators = copy_stripped(chain([first], lines), out)
+            
+            file_count += 1
+            block_count += headings
+            if headings == 0:
+                print(f"警告: {file} 中没有题目块（以 \"> ## \" 开头的行）")
+            elif separators + 1 != headings:
+                print(f"警告: {file} 中有 {headings} 个题目块，但有 {separators} 个分隔符，可能有题目块格式错误")
     
-    # 写入合并后的文件
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(final_content)
-    
-    print(f"已合并 {file_count} 个文件到 {output_file}")
+    print(f"已合并 {file_count} 个文件到 {output_file}，共 {block_count} 个题目块")
+    if dedup is not None:
+        print(dedup.summary())
 
 
 def get_all_question_blocks(input_file: str) -> List[str]:
@@ -138,19 +543,21 @@ def get_all_question_blocks(input_file: str) -> List[str]:
     Returns:
         所有题目块的列表
     """
-    with open(input_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 使用正则表达式匹配题目块
-    pattern = r'(> ##.*?)(?=\n---\n> ##|\Z)'
-    blocks = re.findall(pattern, content, re.DOTALL)
-    
-    # 如果没有找到匹配的块，尝试另一种模式
-    if len(blocks) <= 1:
-        pattern2 = r'(> ##.*?)(?=\n> ##|\Z)'
-        blocks = re.findall(pattern2, content, re.DOTALL)
+    return list(load_or_build_index(input_file, SCHEME_BLOCKS).iter_texts())
+
+
+def get_question_block(input_file: str, block_index: int) -> str:
+    """
+    通过索引直接读取第N个题目块，不读取文件的其余部分
     
-    return blocks
+    Args:
+        input_file: 输入的Markdown文件路径
+        block_index: 题目块序号（从0开始）
+        
+    Returns:
+        题目块内容
+    """
+    return load_or_build_index(input_file, SCHEME_BLOCKS).read(block_index)
 
 
 def count_total_questions(input_file: str) -> int:
@@ -163,8 +570,7 @@ def count_total_questions(input_file: str) -> int:
     Returns:
         题目块的数量
     """
-    blocks = get_all_question_blocks(input_file)
-    return len(blocks)
+    return len(load_or_build_index(input_file, SCHEME_BLOCKS))
 
 
 def main():
@@ -172,14 +578,14 @@ def main():
     parser = argparse.ArgumentParser(description="Markdown题目块分割与合并工具")
     parser.add_argument(
         "action", 
-        choices=["split", "merge"], 
-        help="选择操作类型: split(分割) 或 merge(合并)"
+        choices=["split", "merge", "index"], 
+        help="选择操作类型: split(分割)、merge(合并) 或 index(建立题目索引)"
     )
     parser.add_argument(
         "--input", 
         "-i", 
         default="extracted_questions_processed.md",
-        help="输入文件路径 (分割时使用)"
+        help="输入文件路径 (分割和建立索引时使用)"
     )
     parser.add_argument(
         "--output-prefix", 
@@ -194,6 +600,63 @@ def main():
         default=100,
         help="每个文件包含的题目数量 (分割时使用)"
     )
+    parser.add_argument(
+        "--stream",
+        "-s",
+        action="store_true",
+        help="流式分割，内存占用不随文件大小增长 (分割时使用)"
+    )
+    budget = parser.add_mutually_exclusive_group()
+    budget.add_argument(
+        "--max-bytes",
+        type=int,
+        help="按字节数划分，每个文件不超过这个大小 (分割时使用，代替 --questions-per-file)"
+    )
+    budget.add_argument(
+        "--max-tokens",
+        type=int,
+        help="按估计的 token 数划分，每个文件不超过这个数量 (分割时使用，代替 --questions-per-file)"
+    )
+    parser.add_argument(
+        "--balance",
+        action="store_true",
+        help="与 --max-bytes/--max-tokens 一起使用，文件数不变，让各文件大小尽可能平均 (分割时使用)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        "-O",
+        help="分割文件的输出目录，默认为输入文件所在目录 (分割时使用)"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help="并行写入分割文件的线程数 (分割时使用)"
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=0,
+        help="每个子目录存放的分割文件数，为0时不分子目录 (分割时使用)"
+    )
+    parser.add_argument(
+        "--manifest",
+        action="store_true",
+        help="写入清单 <输出前缀>_manifest.jsonl，记录每个文件的题目块范围和哈希 (分割时使用)"
+    )
+    parser.add_argument(
+        "--dedup",
+        choices=DEDUP_MODES,
+        help="按规范化内容去重：drop 丢弃重复的题目块，report 只报告 (分割和合并时使用)"
+    )
+    parser.add_argument(
+        "--dedup-store",
+        help="保存已见过的题目哈希的 SQLite 文件，多次运行之间增量去重 (与 --dedup 一起使用)"
+    )
+    parser.add_argument(
+        "--dedup-report",
+        help="把重复的题目写入 JSON Lines 报告文件，默认输出到终端 (与 --dedup 一起使用)"
+    )
     parser.add_argument(
         "--input-dir", 
         "-d", 
@@ -215,25 +678,71 @@ def main():
     
     args = parser.parse_args()
     
+    store = HashStore(args.dedup_store) if args.dedup else None
+    dedup = Deduplicator(store, args.dedup) if args.dedup else None
+    try:
+        run_action(args, dedup)
+    finally:
+        if dedup is not None:
+            store.close()
+            if args.dedup_report:
+                with open(args.dedup_report, 'w', encoding='utf-8') as f:
+                    dedup.write_report(f)
+                print(f"重复题目报告已保存到 {args.dedup_report}")
+            else:
+                dedup.print_report()
+
+
+def run_action(args, dedup: Optional[Deduplicator] = None):
+    """执行命令行指定的操作"""
     if args.action == "split":
         # 检查输入文件是否存在
         if not os.path.exists(args.input):
             print(f"错误: 文件 {args.input} 不存在")
             return
         
+        # 按大小划分，或指定输出目录、线程数、子目录或清单时使用并行写入
+        if (args.max_bytes or args.max_tokens or args.output_dir or args.jobs or args.shard_size
+                or args.manifest or dedup is not None):
+            split_markdown_parallel(
+                args.input,
+                args.output_prefix,
+                args.questions_per_file,
+                output_dir=args.output_dir,
+                jobs=args.jobs,
+                shard_size=args.shard_size,
+                manifest=args.manifest,
+                max_bytes=args.max_bytes,
+                max_tokens=args.max_tokens,
+                balance=args.balance,
+                dedup=dedup,
+            )
+            return
+        
         # 分割文件
-        split_markdown_by_questions_v2(
+        split_func = split_markdown_by_questions_streaming if args.stream else split_markdown_by_questions_v2
+        split_func(
             args.input, 
             args.output_prefix, 
             args.questions_per_file
         )
         
+    elif args.action == "index":
+        if not os.path.exists(args.input):
+            print(f"错误: 文件 {args.input} 不存在")
+            return
+        
+        # 建立或刷新索引文件
+        index = load_or_build_index(args.input, SCHEME_BLOCKS)
+        print(f"索引 {index_path_for(args.input)} 共包含 {len(index)} 个题目块")
+        
     elif args.action == "merge":
         # 合并文件
         merge_markdown_files(
             args.input_dir, 
             args.output_file, 
-            args.file_pattern
+            args.file_pattern,
+            dedup=dedup,
         )
 
 
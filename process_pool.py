@@ -0,0 +1,60 @@
+"""
+按顺序取回结果的进程池
+
+与 ProcessPoolExecutor.map 相同，结果按提交顺序产生，但同时提交的任务数有上限，
+不会一开始就读取并提交全部任务；使用结果的一方停止迭代（如后台任务被取消）时，
+尚未开始的任务会被取消，进程池只等待正在运行的任务结束。
+"""
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# 每个工作进程最多排队的任务数
+TASKS_PER_WORKER = 2
+
+
+def ordered_map(executor: Executor, func: Callable[[T], R], items: Iterable[T], window: int) -> Iterator[R]:
+    """
+    把 items 逐个交给 executor 执行，按提交顺序产生结果
+
+    Args:
+        executor: 进程池或线程池
+        func: 任务函数（进程池中必须可以 pickle）
+        items: 每个任务的参数
+        window: 最多同时提交的任务数
+    """
+    pending: Deque = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # 生成器被提前关闭或任务出错时取消还在排队的任务
+        for future in pending:
+            future.cancel()
+
+
+def map_chunks(func: Callable[[T], R], chunks: Iterable[T], jobs: Optional[int] = None) -> Iterator[R]:
+    """
+    用进程池按顺序处理每一块，产生每一块的结果
+
+    Args:
+        func: 处理一块的函数
+        chunks: 各块的参数
+        jobs: 工作进程数，默认为CPU核数；为1时在当前进程中执行
+    """
+    if jobs == 1:
+        for chunk in chunks:
+            yield func(chunk)
+        return
+
+    workers = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from ordered_map(executor, func, chunks, workers * TASKS_PER_WORKER)
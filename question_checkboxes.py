@@ -0,0 +1,168 @@
+"""
+选项复选框编辑
+
+解析一次题目文本，记录每个选项复选框状态字符（[ ] 或 [x] 中间的字符）的位置，
+之后的选中、取消选中都直接修改可变缓冲区中的一个字符，不再反复查找和替换整个字符串。
+缓冲区挂在正在显示的题目上（见 question_model.Question.checkboxes），
+每次按键只修改一个字符，只有读取题目内容（渲染、保存、导出）时才拼接成字符串。
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import question_grammar as grammar
+
+__all__ = ['CheckboxBuffer', 'QuestionCheckboxes']
+
+
+class CheckboxBuffer:
+    """
+    一段题目文本的复选框编辑缓冲区
+
+    每个选项字母在引用块内和引用块外各记录一个锚点（第一次出现的选项），
+    设置状态时只修改锚点；读取状态时以引用块内的锚点为准（与 question_grammar.find_option 相同）。
+    解析、建立缓冲区各只进行一次，设置状态为 O(1)，拼接后的文本缓存到下一次修改。
+
+    Args:
+        text: 题目文本（带引用部分、不带引用部分或原始内容）
+    """
+
+    __slots__ = ('_text', '_chars', '_offsets', '_changed', '_joined')
+
+    def __init__(self, text: str):
+        self._text = text
+        self._chars: Optional[List[str]] = None      # 第一次修改时才建立可变缓冲区
+        self._offsets: Dict[str, List[int]] = {}     # 选项字母 -> 锚点状态字符的位置（引用块内的在前）
+        self._changed: Set[int] = set()              # 与原文本不同的位置
+        self._joined: Optional[str] = None           # 拼接后的文本，修改后失效
+        seen: Set[Tuple[str, bool]] = set()
+        tokens = grammar.parse_options(text)
+        for token in sorted(tokens, key=lambda token: not token.quoted):
+            if (token.letter, token.quoted) not in seen:
+                seen.add((token.letter, token.quoted))
+                self._offsets.setdefault(token.letter, []).append(token.checkbox)
+
+    @property
+    def letters(self) -> List[str]:
+        """文本中出现的选项字母"""
+        return list(self._offsets)
+
+    @property
+    def modified(self) -> bool:
+        return bool(self._changed)
+
+    @property
+    def text(self) -> str:
+        """修改后的文本（只在有修改后第一次读取时拼接）"""
+        if not self._changed:
+            return self._text
+        if self._joined is None:
+            self._joined = ''.join(self._chars)
+        return self._joined
+
+    def is_selected(self, letter: str) -> Optional[bool]:
+        """选项是否选中，没有这个选项时返回 None"""
+        offsets = self._offsets.get(letter)
+        if not offsets:
+            return None
+        chars = self._chars if self._chars is not None else self._text
+        return chars[offsets[0]] == 'x'
+
+    def set(self, letter: str, selected: bool) -> bool:
+        """设置选项的选中状态（只修改锚点），返回是否有变化"""
+        status = 'x' if selected else ' '
+        changed = False
+        for offset in self._offsets.get(letter, ()):
+            chars = self._chars if self._chars is not None else self._text
+            if chars[offset] == status:
+                continue
+            if self._chars is None:
+                self._chars = list(self._text)
+            self._chars[offset] = status
+            if status == self._text[offset]:
+                self._changed.discard(offset)
+            else:
+                self._changed.add(offset)
+            self._joined = None
+            changed = True
+        return changed
+
+    def select(self, letter: str) -> bool:
+        return self.set(letter, True)
+
+    def deselect(self, letter: str) -> bool:
+        return self.set(letter, False)
+
+    def toggle(self, letter: str) -> bool:
+        """切换选项的选中状态，没有这个选项时返回 False"""
+        selected = self.is_selected(letter)
+        return selected is not None and self.set(letter, not selected)
+
+    def set_exact(self, letters: Iterable[str]) -> bool:
+        """只选中指定的选项，其余选项全部取消选中"""
+        letters = set(letters)
+        changed = False
+        for letter in self._offsets:
+            changed |= self.set(letter, letter in letters)
+        return changed
+
+    def selected(self) -> List[str]:
+        """选中的选项字母"""
+        return [letter for letter in self._offsets if self.is_selected(letter)]
+
+
+class QuestionCheckboxes:
+    """
+    同时编辑一道题目带引用部分和不带引用部分的复选框
+
+    Question 通过 checkboxes() 持有一个实例，题目显示期间两部分内容直接从缓冲区读取；
+    字典题目在修改后调用 apply() 把有变化的部分写回。
+
+    Args:
+        question: 题目（字典或 Question）
+    """
+
+    FIELDS = ('with_quotes', 'without_quotes')
+
+    def __init__(self, question):
+        self.question = question
+        self.buffers = {field: CheckboxBuffer(question[field]) for field in self.FIELDS}
+        self.answers_cleared = False  # 是否已经清除过答案和解析（改变选择后只需清除一次）
+
+    def text(self, field: str) -> str:
+        return self.buffers[field].text
+
+    @property
+    def modified(self) -> bool:
+        return any(buffer.modified for buffer in self.buffers.values())
+
+    def is_selected(self, letter: str) -> bool:
+        """选项在带引用部分中是否选中（带引用部分没有这个选项时看不带引用部分）"""
+        for buffer in self.buffers.values():
+            selected = buffer.is_selected(letter)
+            if selected is not None:
+                return selected
+        return False
+
+    def select(self, letter: str) -> bool:
+        return self._each(lambda buffer: buffer.select(letter))
+
+    def deselect(self, letter: str) -> bool:
+        return self._each(lambda buffer: buffer.deselect(letter))
+
+    def set_exact(self, letters: Iterable[str]) -> bool:
+        letters = list(letters)
+        return self._each(lambda buffer: buffer.set_exact(letters))
+
+    def _each(self, operation) -> bool:
+        changed = False
+        for buffer in self.buffers.values():
+            changed |= operation(buffer)
+        return changed
+
+    def apply(self) -> bool:
+        """把有变化的部分写回题目，返回是否有变化"""
+        changed = False
+        for field, buffer in self.buffers.items():
+            if buffer.modified:
+                self.question[field] = buffer.text
+                changed = True
+        return changed
@@ -0,0 +1,246 @@
+"""
+题目处理命令行工具
+
+不依赖 tkinter、tkhtmlview 和 PIL，可以在没有图形界面的服务器上批量处理题库。
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+
+import question_core
+import question_fix
+from question_core import TYPE_NONSTANDARD
+from question_dedup import DEDUP_MODES, Deduplicator, HashStore
+from question_images import QuestionImages
+from question_index import SCHEME_SEPARATOR, load_or_build_index
+from question_lint import DEFAULT_CHUNK_SIZE, lint_files, report_format_for, write_report
+from question_similar import DEFAULT_NUM_PERM, DEFAULT_THRESHOLD, SimilarQuestions
+from question_store import LazyQuestionStore
+
+
+def default_output(input_file: str, suffix: str, ext: str = None) -> str:
+    """在输入文件名后添加后缀作为默认输出文件名"""
+    base, input_ext = os.path.splitext(input_file)
+    return f"{base}_{suffix}{ext or input_ext}"
+
+
+def cmd_extract(args) -> int:
+    """提取题目，每道题输出为一行JSON"""
+    questions = question_core.load_questions(args.input)
+    images = QuestionImages.build(args.input)
+    output = args.output or default_output(args.input, "questions", ".jsonl")
+    store = HashStore(args.dedup_store) if args.dedup else None
+    dedup = Deduplicator(store, args.dedup) if args.dedup else None
+    written = 0
+    with open(output, 'w', encoding='utf-8') as f:
+        for question in questions:
+            if dedup is not None and not dedup.check(question['original'], args.input, question['index']):
+                continue
+            record = {
+                'index': question['index'],
+                'option_type': question['option_type'],
+                'error_reason': question['error_reason'],
+                'without_quotes': question['without_quotes'],
+                'with_quotes': question['with_quotes'],
+                'images': images.images_for(question['index'], question['original']),
+            }
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            written += 1
+    print(f"已提取 {written} 道题目到 {output}")
+    if dedup is not None:
+        store.close()
+        print(dedup.summary())
+        dedup.print_report()
+    return 0
+
+
+def cmd_lint(args) -> int:
+    """检查所有题目的选项格式，存在非标准格式的题目时返回1"""
+    results = lint_files(args.input, jobs=args.jobs, chunk_size=args.chunk_size)
+
+    report = None
+    if args.report:
+        report_format = args.format or report_format_for(args.report)
+        report = open(args.report, 'w', encoding='utf-8', newline='')
+        results = write_report(results, report, report_format)
+
+    counts = Counter()
+    start = time.perf_counter()
+    try:
+        for result in results:
+            counts[result.option_type] += 1
+            if result.option_type == TYPE_NONSTANDARD:
+                print(f"{result.file} 第{result.index}题: {result.option_type} - {result.error_reason}")
+    finally:
+        if report is not None:
+            report.close()
+    elapsed = time.perf_counter() - start
+
+    total = sum(counts.values())
+    summary = "，".join(f"{option_type} {count} 道" for option_type, count in counts.most_common())
+    print(f"共 {len(args.input)} 个文件 {total} 道题目：{summary}（用时 {elapsed:.2f} 秒）")
+    if args.report:
+        print(f"检查报告已保存到 {args.report}")
+    return 1 if counts[TYPE_NONSTANDARD] else 0
+
+
+def cmd_fix_all(args) -> int:
+    """并行修复所有题目的选项格式，写入新文件；--dry-run 时只输出修复前后的差异"""
+    index = load_or_build_index(args.input, SCHEME_SEPARATOR)
+    fixes = question_fix.fix_index(index, jobs=args.jobs, chunk_size=args.chunk_size)
+
+    if args.dry_run:
+        if args.diff:
+            with open(args.diff, 'w', encoding='utf-8') as f:
+                f.writelines(question_fix.iter_fix_diff(index, fixes))
+            print(f"共有 {len(fixes)} 道题目需要修复，差异已保存到 {args.diff}")
+        else:
+            sys.stdout.writelines(question_fix.iter_fix_diff(index, fixes))
+        return 0
+
+    output = args.output or default_output(args.input, "fixed")
+    question_core.write_bank(question_fix.iter_fixed_texts(index, fixes), output)
+    print(f"成功修复 {len(fixes)} 道题目的选项格式，已保存到 {output}")
+    return 0
+
+
+def cmd_apply_ai_answers(args) -> int:
+    """并行按每道题的AI答案设置选项选中状态，写入新文件"""
+    index = load_or_build_index(args.input, SCHEME_SEPARATOR)
+    applied = question_fix.apply_answers_index(index, jobs=args.jobs, chunk_size=args.chunk_size)
+
+    output = args.output or default_output(args.input, "ai_answers")
+    question_core.write_bank(question_fix.iter_fixed_texts(index, applied), output)
+    print(f"已按AI答案设置 {len(applied)} 道题目的选项，已保存到 {output}")
+    return 0
+
+
+def cmd_export(args) -> int:
+    """导出所有题目的带引用部分或不带引用部分"""
+    field = 'with_quotes' if args.with_quotes else 'without_quotes'
+    # 导出只需要题目内容：建立索引时不分析选项类型，题目在导出时才按偏移读取
+    index = load_or_build_index(args.input, SCHEME_SEPARATOR)
+    questions = LazyQuestionStore(index, question_core.analyze_option_type)
+    output = args.output or default_output(args.input, field)
+    count = question_core.export_questions(questions, field, output)
+    name = "带引用部分" if args.with_quotes else "不带引用部分"
+    print(f"已导出 {count} 道题目的{name}到 {output}")
+    return 0
+
+
+def cmd_similar(args) -> int:
+    """按 MinHash/LSH 找出相似的题目，列出每组相似题目"""
+    finder = SimilarQuestions(args.threshold, args.num_perm)
+    sources = []
+    start = time.perf_counter()
+    for input_file in args.input:
+        index = load_or_build_index(input_file, SCHEME_SEPARATOR)
+        # 报告索引中记录的题号（跳过空白部分后与位置不同），与界面和其他命令一致
+        for entry, text in zip(index.entries, index.iter_texts()):
+            finder.add(text)
+            sources.append((input_file, entry.number))
+    groups = finder.clusters()
+    elapsed = time.perf_counter() - start
+
+    report = open(args.report, 'w', encoding='utf-8') if args.report else None
+    try:
+        for n, group in enumerate(groups, 1):
+            first = group[0]
+            members = [(*sources[position], finder.similarity(first, position)) for position in group]
+            if report is not None:
+                record = {'group': n, 'questions': [
+                    {'file': file, 'index': number, 'similarity': round(similarity, 3)}
+                    for file, number, similarity in members]}
+                report.write(json.dumps(record, ensure_ascii=False))
+                report.write('\n')
+            else:
+                print(f"相似题目组 {n}（{len(group)} 道）:")
+                for file, number, similarity in members:
+                    print(f"  {file} 第{number}题（相似度 {similarity:.2f}）")
+    finally:
+        if report is not None:
+            report.close()
+
+    grouped = sum(len(group) for group in groups)
+    print(f"共 {len(finder)} 道题目，找到 {len(groups)} 组相似题目，涉及 {grouped} 道题目（用时 {elapsed:.2f} 秒）")
+    if args.report:
+        print(f"相似题目报告已保存到 {args.report}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="题目提取、检查、修复和导出工具（无需图形界面）")
+    parser.add_argument("--debug", action="store_true", help="输出调试日志")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract = subparsers.add_parser("extract", help="提取题目为JSON Lines文件")
+    extract.add_argument("input", help="题库文件路径")
+    extract.add_argument("--output", "-o", help="输出文件路径（默认为 <输入文件名>_questions.jsonl）")
+    extract.add_argument("--dedup", choices=DEDUP_MODES,
+                         help="按规范化内容去重：drop 不输出重复的题目，report 只报告")
+    extract.add_argument("--dedup-store", help="保存已见过的题目哈希的 SQLite 文件，多次运行之间增量去重")
+    extract.set_defaults(func=cmd_extract)
+
+    lint = subparsers.add_parser("lint", help="检查选项格式，列出非标准格式的题目")
+    lint.add_argument("input", nargs="+", help="题库文件路径，可以有多个")
+    lint.add_argument("--jobs", "-j", type=int, help="工作进程数（默认为CPU核数，为1时不使用进程池）")
+    lint.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="每个任务包含的题目数")
+    lint.add_argument("--report", "-r", help="检查报告文件路径，包含每道题的类型、原因和分析用时")
+    lint.add_argument("--format", choices=["jsonl", "csv"], help="报告格式（默认按报告文件扩展名判断）")
+    lint.set_defaults(func=cmd_lint)
+
+    fix_all = subparsers.add_parser("fix-all", help="修复所有题目的选项格式")
+    fix_all.add_argument("input", help="题库文件路径")
+    fix_all.add_argument("--output", "-o", help="输出文件路径（默认为 <输入文件名>_fixed.md）")
+    fix_all.add_argument("--dry-run", "-n", action="store_true", help="不写入文件，只输出修复前后的统一差异")
+    fix_all.add_argument("--diff", help="与 --dry-run 一起使用，把差异保存到文件而不是输出到终端")
+    fix_all.add_argument("--jobs", "-j", type=int, help="工作进程数（默认为CPU核数，为1时不使用进程池）")
+    fix_all.add_argument("--chunk-size", type=int, default=question_fix.DEFAULT_CHUNK_SIZE, help="每个任务包含的题目数")
+    fix_all.set_defaults(func=cmd_fix_all)
+
+    apply_ai = subparsers.add_parser("apply-ai-answers", help="按AI答案设置所有题目的选项")
+    apply_ai.add_argument("input", help="题库文件路径")
+    apply_ai.add_argument("--output", "-o", help="输出文件路径（默认为 <输入文件名>_ai_answers.md）")
+    apply_ai.add_argument("--jobs", "-j", type=int, help="工作进程数（默认为CPU核数，为1时不使用进程池）")
+    apply_ai.add_argument("--chunk-size", type=int, default=question_fix.DEFAULT_CHUNK_SIZE, help="每个任务包含的题目数")
+    apply_ai.set_defaults(func=cmd_apply_ai_answers)
+
+    export = subparsers.add_parser("export", help="导出带引用部分或不带引用部分")
+    export.add_argument("input", help="题库文件路径")
+    part = export.add_mutually_exclusive_group(required=True)
+    part.add_argument("--with-quotes", action="store_true", help="导出带引用部分")
+    part.add_argument("--without-quotes", action="store_true", help="导出不带引用部分")
+    export.add_argument("--output", "-o", help="输出文件路径")
+    export.set_defaults(func=cmd_export)
+
+    similar = subparsers.add_parser("similar", help="查找只差标点、全角半角或选项顺序的相似题目")
+    similar.add_argument("input", nargs="+", help="题库文件路径，可以有多个")
+    similar.add_argument("--threshold", "-t", type=float, default=DEFAULT_THRESHOLD,
+                         help=f"相似度阈值，0-1之间（默认为 {DEFAULT_THRESHOLD}）")
+    similar.add_argument("--num-perm", type=int, default=DEFAULT_NUM_PERM,
+                         help=f"MinHash 签名长度，越长越准确（默认为 {DEFAULT_NUM_PERM}）")
+    similar.add_argument("--report", "-r", help="把相似题目组写入 JSON Lines 报告文件，默认输出到终端")
+    similar.set_defaults(func=cmd_similar)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING,
+                        format='[%(levelname)s] %(name)s: %(message)s')
+
+    for input_file in args.input if isinstance(args.input, list) else [args.input]:
+        if not os.path.exists(input_file):
+            print(f"错误: 文件 {input_file} 不存在")
+            return 2
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+题目处理核心
+
+题目的切分、选项类型分析、选项格式修复、答案处理和导出，不依赖 tkinter，
+图形界面（question_extractor.py）和命令行（question_cli.py）共用这些函数。
+"""
+import logging
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import question_grammar as grammar
+from question_checkboxes import CheckboxBuffer
+from question_index import SCHEME_SEPARATOR, load_or_build_index
+from question_model import extract_with_quotes, extract_without_quotes
+from question_store import LazyQuestionStore
+
+logger = logging.getLogger(__name__)
+
+# 题目之间的分隔符（保存和导出时使用）
+QUESTION_SEPARATOR = '\n\n---\n\n'
+
+# 选项类型
+TYPE_TRUE_FALSE = '判断题'
+TYPE_CHOICE = '普通选择题'
+TYPE_NONSTANDARD = '非标准格式'
+
+__all__ = [
+    'QUESTION_SEPARATOR', 'TYPE_TRUE_FALSE', 'TYPE_CHOICE', 'TYPE_NONSTANDARD',
+    'split_questions_by_separator', 'extract_without_quotes', 'extract_with_quotes',
+    'fix_option_format', 'analyze_option_type', 'analyze_question',
+    'toggle_option', 'select_answers', 'sync_quoted_selection', 'remove_answer_and_analysis',
+    'apply_ai_answer', 'load_questions', 'export_questions', 'write_bank',
+]
+
+
+def split_questions_by_separator(content: str) -> List[str]:
+    """按---分割题目"""
+    # 使用正则表达式分割，保留分割符
+    parts = grammar.SEPARATOR_SPLIT_RE.split(content)
+    questions = []
+    current_question = ""
+
+    for part in parts:
+        if part.strip() == '---':
+            if current_question.strip():
+                questions.append(current_question.strip())
+                current_question = ""
+        else:
+            current_question += part
+
+    # 添加最后一题（如果有）
+    if current_question.strip():
+        questions.append(current_question.strip())
+
+    return questions
+
+
+def fix_option_format(question_content: str) -> Tuple[str, bool]:
+    """自动修复选项格式，将一行多个选项转换为每行一个选项"""
+    logger.debug("开始修复选项格式，内容长度: %s 字符", len(question_content))
+
+    # 逐行处理，引用块内和引用块外的选项行都保留原来的前缀
+    lines = question_content.split('\n')
+    modified = False
+    for i, line in enumerate(lines):
+        if '[' not in line:
+            continue
+        split = grammar.split_option_line(line)
+        if split is None:
+            continue
+        prefix, selected, options = split
+        logger.debug("找到一行多选项格式: %s", options)
+        # 构建修复后的选项行，替换原行
+        lines[i] = '\n'.join(f"{prefix}- [{selected}] {letter}. {content}" for letter, content in options)
+        modified = True
+        logger.debug("已修复选项格式，替换为多行格式")
+
+    logger.debug("选项格式修复完成，是否有修改: %s", modified)
+    return ('\n'.join(lines) if modified else question_content), modified
+
+
+def analyze_option_type(question_content: str) -> Tuple[str, Optional[str]]:
+    """分析题目选项类型，区分判断题和普通选择题，并提供详细的非标准原因"""
+    logger.debug("开始分析选项类型，内容长度: %s 字符", len(question_content))
+
+    # 一次扫描同时提取引用块内和引用块外的复选框列表项格式
+    option_tokens = grammar.parse_options(question_content)
+
+    # 去重（以防重复匹配），保持选项出现的顺序
+    options = list(dict.fromkeys((token.letter, token.content) for token in option_tokens))
+
+    # 详细检查每个选项的格式（只在开启调试日志时进行）
+    if logger.isEnabledFor(logging.DEBUG):
+        quoted_count = sum(token.quoted for token in option_tokens)
+        logger.debug("找到 %s 个引用块内的选项，%s 个引用块外的选项", quoted_count, len(option_tokens) - quoted_count)
+        logger.debug("合并并去重后的选项总数: %s, 选项: %s", len(options), options)
+        for i, token in enumerate(option_tokens, 1):
+            is_valid_letter = token.letter in ['A', 'B', 'C', 'D']
+            is_selected = token.status == 'x'
+            logger.debug("选项%s: 字母='%s', 内容='%s', 是否有效字母: %s, 是否被选中: %s", i, token.letter, token.content, is_valid_letter, is_selected)
+
+    # 检查是否为判断题（只有A 正确和B 错误两个选项）
+    if len(options) == 2:
+        logger.debug("选项数量为2，检查是否为判断题")
+        option0_correct = options[0][0] == 'A' and '正确' in options[0][1]
+        option1_error = options[1][0] == 'B' and '错误' in options[1][1]
+        logger.debug("选项0是A且包含'正确': %s", option0_correct)
+        logger.debug("选项1是B且包含'错误': %s", option1_error)
+
+        if option0_correct and option1_error:
+            logger.debug("符合判断题格式")
+            return TYPE_TRUE_FALSE, None  # 没有错误原因
+        else:
+            logger.debug("不符合判断题格式")
+            return TYPE_NONSTANDARD, f'选项数量为2，但不是标准判断题格式（应为A 正确，B 错误）'
+
+    # 检查是否为普通选择题（有四个选项）
+    elif len(options) == 4:
+        logger.debug("选项数量为4，检查是否为普通选择题")
+        # 检查选项字母是否都在A-D范围内
+        all_valid = all(option[0] in ['A', 'B', 'C', 'D'] for option in options)
+        logger.debug("所有选项字母是否在A-D范围内: %s", all_valid)
+
+        if all_valid:
+            # 检查选项是否连续且唯一
+            option_letters = [option[0] for option in options]
+            logger.debug("选项字母列表: %s", option_letters)
+
+            if sorted(option_letters) == ['A', 'B', 'C', 'D']:
+                logger.debug("选项字母连续且唯一，符合普通选择题格式")
+                return TYPE_CHOICE, None  # 没有错误原因
+            else:
+                logger.debug("选项字母不连续或有重复")
+                return TYPE_NONSTANDARD, f'选项字母不连续或有重复，当前选项字母: {option_letters}'
+        else:
+            invalid_letters = [option[0] for option in options if option[0] not in ['A', 'B', 'C', 'D']]
+            logger.debug("存在无效的选项字母: %s", invalid_letters)
+            return TYPE_NONSTANDARD, f'存在无效的选项字母: {invalid_letters}'
+
+    # 其他情况
+    logger.debug("选项数量%s不符合标准格式要求", len(options))
+    return TYPE_NONSTANDARD, f'选项数量为{len(options)}，不符合标准的判断题（2个选项）或选择题（4个选项）格式'
+
+
+def analyze_question(question_content: str) -> Tuple[str, Optional[str]]:
+    """分析整道题目的选项类型（与界面一致，只分析带引用部分）"""
+    return analyze_option_type(extract_with_quotes(question_content))
+
+
+def toggle_option(question_content: str, selected_option: str) -> str:
+    """切换题目内容中一个选项的选中状态（以引用块内的选项为准）"""
+    buffer = CheckboxBuffer(question_content)
+    # 直接修改复选框状态字符所在的位置，不会误改内容相同的其他行
+    if buffer.toggle(selected_option):
+        logger.debug("切换选项%s的状态为[%s]", selected_option, 'x' if buffer.is_selected(selected_option) else ' ')
+    return buffer.text
+
+
+def select_answers(question_content: str, answers: Iterable[str]) -> str:
+    """把题目中所有选项设置为：答案中的选项选中，其余选项不选中"""
+    buffer = CheckboxBuffer(question_content)
+    buffer.set_exact(answers)
+    return buffer.text
+
+
+def sync_quoted_selection(with_quotes: str, without_quotes: str) -> str:
+    """把带引用部分中引用块内选项的选中状态同步到不带引用部分，返回新的不带引用部分"""
+    # 查找引用块中的选项及其选中状态
+    quoted_options = {}
+    for option in grammar.parse_options(with_quotes):
+        if option.quoted:
+            quoted_options[option.letter] = option.status
+            logger.debug("发现引用块中选项%s，状态: [%s]", option.letter, option.status)
+
+    # 将引用块中的选项状态应用到不带引用部分
+    new_without_quotes = without_quotes
+    for letter, status in quoted_options.items():
+        # 查找不带引用部分的对应选项
+        option = grammar.find_option(grammar.parse_options(new_without_quotes), letter, quoted=False)
+        if option:
+            current_status = option.status
+            if current_status != status:
+                new_without_quotes = new_without_quotes[:option.checkbox] + status + new_without_quotes[option.checkbox + 1:]
+                logger.debug("替换无引用部分选项%s状态从[%s]到[%s]", letter, current_status, status)
+        else:
+            logger.debug("在无引用部分未找到选项%s", letter)
+    return new_without_quotes
+
+
+def remove_answer_and_analysis(content: str) -> str:
+    """移除答案和解析部分"""
+    # 依次移除常见的答案和解析格式（模式见 question_grammar.ANSWER_AND_ANALYSIS_RES）
+    result = content
+    for pattern in grammar.ANSWER_AND_ANALYSIS_RES:
+        result = pattern.sub('', result)
+
+    return result
+
+
+def apply_ai_answer(question_content: str) -> Tuple[str, Optional[List[str]]]:
+    """
+    按题目中的AI答案设置选项的选中状态
+
+    Returns:
+        (新的题目内容, AI答案字母列表)；没有AI答案时内容不变，答案为 None
+    """
+    answers = grammar.parse_ai_answer(question_content)
+    if not answers:
+        return question_content, answers
+    return select_answers(question_content, answers), answers
+
+
+def load_questions(file_path: str) -> LazyQuestionStore:
+    """按 '---' 分隔符加载题库，使用（必要时建立）题目索引，题目内容按需读取"""
+    index = load_or_build_index(file_path, SCHEME_SEPARATOR, analyze_question)
+    return LazyQuestionStore(index, analyze_option_type)
+
+
+def export_questions(questions: Iterable, field: str, filename: str,
+                     progress: Optional[Callable[[int], None]] = None, every: int = 500) -> int:
+    """
+    把所有题目的指定部分导出到文件
+
+    Args:
+        questions: 题目（字典或 Question）
+        field: 'with_quotes'、'without_quotes' 或 'original'
+        filename: 导出文件
+        progress: 每导出 every 道题调用一次，参数为已导出的题目数
+
+    Returns:
+        导出的题目数
+    """
+    count = 0
+    with open(filename, 'w', encoding='utf-8') as f:
+        for count, question in enumerate(questions, 1):
+            f.write(question[field])
+            f.write(QUESTION_SEPARATOR)
+            if progress is not None and count % every == 0:
+                progress(count)
+    return count
+
+
+def write_bank(texts: Iterable[str], filename: str) -> int:
+    """把题目原始内容按 '---' 分隔写成题库文件，返回题目数"""
+    count = 0
+    with open(filename, 'w', encoding='utf-8') as f:
+        for count, text in enumerate(texts, 1):
+            # 在题目之间添加分隔符
+            if count > 1:
+                f.write(QUESTION_SEPARATOR)
+            f.write(text)
+    return count
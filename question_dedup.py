@@ -0,0 +1,144 @@
+"""
+题目去重
+
+对题目内容做规范化（去掉行首引用符号、复选框选中状态和所有空白）后计算哈希，
+相同哈希的题目视为重复。已见过的哈希可以保存在 SQLite 文件中，
+多次合并、分割时增量去重，每个题目块只需要一次按主键的查询。
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+import question_grammar as grammar
+
+logger = logging.getLogger(__name__)
+
+# 去重方式
+DEDUP_DROP = 'drop'        # 丢弃重复的题目
+DEDUP_REPORT = 'report'    # 保留重复的题目，只报告
+DEDUP_MODES = (DEDUP_DROP, DEDUP_REPORT)
+
+
+def normalize_question(text: str) -> str:
+    """去掉行首引用符号、复选框选中状态和所有空白后的题目内容"""
+    text = grammar.QUOTE_PREFIX_RE.sub('', text)
+    text = grammar.CHECKBOX_STATE_RE.sub('[]', text)
+    return grammar.WHITESPACE_RE.sub('', text)
+
+
+def normalized_hash(text: str) -> str:
+    """规范化后内容的哈希"""
+    return hashlib.blake2b(normalize_question(text).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class Duplicate(NamedTuple):
+    """一道重复的题目"""
+    file: str
+    index: int                  # 题目在文件中的序号（从1开始）
+    first_file: str             # 第一次出现的文件
+    first_index: int            # 第一次出现时的序号
+    hash: str
+
+
+class HashStore:
+    """
+    已见过的题目哈希
+
+    Args:
+        path: SQLite 文件路径，为 None 时只保存在内存中（只在本次运行中去重）
+        batch_size: 每写入多少条提交一次
+    """
+
+    def __init__(self, path: Optional[str] = None, batch_size: int = 1000):
+        self.path = path
+        self.batch_size = batch_size
+        self._memory: Dict[str, Tuple[str, int]] = {}
+        self._pending = 0
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                "hash TEXT PRIMARY KEY, file TEXT NOT NULL, idx INTEGER NOT NULL) WITHOUT ROWID")
+
+    def add(self, content_hash: str, file: str, index: int) -> Optional[Tuple[str, int]]:
+        """记录一个哈希；已经见过时不修改记录，返回第一次出现的 (文件, 序号)"""
+        if self._db is None:
+            first = self._memory.setdefault(content_hash, (file, index))
+            return first if first != (file, index) else None
+
+        cursor = self._db.execute("INSERT OR IGNORE INTO questions VALUES (?, ?, ?)", (content_hash, file, index))
+        if cursor.rowcount:
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self._db.commit()
+                self._pending = 0
+            return None
+        row = self._db.execute("SELECT file, idx FROM questions WHERE hash = ?", (content_hash,)).fetchone()
+        return (row[0], row[1]) if tuple(row) != (file, index) else None
+
+    def __len__(self) -> int:
+        if self._db is None:
+            return len(self._memory)
+        return self._db.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def close(self):
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
+
+    def __enter__(self) -> "HashStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Deduplicator:
+    """
+    按规范化哈希找出重复的题目
+
+    Args:
+        store: 已见过的题目哈希
+        mode: DEDUP_DROP 丢弃重复的题目，DEDUP_REPORT 只报告
+    """
+
+    def __init__(self, store: HashStore, mode: str = DEDUP_DROP):
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"未知的去重方式: {mode}")
+        self.store = store
+        self.mode = mode
+        self.duplicates: List[Duplicate] = []
+
+    def check(self, text: str, file: str, index: int) -> bool:
+        """检查一道题目，返回是否保留"""
+        content_hash = normalized_hash(text)
+        first = self.store.add(content_hash, file, index)
+        if first is None:
+            return True
+        self.duplicates.append(Duplicate(file, index, first[0], first[1], content_hash))
+        logger.debug("%s 第%s题与 %s 第%s题重复", file, index, first[0], first[1])
+        return self.mode == DEDUP_REPORT
+
+    def filter(self, texts: Iterable[str], file: str) -> Iterator[Tuple[int, str]]:
+        """产生要保留的题目 (序号, 内容)，序号从1开始"""
+        for index, text in enumerate(texts, 1):
+            if self.check(text, file, index):
+                yield index, text
+
+    def summary(self) -> str:
+        action = "已丢弃" if self.mode == DEDUP_DROP else "已保留"
+        return f"发现 {len(self.duplicates)} 道重复题目（{action}）"
+
+    def write_report(self, f: TextIO):
+        """把重复的题目写成 JSON Lines"""
+        for duplicate in self.duplicates:
+            f.write(json.dumps(duplicate._asdict(), ensure_ascii=False))
+            f.write('\n')
+
+    def print_report(self):
+        for duplicate in self.duplicates:
+            print(f"重复: {duplicate.file} 第{duplicate.index}题 与 {duplicate.first_file} 第{duplicate.first_index}题 相同")
@@ -1,12 +1,45 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
-import re
+import bisect
+import html
+import logging
 import os
 import json
+import sys
+import time
 from tkhtmlview import HTMLLabel
 import markdown
-from PIL import Image, ImageTk
 import datetime
+from contextlib import closing
+
+from autosave_journal import AutosaveJournal, journal_path_for
+from background_task import BackgroundTask
+from image_cache import ImageCache
+import question_core
+import question_fix
+import question_grammar as grammar
+from question_images import QuestionImages
+from question_index import SCHEME_SEPARATOR, QuestionIndex, content_hash, iter_index_entries
+from question_list import VirtualQuestionList
+from question_similar import SimilarQuestions
+from question_store import LazyQuestionStore
+from render_archive import RenderArchive
+from render_scheduler import RenderScheduler
+from render_cache import RenderCache
+from render_prefetcher import RenderPrefetcher
+
+logger = logging.getLogger(__name__)
+
+# 批量修复时每个任务包含的题目数
+FIX_CHUNK_SIZE = 200
+
+# 预先渲染当前题目后面和前面的题目数
+PREFETCH_AHEAD = 3
+PREFETCH_BEHIND = 1
+
+# 等待后台解码图片时检查的间隔（毫秒）和最长等待时间（秒）
+IMAGE_POLL_MS = 30
+IMAGE_WAIT_SECONDS = 5
 
 # 添加DPI感知支持，适应高分辨率屏幕和缩放倍率
 try:
@@ -17,38 +50,62 @@ except:
 
 class QuestionExtractor:
     def __init__(self):
-        print("[调试] 初始化QuestionExtractor")
+        logger.debug("初始化QuestionExtractor")
         self.root = tk.Tk()
-        print("[调试] 主窗口创建成功")
+        logger.debug("主窗口创建成功")
         self.root.title("题目提取工具 - 公式渲染测试版")
         self.root.geometry("1100x800")
-        print("[调试] 窗口尺寸设置成功")
+        logger.debug("窗口尺寸设置成功")
         
         # 计算适合的字体大小，考虑DPI缩放
         self.font_size = 12  # 增大基础字体大小
         self.font_config = {"font": ("SimHei", self.font_size)}
-        print("[调试] 字体配置完成")
+        logger.debug("字体配置完成")
         
         self.file_path = None
         self.questions = []
         self.current_question_index = -1
         self.toolbar = None  # 添加toolbar属性初始化
+        self.current_task = None  # 当前正在运行的后台任务
+        self.render_cache = RenderCache()  # 按内容、主题和渲染目标缓存渲染结果
+        self.render_archive = RenderArchive()  # 后台写入渲染结果的存档
+        self.render_prefetcher = RenderPrefetcher(self.render_cache)  # 空闲时预先渲染相邻题目
+        self.image_cache = ImageCache()  # 缩放后的图片和文件夹图片列表
+        self.image_files = []  # 当前图片所在文件夹中的所有图片
+        self.current_image_index = -1
+        self.current_image = None
+        self.question_images = None  # 题目与图片的对应关系，提取题目时建立
+        self.showing_question_images = False  # 图片面板是否在显示当前题目的图片
+        self._pending_image = None  # 正在后台解码、解码完成后显示的图片
+        self.image_prefetcher = RenderPrefetcher(self.image_cache, idle_delay=0.05)  # 后台预先解码相邻图片
+        self.autosave_journal = None  # 当前题库的自动保存日志
+        self.similar_questions = None  # 相似题目分组，第一次查找相似题目时在后台建立
+        # 连续切换题目时合并渲染，只渲染最后停留的题目
+        self.render_scheduler = RenderScheduler(self.root, lambda position: self.display_current_question(),
+                                                preview=self.show_question_preview)
         
         # 渲染模式：text或html
         self.render_mode = tk.StringVar(value="html")
-        print("[调试] 渲染模式变量初始化成功")
+        logger.debug("渲染模式变量初始化成功")
         
         # 自动保存选项
         self.auto_save_var = tk.BooleanVar(value=False)
-        print("[调试] 自动保存变量初始化成功")
+        logger.debug("自动保存变量初始化成功")
         
         # 单选模式选项
         self.single_choice_var = tk.BooleanVar(value=True)
-        print("[调试] 单选模式变量初始化成功")
+        logger.debug("单选模式变量初始化成功")
+        
+        # 渲染存档选项，开启后把每道题的渲染结果保存到render_output目录
+        self.render_archive_var = tk.BooleanVar(value=False)
+        logger.debug("渲染存档变量初始化成功")
         
         # 夜间模式选项
         self.dark_mode_var = tk.BooleanVar(value=False)
-        print("[调试] 夜间模式变量初始化成功")
+        logger.debug("夜间模式变量初始化成功")
+        
+        # 题目列表只显示非标准格式的题目
+        self.nonstandard_only_var = tk.BooleanVar(value=False)
         
         # 颜色配置
         self.color_schemes = {
@@ -71,60 +128,64 @@ class QuestionExtractor:
                 'html_text': '#e0e0e0'
             }
         }
-        print("[调试] 颜色方案初始化成功")
+        logger.debug("颜色方案初始化成功")
         
         # 设置配置文件路径
         self.config_dir = os.path.join(os.path.expanduser("~"), ".question_extractor")
         self.config_file = os.path.join(self.config_dir, "config.json")
-        print(f"[调试] 配置文件路径设置为: {self.config_file}")
+        logger.debug("配置文件路径设置为: %s", self.config_file)
         
         # 确保配置目录存在
         if not os.path.exists(self.config_dir):
             os.makedirs(self.config_dir)
-            print(f"[调试] 创建配置目录: {self.config_dir}")
+            logger.debug("创建配置目录: %s", self.config_dir)
         
         self.setup_ui()
-        print("[调试] UI设置完成")
+        logger.debug("UI设置完成")
         
         # 加载配置并尝试恢复上次进度
         self.restore_last_session()
         
         # 添加窗口关闭协议处理，确保退出时保存配置
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
-        print("[调试] 窗口关闭协议设置完成")
+        logger.debug("窗口关闭协议设置完成")
         
         # 绑定快捷键（移到这里确保UI完全初始化后立即绑定）
         # 绑定空格键事件到下一题功能
         self.root.bind('<space>', lambda event: self.next_question())
-        print("[调试] 空格键快捷键绑定成功")
+        logger.debug("空格键快捷键绑定成功")
         
         # 修复数字键绑定，使用正确的事件绑定格式
         def on_key_press(event, key):
-            print(f"[调试] 捕获到键按下事件: {key}")
+            logger.debug("捕获到键按下事件: %s", key)
             return self.select_option(key)
         
         # 绑定数字键1-4到选项选择功能
         for key in ['1', '2', '3', '4']:
             self.root.bind(key, lambda event, k=key: on_key_press(event, k))
-        print("[调试] 数字键1-4快捷键绑定成功")
+        logger.debug("数字键1-4快捷键绑定成功")
         
         # 设置焦点事件，确保窗口获得焦点时能接收键盘事件
         def on_focus_in(event):
-            print("[调试] 窗口获得焦点")
+            # 题目列表获得焦点时不抢回焦点，否则列表的回车键绑定永远不会触发
+            # （列表的按键事件同样会传到根窗口的绑定，快捷键不受影响）
+            if event.widget is self.question_list.canvas:
+                return
+            logger.debug("窗口获得焦点")
             self.root.focus_set()
         
         self.root.bind('<FocusIn>', on_focus_in)
         # 初始设置焦点
         self.root.focus_set()
-        print("[调试] 窗口焦点设置成功")
-        print("[调试] 所有快捷键绑定完成")
+        logger.debug("窗口焦点设置成功")
+        logger.debug("所有快捷键绑定完成")
     
     def setup_ui(self):
-        print("[调试] 开始设置UI")
+        logger.debug("开始设置UI")
         # 顶部工具栏
         self.toolbar = tk.Frame(self.root, bg="#f0f0f0", padx=10, pady=5)
         self.toolbar.pack(fill=tk.X)
-        print("[调试] 顶部工具栏创建成功")
+        logger.debug("顶部工具栏创建成功")
         
         tk.Button(self.toolbar, text="选择文件", command=self.select_file, **self.font_config).pack(side=tk.LEFT, padx=5)
         tk.Button(self.toolbar, text="提取题目", command=self.extract_questions, **self.font_config).pack(side=tk.LEFT, padx=5)
@@ -132,22 +193,29 @@ class QuestionExtractor:
         tk.Button(self.toolbar, text="导出不带引用部分", command=self.export_without_quotes, **self.font_config).pack(side=tk.LEFT, padx=5)
         tk.Button(self.toolbar, text="导出带引用部分", command=self.export_with_quotes, **self.font_config).pack(side=tk.LEFT, padx=5)
         tk.Button(self.toolbar, text="保存文件", command=self.save_file_with_timestamp, **self.font_config).pack(side=tk.LEFT, padx=5)
+        tk.Button(self.toolbar, text="导出渲染题库", command=self.export_rendered_bank, **self.font_config).pack(side=tk.LEFT, padx=5)
         
         # 添加新功能按钮
         tk.Button(self.toolbar, text="引用选项替换", command=self.replace_quote_options_without_quotes, **self.font_config).pack(side=tk.LEFT, padx=5)
         tk.Button(self.toolbar, text="AI答案自动选择", command=self.auto_select_by_ai_answer, **self.font_config).pack(side=tk.LEFT, padx=5)
+        tk.Button(self.toolbar, text="AI答案全部选择", command=self.auto_select_all_by_ai_answer, **self.font_config).pack(side=tk.LEFT, padx=5)
+        tk.Button(self.toolbar, text="相似题目", command=self.jump_to_similar_question, **self.font_config).pack(side=tk.LEFT, padx=5)
+        
+        # 取消后台任务按钮，只在有任务运行时可用
+        self.cancel_button = tk.Button(self.toolbar, text="取消任务", command=self.cancel_current_task, state=tk.DISABLED, **self.font_config)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
         
-        print("[调试] 工具栏按钮创建成功")
+        logger.debug("工具栏按钮创建成功")
         
         # 文件信息标签
         self.file_label = tk.Label(self.toolbar, text="formula_test.md", fg="gray", **self.font_config)
         self.file_label.pack(side=tk.LEFT, padx=10)
-        print("[调试] 文件信息标签创建成功")
+        logger.debug("文件信息标签创建成功")
         
         # 题目导航区域
         nav_frame = tk.Frame(self.root, pady=5)
         nav_frame.pack(fill=tk.X, padx=10)
-        print("[调试] 题目导航区域创建成功")
+        logger.debug("题目导航区域创建成功")
         
         tk.Label(nav_frame, text="题目导航:", **self.font_config).pack(side=tk.LEFT)
         
@@ -159,7 +227,7 @@ class QuestionExtractor:
         
         self.question_info = tk.Label(nav_frame, text="共0题，当前第0题", **self.font_config)
         self.question_info.pack(side=tk.LEFT, padx=10)
-        print("[调试] 导航按钮创建成功")
+        logger.debug("导航按钮创建成功")
         
         # 添加进度条（拖动滑动框）
         self.progress_var = tk.DoubleVar()
@@ -167,7 +235,7 @@ class QuestionExtractor:
                                     variable=self.progress_var, showvalue=False, state=tk.DISABLED,
                                     command=self.on_progress_change)
         self.progress_bar.pack(side=tk.LEFT, padx=10)
-        print("[调试] 进度条（拖动滑动框）创建成功")
+        logger.debug("进度条（拖动滑动框）创建成功")
         
         # 添加题目跳转功能
         jump_frame = tk.Frame(nav_frame)
@@ -178,7 +246,7 @@ class QuestionExtractor:
         self.jump_entry.pack(side=tk.LEFT, padx=5)
         self.jump_button = tk.Button(jump_frame, text="跳转", command=self.jump_to_question, **self.font_config)
         self.jump_button.pack(side=tk.LEFT)
-        print("[调试] 题目跳转功能创建成功")
+        logger.debug("题目跳转功能创建成功")
         
         # 设置选项框架
         settings_frame = tk.Frame(self.root, pady=5)
@@ -194,18 +262,33 @@ class QuestionExtractor:
         # 自动保存选项
         tk.Checkbutton(settings_frame, text="自动保存选择", variable=self.auto_save_var, 
                       **self.font_config).pack(side=tk.LEFT, padx=20)
-        print("[调试] 自动保存选项创建成功")
+        logger.debug("自动保存选项创建成功")
         
         # 单选模式选项
         tk.Checkbutton(settings_frame, text="单选模式", variable=self.single_choice_var, 
                       **self.font_config).pack(side=tk.LEFT, padx=10)
-        print("[调试] 单选模式选项创建成功")
-        print("[调试] 设置选项框架创建成功")
+        logger.debug("单选模式选项创建成功")
+        
+        # 渲染存档选项
+        tk.Checkbutton(settings_frame, text="保存渲染结果", variable=self.render_archive_var, 
+                      **self.font_config).pack(side=tk.LEFT, padx=10)
+        logger.debug("渲染存档选项创建成功")
+        logger.debug("设置选项框架创建成功")
         
         # 内容显示区域
         content_frame = tk.Frame(self.root)
         content_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        print("[调试] 内容显示区域创建成功")
+        logger.debug("内容显示区域创建成功")
+        
+        # 最左侧题目列表，只为可见行创建元素，行内容来自题目索引，不渲染题目
+        list_frame = tk.LabelFrame(content_frame, text="题目列表", **self.font_config)
+        list_frame.pack(fill=tk.Y, side=tk.LEFT, padx=5)
+        tk.Checkbutton(list_frame, text="只看非标准格式", variable=self.nonstandard_only_var,
+                      command=self.update_question_list_filter, **self.font_config).pack(anchor=tk.W)
+        self.question_list = VirtualQuestionList(list_frame, self.question_metadata, self.go_to_question,
+                                                 font=("SimHei", self.font_size - 2))
+        self.question_list.pack(fill=tk.BOTH, expand=True)
+        logger.debug("题目列表创建成功")
         
         # 左侧主面板容器
         left_panel = tk.Frame(content_frame)
@@ -218,7 +301,7 @@ class QuestionExtractor:
         # 图片显示标签
         self.image_label = tk.Label(image_frame, text="图片将在此处显示", **self.font_config, relief=tk.SUNKEN)
         self.image_label.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        print("[调试] 图片显示面板创建成功")
+        logger.debug("图片显示面板创建成功")
         
         # 不带引用部分（左侧上方）
         no_quote_frame = tk.LabelFrame(left_panel, text="不带引用部分", **self.font_config)
@@ -238,7 +321,7 @@ class QuestionExtractor:
         # 默认显示HTML视图
         self.no_quote_text_frame.pack_forget()
         self.no_quote_html_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        print("[调试] 不带引用部分视图创建成功")
+        logger.debug("不带引用部分视图创建成功")
         
         # 带引用部分（左侧下方）
         quote_frame = tk.LabelFrame(left_panel, text="带引用部分", **self.font_config)
@@ -258,40 +341,48 @@ class QuestionExtractor:
         # 默认显示HTML视图
         self.quote_text_frame.pack_forget()
         self.quote_html_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        print("[调试] 带引用部分视图创建成功")
+        logger.debug("带引用部分视图创建成功")
         
         # 添加状态栏
         self.status_bar = tk.Label(self.root, text="就绪", bd=1, relief=tk.SUNKEN, anchor=tk.W, **self.font_config)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
-        print("[调试] 状态栏创建成功")
+        logger.debug("状态栏创建成功")
         
         # 绑定f键为当前题目修复快捷键
         self.root.bind('<KeyPress-f>', lambda event: self.fix_current_question_format())
-        print("[调试] f键快捷键绑定为修复当前题目")
+        logger.debug("f键快捷键绑定为修复当前题目")
         
         # 绑定Ctrl+S快捷键用于保存文件
         self.root.bind('<Control-s>', lambda event: self.save_file_with_timestamp())
-        print("[调试] Ctrl+S快捷键绑定为保存文件")
+        logger.debug("Ctrl+S快捷键绑定为保存文件")
         
         # 绑定Q和E键用于图片导航
         self.root.bind('<KeyPress-q>', lambda event: self.navigate_to_prev_image())
         self.root.bind('<KeyPress-e>', lambda event: self.navigate_to_next_image())
-        print("[调试] Q键绑定为上一张图片，E键绑定为下一张图片")
+        logger.debug("Q键绑定为上一张图片，E键绑定为下一张图片")
+        
+        # 绑定G键跳转到相似题目
+        self.root.bind('<KeyPress-g>', lambda event: self.jump_to_similar_question())
+        logger.debug("G键绑定为跳转到相似题目")
+        
+        # 绑定Esc键取消后台任务
+        self.root.bind('<Escape>', lambda event: self.cancel_current_task())
+        logger.debug("Esc键绑定为取消后台任务")
         
         # 绑定方向键左右控制上下一题
         self.root.bind('<Left>', lambda event: self.prev_question())
         self.root.bind('<Right>', lambda event: self.next_question())
-        print("[调试] 方向键左右已绑定到题目导航功能")
+        logger.debug("方向键左右已绑定到题目导航功能")
         
         # 添加夜间模式切换按钮
         self.theme_toggle = tk.Checkbutton(self.toolbar, text="夜间模式", variable=self.dark_mode_var,
                                          command=self.toggle_dark_mode, **self.font_config)
         self.theme_toggle.pack(side=tk.RIGHT, padx=5)
-        print("[调试] 夜间模式切换按钮添加成功")
+        logger.debug("夜间模式切换按钮添加成功")
         
         # 添加加载图片按钮
         tk.Button(self.toolbar, text="加载图片", command=self.load_image, **self.font_config).pack(side=tk.RIGHT, padx=5)
-        print("[调试] 加载图片按钮添加成功")
+        logger.debug("加载图片按钮添加成功")
     
     def select_file(self):
         filename = filedialog.askopenfilename(
@@ -301,14 +392,14 @@ class QuestionExtractor:
         if filename:
             self.file_path = filename
             self.file_label.config(text=os.path.basename(filename), fg="black")
-            print(f"[调试] 已选择文件: {os.path.basename(filename)}")
+            logger.debug("已选择文件: %s", os.path.basename(filename))
             # 选择文件后自动提取题目
-            print(f"[调试] 自动开始提取题目")
+            logger.debug("自动开始提取题目")
             self.extract_questions()
     
     def load_image(self):
         """加载并显示图片"""
-        print("[调试] 打开图片选择对话框")
+        logger.debug("打开图片选择对话框")
         file_types = [
             ("所有图片文件", "*.png *.jpg *.jpeg *.gif *.bmp *.tiff *.webp"),
             ("PNG文件", "*.png"),
@@ -323,80 +414,27 @@ class QuestionExtractor:
         )
         
         if filename:
-            try:
-                print(f"[调试] 加载图片: {filename}")
-                # 打开图片并调整大小以适应显示区域
-                image = Image.open(filename)
-                
-                # 获取显示区域的尺寸
-                width = self.image_label.winfo_width()
-                height = self.image_label.winfo_height()
-                
-                # 如果尺寸为0（尚未渲染），使用默认值
-                if width <= 1 or height <= 1:
-                    width, height = 400, 300
-                
-                # 计算图片缩放比例，保持宽高比
-                img_ratio = image.width / image.height
-                frame_ratio = width / height
-                
-                if img_ratio > frame_ratio:
-                    # 图片更宽，按宽度缩放
-                    new_width = width - 20  # 留出边距
-                    new_height = int(new_width / img_ratio)
-                else:
-                    # 图片更高，按高度缩放
-                    new_height = height - 20  # 留出边距
-                    new_width = int(new_height * img_ratio)
-                
-                # 调整图片大小
-                resized_image = image.resize((new_width, new_height), Image.LANCZOS)
-                
-                # 转换为Tkinter可用的格式
-                tk_image = ImageTk.PhotoImage(resized_image)
-                
-                # 保存图片引用，防止被垃圾回收
-                self.current_image = tk_image
-                
-                # 保存当前图片路径并获取同一文件夹中的所有图片
-                self.current_image_path = filename
-                self._load_folder_images(filename)
-                
-                # 更新标签显示图片
-                self.image_label.config(image=tk_image, text="")
-                
-                # 更新状态栏
-                self.status_bar.config(text=f"已加载图片: {os.path.basename(filename)}")
-                print(f"[调试] 图片加载成功: {os.path.basename(filename)}")
-                
-            except Exception as e:
-                messagebox.showerror("错误", f"无法加载图片: {str(e)}")
-                self.status_bar.config(text=f"加载图片失败: {str(e)}")
-                print(f"[调试] 图片加载失败: {str(e)}")
+            logger.debug("加载图片: %s", filename)
+            # 手动选择的图片按文件夹浏览，不再跟随题目切换
+            self.showing_question_images = False
+            self._pending_image = None
+            # 获取同一文件夹中的所有图片，再显示选中的图片
+            self._load_folder_images(filename)
+            self._load_image_by_path(filename)
                 
     def _load_folder_images(self, current_image_path):
-        """加载当前图片所在文件夹中的所有图片"""
+        """加载当前图片所在文件夹中的所有图片（文件夹内容没有变化时使用缓存的列表）"""
         try:
-            folder_path = os.path.dirname(current_image_path)
-            # 支持的图片扩展名
-            image_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp'}
-            
-            # 获取文件夹中所有图片文件
-            self.image_files = []
-            for file in os.listdir(folder_path):
-                if any(file.lower().endswith(ext) for ext in image_extensions):
-                    self.image_files.append(os.path.join(folder_path, file))
-            
-            # 排序以确保顺序一致
-            self.image_files.sort()
+            folder_path = os.path.dirname(os.path.abspath(current_image_path))
+            self.image_files = self.image_cache.folder_images(folder_path)
             
             # 找到当前图片在列表中的索引
-            self.current_image_index = self.image_files.index(current_image_path)
+            self.current_image_index = self.image_files.index(os.path.abspath(current_image_path))
             
-            print(f"[调试] 加载了{len(self.image_files)}张图片，当前是第{self.current_image_index + 1}张")
+            logger.debug("加载了%s张图片，当前是第%s张", len(self.image_files), self.current_image_index + 1)
             
         except Exception as e:
-            print(f"[调试] 加载文件夹图片失败: {str(e)}")
+            logger.error("加载文件夹图片失败: %s", e)
             self.image_files = [current_image_path]
             self.current_image_index = 0
     
@@ -418,40 +456,21 @@ class QuestionExtractor:
         self.current_image_index = (self.current_image_index - 1) % len(self.image_files)
         self._load_image_by_path(self.image_files[self.current_image_index])
     
+    def image_box(self):
+        """图片显示区域的尺寸，尚未显示时使用默认值"""
+        width = self.image_label.winfo_width()
+        height = self.image_label.winfo_height()
+        if width <= 1 or height <= 1:
+            return 400, 300
+        return width, height
+    
     def _load_image_by_path(self, file_path):
-        """根据文件路径加载图片"""
+        """根据文件路径加载图片，缩放结果按路径、修改时间和显示区域大小缓存"""
+        self._pending_image = None
         try:
-            print(f"[调试] 导航加载图片: {os.path.basename(file_path)}")
-            
-            # 打开图片并调整大小以适应显示区域
-            image = Image.open(file_path)
-            
-            # 获取显示区域的尺寸
-            width = self.image_label.winfo_width()
-            height = self.image_label.winfo_height()
-            
-            # 如果尺寸为0（尚未渲染），使用默认值
-            if width <= 1 or height <= 1:
-                width, height = 400, 300
-            
-            # 计算图片缩放比例，保持宽高比
-            img_ratio = image.width / image.height
-            frame_ratio = width / height
-            
-            if img_ratio > frame_ratio:
-                # 图片更宽，按宽度缩放
-                new_width = width - 20  # 留出边距
-                new_height = int(new_width / img_ratio)
-            else:
-                # 图片更高，按高度缩放
-                new_height = height - 20  # 留出边距
-                new_width = int(new_height * img_ratio)
-            
-            # 调整图片大小
-            resized_image = image.resize((new_width, new_height), Image.LANCZOS)
-            
-            # 转换为Tkinter可用的格式
-            tk_image = ImageTk.PhotoImage(resized_image)
+            logger.debug("导航加载图片: %s", os.path.basename(file_path))
+            box = self.image_box()
+            tk_image = self.image_cache.get_photo(file_path, box)
             
             # 保存图片引用，防止被垃圾回收
             self.current_image = tk_image
@@ -462,16 +481,107 @@ class QuestionExtractor:
             
             # 更新状态栏
             self.status_bar.config(text=f"已加载图片: {os.path.basename(file_path)} ({self.current_image_index + 1}/{len(self.image_files)})")
-            print(f"[调试] 图片加载成功: {os.path.basename(file_path)} ({self.current_image_index + 1}/{len(self.image_files)})")
+            logger.debug("图片加载成功: %s (%s/%s)，%s", os.path.basename(file_path), self.current_image_index + 1,
+                         len(self.image_files), self.image_cache.stats())
+            
+            # 在后台预先解码前后相邻的图片
+            self.prefetch_images(box)
             
         except Exception as e:
             messagebox.showerror("错误", f"无法加载图片: {str(e)}")
             self.status_bar.config(text=f"加载图片失败: {str(e)}")
-            print(f"[调试] 图片加载失败: {str(e)}")
+            logger.error("图片加载失败: %s", e)
+    
+    def prefetch_images(self, box, first=()):
+        """
+        安排后台线程预先解码图片：先是 first 中的图片，然后是当前图片前后的图片，
+        显示题目图片时还包括相邻题目的图片
+        """
+        paths = list(first)
+        count = len(self.image_files)
+        if count > 1:
+            offsets = [1, -1, 2] if count > 3 else range(1, count)
+            paths.extend(self.image_files[(self.current_image_index + offset) % count] for offset in offsets)
+        if self.showing_question_images:
+            current = self.current_question_index
+            for position in (current + 1, current - 1, *range(current + 2, current + PREFETCH_AHEAD + 1)):
+                if 0 <= position < len(self.questions):
+                    paths.extend(self.question_image_paths(position)[:2])
+        
+        jobs = []
+        for path in dict.fromkeys(paths):
+            try:
+                jobs.append(self.image_cache.prefetch_job(path, box))
+            except OSError:
+                # 文件已被删除或移动，下次列出文件夹时会更新
+                self.image_cache.invalidate(os.path.dirname(path))
+        self.image_prefetcher.schedule(jobs)
+    
+    def question_image_paths(self, position):
+        """一道题目的所有图片（题目中引用的图片和按题号命名的图片）"""
+        if self.question_images is None:
+            return []
+        question = self.questions[position]
+        return self.question_images.images_for(question['index'], question['original'])
+    
+    def show_question_images(self):
+        """在图片面板中显示当前题目的图片，Q/E 在这道题的图片之间切换"""
+        if self.question_images is None or not 0 <= self.current_question_index < len(self.questions):
+            return
+        
+        paths = self.question_image_paths(self.current_question_index)
+        if not paths:
+            # 上一题的图片不再显示；手动选择的图片保持不变
+            if self.showing_question_images:
+                self.showing_question_images = False
+                self._pending_image = None
+                self.image_files = []
+                self.current_image_index = -1
+                self.current_image = None
+                self.image_label.config(image="", text="本题没有图片")
+            return
+        
+        self.showing_question_images = True
+        self.image_files = paths
+        self.current_image_index = 0
+        self.show_image_async(paths[0])
+    
+    def show_image_async(self, path):
+        """已缓存的图片立即显示，否则交给后台线程解码，解码完成后再显示"""
+        box = self.image_box()
+        try:
+            key = self.image_cache.key_for(path, box)
+        except OSError as e:
+            self.status_bar.config(text=f"加载图片失败: {e}")
+            logger.error("图片加载失败: %s", e)
+            return
+        
+        if key in self.image_cache:
+            self._pending_image = None
+            self._load_image_by_path(path)
+            return
+        
+        self._pending_image = path
+        self.current_image = None
+        self.image_label.config(image="", text="图片加载中…")
+        self.prefetch_images(box, first=[path])
+        deadline = time.monotonic() + IMAGE_WAIT_SECONDS
+        self.root.after(IMAGE_POLL_MS, lambda: self._show_pending_image(path, key, deadline))
+    
+    def _show_pending_image(self, path, key, deadline):
+        if self._pending_image != path:
+            # 已经切换到其他题目或图片
+            return
+        if key in self.image_cache or time.monotonic() > deadline:
+            # 后台解码超时或失败时在界面线程中再试一次，并显示错误
+            self._pending_image = None
+            self._load_image_by_path(path)
+            return
+        self.root.after(IMAGE_POLL_MS, lambda: self._show_pending_image(path, key, deadline))
     
     def toggle_dark_mode(self):
         """切换夜间模式，完善所有UI元素的颜色设置"""
-        print(f"[调试] 切换夜间模式: {'开启' if self.dark_mode_var.get() else '关闭'}")
+        logger.debug("切换夜间模式: %s", '开启' if self.dark_mode_var.get() else '关闭')
         
         # 获取当前主题颜色配置
         theme = 'dark' if self.dark_mode_var.get() else 'light'
@@ -513,6 +623,9 @@ class QuestionExtractor:
                 widget.config(bg=colors['bg'], fg=colors['fg'])
         self.jump_entry.config(bg=colors['frame_bg'], fg=colors['fg'])
         
+        # 更新题目列表颜色
+        self.question_list.set_colors(colors['frame_bg'], colors['fg'], '#3a4a5e' if theme == 'dark' else '#cce5ff')
+        
         # 更新设置框架颜色
         if hasattr(self, 'settings_frame'):
             self.settings_frame.config(bg=colors['bg'])
@@ -557,175 +670,39 @@ class QuestionExtractor:
         
         # 如果有当前题目，重新渲染HTML以应用新主题和颜色
         if self.questions and 0 <= self.current_question_index < len(self.questions):
-            print("[调试] 重新渲染当前题目以应用新主题颜色")
+            logger.debug("重新渲染当前题目以应用新主题颜色")
             self.display_current_question()
         
-        print("[调试] 主题切换完成，所有UI元素颜色已更新")
+        logger.debug("主题切换完成，所有UI元素颜色已更新")
         
     def split_questions_by_separator(self, content):
         """按---分割题目"""
-        # 使用正则表达式分割，保留分割符
-        parts = re.split(r'(---\n)', content)
-        questions = []
-        current_question = ""
-        
-        for part in parts:
-            if part.strip() == '---':
-                if current_question.strip():
-                    questions.append(current_question.strip())
-                    current_question = ""
-            else:
-                current_question += part
-        
-        # 添加最后一题（如果有）
-        if current_question.strip():
-            questions.append(current_question.strip())
-        
-        return questions
+        return question_core.split_questions_by_separator(content)
     
     def extract_without_quotes(self, question_content):
         """提取不带引用的部分（不以>开头的行）"""
-        lines = question_content.split('\n')
-        non_quote_lines = [line for line in lines if not line.strip().startswith('>')]
-        return '\n'.join(non_quote_lines).strip()
+        return question_core.extract_without_quotes(question_content)
     
     def extract_with_quotes(self, question_content):
         """提取带引用的部分（以>开头的行）并去除>符号"""
-        lines = question_content.split('\n')
-        quote_lines = []
-        for line in lines:
-            if line.strip().startswith('>'):
-                # 去除>符号和可能的空格
-                content = line.strip()[1:].strip()
-                quote_lines.append(content)
-        return '\n'.join(quote_lines).strip()
+        return question_core.extract_with_quotes(question_content)
     
     def fix_option_format(self, question_content):
         """自动修复选项格式，将一行多个选项转换为每行一个选项"""
-        print(f"[调试] 开始修复选项格式，内容长度: {len(question_content)} 字符")
-        
-        # 匹配格式：- [ ] A.内容 B.内容 C.内容 D.内容 或类似变体
-        # 引用块内和引用块外的格式都要处理
-        option_patterns = [
-            # 引用块外的格式
-            (r'^\s*[-]\s*\[([ x])\]\s*([A-D])\.?\s*([^ABCD]*?)\s*([A-D])\.?\s*([^ABCD]*?)\s*([A-D])\.?\s*([^ABCD]*?)\s*([A-D])\.?\s*(.*?)$', 8),
-            # 引用块内的格式
-            (r'>\s*[-]\s*\[([ x])\]\s*([A-D])\.?\s*([^ABCD]*?)\s*([A-D])\.?\s*([^ABCD]*?)\s*([A-D])\.?\s*([^ABCD]*?)\s*([A-D])\.?\s*(.*?)$', 8)
-        ]
-        
-        fixed_content = question_content
-        modified = False
-        
-        for pattern, group_count in option_patterns:
-            matches = re.findall(pattern, fixed_content, re.MULTILINE)
-            
-            for match in matches:
-                print(f"[调试] 找到一行多选项格式: {match}")
-                selected = match[0]  # [x] 或 []
-                options = []
-                
-                # 提取所有选项 (字母+内容)
-                for i in range(1, len(match), 2):
-                    if i+1 <= len(match):
-                        letter = match[i].strip()
-                        content = match[i+1].strip()
-                        if letter and content:
-                            options.append((letter, content))
-                
-                if options:
-                    # 构建修复后的选项行
-                    prefix = '>' if pattern.startswith('>') else ''
-                    fixed_lines = []
-                    for letter, content in options:
-                        fixed_lines.append(f"{prefix} - [{selected}] {letter}. {content}")
-                    
-                    # 替换原行
-                    original_line = re.search(pattern, fixed_content, re.MULTILINE)
-                    if original_line:
-                        fixed_content = fixed_content.replace(original_line.group(0), '\n'.join(fixed_lines))
-                        modified = True
-                        print(f"[调试] 已修复选项格式，替换为多行格式")
-        
-        print(f"[调试] 选项格式修复完成，是否有修改: {modified}")
-        return fixed_content, modified
+        return question_core.fix_option_format(question_content)
     
     def analyze_option_type(self, question_content):
         """分析题目选项类型，区分判断题和普通选择题，并提供详细的非标准原因"""
-        print(f"[调试] 开始分析选项类型，内容长度: {len(question_content)} 字符")
-        
-        # 同时提取引用块内和引用块外的复选框列表项格式
-        # 引用块内的格式
-        options_in_quote = re.findall(r'>\s*-\s*\[[ x]]\s*([A-D])\.?\s*(.*)$', question_content, re.MULTILINE)
-        print(f"[调试] 找到 {len(options_in_quote)} 个引用块内的选项: {options_in_quote}")
-        
-        # 引用块外的格式
-        options_out_quote = re.findall(r'^\s*-\s*\[[ x]]\s*([A-D])\.?\s*(.*)$', question_content, re.MULTILINE)
-        print(f"[调试] 找到 {len(options_out_quote)} 个引用块外的选项: {options_out_quote}")
-        
-        # 合并两种格式的选项
-        options = options_in_quote + options_out_quote
-        
-        # 去重（以防重复匹配）
-        options = list(set(options))
-        print(f"[调试] 合并并去重后的选项总数: {len(options)}, 选项: {options}")
-        
-        # 详细检查每个选项的格式
-        for i, (letter, content) in enumerate(options, 1):
-            is_valid_letter = letter in ['A', 'B', 'C', 'D']
-            is_selected = '[x]' in question_content.split(f'- [{letter}')[0]
-            print(f"[调试] 选项{i}: 字母='{letter}', 内容='{content}', 是否有效字母: {is_valid_letter}, 是否被选中: {is_selected}")
-        
-        # 检查是否为判断题（只有A 正确和B 错误两个选项）
-        if len(options) == 2:
-            print(f"[调试] 选项数量为2，检查是否为判断题")
-            option0_correct = options[0][0] == 'A' and '正确' in options[0][1]
-            option1_error = options[1][0] == 'B' and '错误' in options[1][1]
-            print(f"[调试] 选项0是A且包含'正确': {option0_correct}")
-            print(f"[调试] 选项1是B且包含'错误': {option1_error}")
-            
-            if option0_correct and option1_error:
-                print(f"[调试] 符合判断题格式")
-                return '判断题', None  # 没有错误原因
-            else:
-                print(f"[调试] 不符合判断题格式")
-                return '非标准格式', f'选项数量为2，但不是标准判断题格式（应为A 正确，B 错误）'
-        
-        # 检查是否为普通选择题（有四个选项）
-        elif len(options) == 4:
-            print(f"[调试] 选项数量为4，检查是否为普通选择题")
-            # 检查选项字母是否都在A-D范围内
-            all_valid = all(option[0] in ['A', 'B', 'C', 'D'] for option in options)
-            print(f"[调试] 所有选项字母是否在A-D范围内: {all_valid}")
-            
-            if all_valid:
-                # 检查选项是否连续且唯一
-                option_letters = [option[0] for option in options]
-                print(f"[调试] 选项字母列表: {option_letters}")
-                print(f"[调试] 排序后的选项字母: {sorted(option_letters)}")
-                
-                if sorted(option_letters) == ['A', 'B', 'C', 'D']:
-                    print(f"[调试] 选项字母连续且唯一，符合普通选择题格式")
-                    return '普通选择题', None  # 没有错误原因
-                else:
-                    print(f"[调试] 选项字母不连续或有重复")
-                    return '非标准格式', f'选项字母不连续或有重复，当前选项字母: {option_letters}'
-            else:
-                invalid_letters = [option[0] for option in options if option[0] not in ['A', 'B', 'C', 'D']]
-                print(f"[调试] 存在无效的选项字母: {invalid_letters}")
-                return '非标准格式', f'存在无效的选项字母: {invalid_letters}'
-        
-        # 其他情况
-        print(f"[调试] 选项数量{len(options)}不符合标准格式要求")
-        return '非标准格式', f'选项数量为{len(options)}，不符合标准的判断题（2个选项）或选择题（4个选项）格式'
+        return question_core.analyze_option_type(question_content)
     
     def fix_current_question_format(self):
         """修复当前题目的选项格式（F键触发）- 只处理不带引用部分"""
         if not self.questions:
             self.status_bar.config(text="没有加载的题目")
-            print("[调试] 没有加载的题目")
+            logger.debug("没有加载的题目")
             return
         
-        print("[调试] 开始修复当前题目的选项格式 - 只处理不带引用部分")
+        logger.debug("开始修复当前题目的选项格式 - 只处理不带引用部分")
         current_question = self.questions[self.current_question_index]
         
         # 获取原始内容
@@ -760,136 +737,226 @@ class QuestionExtractor:
             self.questions[self.current_question_index]['option_type'] = option_type
             self.questions[self.current_question_index]['error_reason'] = error_reason
             
+            # 选项内容变化后重新计算这道题的相似度签名
+            if self.similar_questions is not None:
+                self.similar_questions.update(self.current_question_index, new_original_content)
+            
             # 更新显示
             self.display_current_question()
             
             # 更新状态栏
             self.status_bar.config(text=f"成功修复第{self.current_question_index + 1}题的选项格式（仅不带引用部分）")
-            print(f"[调试] 第{self.current_question_index + 1}题选项格式已修复（仅不带引用部分）")
+            logger.debug("第%s题选项格式已修复（仅不带引用部分）", self.current_question_index + 1)
         else:
             self.status_bar.config(text=f"第{self.current_question_index + 1}题无需修复")
-            print(f"[调试] 第{self.current_question_index + 1}题无需修复")
+            logger.debug("第%s题无需修复", self.current_question_index + 1)
     
     def fix_all_question_formats(self):
         """修复所有题目的选项格式"""
         if not self.questions:
             self.status_bar.config(text="没有加载的题目")
-            print("[调试] 没有加载的题目")
+            logger.debug("没有加载的题目")
             return
         
-        print("[调试] 开始修复所有题目的选项格式")
-        fixed_count = 0
-        
-        for i, question in enumerate(self.questions):
-            # 修复原始内容
-            original_content = question['original']
-            fixed_original, modified = self.fix_option_format(original_content)
+        logger.debug("开始修复所有题目的选项格式")
+        questions = self.snapshot_questions()
+        total = len(self.questions)
+        
+        def work(task):
+            # 题目分块交给进程池修复，只有内容变化的题目会传回并重新分析
+            fixed = []
+            done = 0
+            items = ((i, question['original']) for i, question in enumerate(questions))
+            # 取消时 report() 抛出异常，closing 立即关闭生成器，排队的块被取消，不等进程池全部处理完
+            with closing(question_fix.fix_questions(items, chunk_size=FIX_CHUNK_SIZE)) as chunks:
+                for results in chunks:
+                    fixed.extend(results)
+                    done = min(done + FIX_CHUNK_SIZE, total)
+                    task.report((done, total))
+            return fixed
+        
+        def on_done(fixed):
+            # 在界面线程中更新题目内容，两部分内容由新的原始内容生成
+            for result in fixed:
+                question = self.questions[result.position]
+                question['original'] = result.fixed
+                question['option_type'] = result.option_type
+                question['error_reason'] = result.error_reason
+                logger.debug("第%s题选项格式已修复", result.position + 1)
+            if fixed:
+                self.similar_questions = None
             
-            if modified:
-                # 更新题目内容
-                self.questions[i]['original'] = fixed_original
-                
-                # 重新提取不带引用和带引用的部分
-                self.questions[i]['without_quotes'] = self.extract_without_quotes(fixed_original)
-                self.questions[i]['with_quotes'] = self.extract_with_quotes(fixed_original)
-                
-                # 重新分析选项类型
-                option_type, error_reason = self.analyze_option_type(self.questions[i]['with_quotes'])
-                self.questions[i]['option_type'] = option_type
-                self.questions[i]['error_reason'] = error_reason
-                
-                fixed_count += 1
-                print(f"[调试] 第{i+1}题选项格式已修复")
+            # 更新状态栏
+            self.status_bar.config(text=f"成功修复 {len(fixed)} 道题目的选项格式")
+            logger.debug("成功修复 %s 道题目的选项格式", len(fixed))
+            
+            # 修复后选项类型可能变化，更新题目列表
+            if self.nonstandard_only_var.get():
+                self.update_question_list_filter()
+            else:
+                self.question_list.refresh()
+            
+            # 如果当前显示的题目被修复了，更新显示
+            if self.questions and 0 <= self.current_question_index < len(self.questions):
+                self.display_current_question()
         
-        # 更新状态栏
-        self.status_bar.config(text=f"成功修复 {fixed_count} 道题目的选项格式")
-        print(f"[调试] 成功修复 {fixed_count} 道题目的选项格式")
+        self.run_background_task("修复选项格式", work, on_done=on_done,
+                                 on_progress=lambda progress: self.show_task_progress("修复选项格式", *progress))
+    
+    def snapshot_questions(self):
+        """获取所有题目的快照，可以在后台线程中遍历"""
+        if isinstance(self.questions, LazyQuestionStore):
+            return self.questions.snapshot()
+        return [question.copy() for question in self.questions]
+    
+    def run_background_task(self, description, work, on_done=None, on_progress=None, on_cancel=None):
+        """在后台线程中执行耗时操作，同一时间只运行一个任务"""
+        if self.current_task is not None and not self.current_task.finished:
+            self.status_bar.config(text="请等待当前任务完成，或按Esc取消")
+            return None
         
-        # 如果当前显示的题目被修复了，更新显示
-        if self.questions and 0 <= self.current_question_index < len(self.questions):
-            self.display_current_question()
+        def finish(callback):
+            def wrapper(*args):
+                self.current_task = None
+                self.cancel_button.config(state=tk.DISABLED)
+                if callback:
+                    callback(*args)
+            return wrapper
+        
+        def on_error(e):
+            self.status_bar.config(text=f"{description}失败: {str(e)}")
+            messagebox.showerror("错误", f"{description}失败: {str(e)}")
+        
+        def on_cancelled():
+            self.status_bar.config(text=f"已取消{description}")
+            logger.debug("已取消%s", description)
+        
+        self.current_task = BackgroundTask(
+            self.root, work,
+            on_progress=on_progress,
+            on_done=finish(on_done),
+            on_error=finish(on_error),
+            on_cancel=finish(on_cancel or on_cancelled),
+        )
+        self.cancel_button.config(state=tk.NORMAL)
+        self.status_bar.config(text=f"正在{description}...")
+        logger.debug("开始后台任务: %s", description)
+        return self.current_task.start()
     
-    def extract_questions(self):
+    def cancel_current_task(self):
+        """取消正在运行的后台任务（Esc键触发）"""
+        if self.current_task is not None and not self.current_task.finished:
+            self.current_task.cancel()
+            self.status_bar.config(text="正在取消...")
+    
+    def show_task_progress(self, description, done, total, extra=""):
+        """在状态栏显示后台任务的进度"""
+        percent = int(done * 100 / total) if total else 100
+        self.status_bar.config(text=f"正在{description}... {percent}%（{done}/{total}）{extra}  按Esc取消")
+    
+    def extract_questions(self, start_index=0, on_loaded=None):
+        """
+        在后台线程中建立题目索引，已找到的题目可以边加载边浏览
+        
+        Args:
+            start_index: 第一道显示的题目
+            on_loaded: 全部题目加载完成后调用
+        """
         if not self.file_path:
             messagebox.showerror("错误", "请先选择文件")
             return
         
-        try:
-            print(f"[调试] 开始处理文件: {self.file_path}")
-            
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            print(f"[调试] 文件读取完成，内容长度: {len(content)} 字符")
-            
-            # 分割题目
-            raw_questions = self.split_questions_by_separator(content)
-            print(f"[调试] 分割后得到 {len(raw_questions)} 个题目部分")
-            
-            # 处理每个题目，提取两部分内容
-            self.questions = []
-            non_standard_questions = []
-            
-            for i, q_content in enumerate(raw_questions, 1):
-                print(f"[调试] 处理第 {i} 题")
-                no_quotes = self.extract_without_quotes(q_content)
-                with_quotes = self.extract_with_quotes(q_content)
-                
-                if no_quotes or with_quotes:  # 只添加有内容的题目
-                    # 分析选项类型，传入带引用的内容
-                    option_type, error_reason = self.analyze_option_type(with_quotes)
-                    print(f"[调试] 第 {i} 题选项类型: {option_type}")
-                    print(f"[调试] 第 {i} 题带引用部分内容: {with_quotes}")
-                    
-                    # 记录非标准格式题目及其错误原因
-                    if option_type == '非标准格式':
-                        non_standard_questions.append((i, error_reason))
-                    
-                    self.questions.append({
-                        'index': i,
-                        'original': q_content,
-                        'without_quotes': no_quotes,
-                        'with_quotes': with_quotes,
-                        'option_type': option_type,
-                        'error_reason': error_reason,
-                        'selected_options': []  # 存储用户选择的选项
-                    })
-                    print(f"[调试] 第 {i} 题提取成功")
-                else:
-                    print(f"[调试] 第 {i} 题内容为空，跳过")
-            
-            # 记录非标准格式题目的信息（不再显示弹窗）
-            if non_standard_questions:
-                print(f"[调试] 发现 {len(non_standard_questions)} 道题目的选项格式非标准")
-                for q_index, reason in non_standard_questions:
-                    print(f"[调试] 第 {q_index} 题: {reason}")
+        if self.current_task is not None and not self.current_task.finished:
+            self.status_bar.config(text="请等待当前任务完成，或按Esc取消")
+            return
+        
+        logger.debug("开始处理文件: %s", self.file_path)
+        file_path = self.file_path
+        stat = os.stat(file_path)
+        
+        # 界面线程中的索引随着后台扫描逐步增加题目，题目内容和选项类型在显示时才读取和分析；
+        # 扫描完成前索引不完整，不能保存。
+        # 这里不去重：题目与文件中的题目块一一对应，保存、自动保存日志和索引都按位置记录，
+        # 跳过重复题目会让保存的题库丢失这些题目；查找重复题目用“相似题目”
+        index = QuestionIndex(file_path, SCHEME_SEPARATOR, [], stat.st_size, stat.st_mtime_ns)
+        store = LazyQuestionStore(index, self.analyze_option_type, complete=False)
+        self.questions = store
+        self.question_images = None
+        self.similar_questions = None
+        self.current_question_index = -1
+        self.update_navigation_buttons()
+        
+        def work(task):
+            # 题号与图片文件的对应关系
+            images = QuestionImages.build(file_path)
+            
+            # 索引未过期时直接使用，不再扫描文件
+            cached = QuestionIndex.load(file_path, SCHEME_SEPARATOR)
+            if cached is not None:
+                return cached, images
+            
+            worker_index = QuestionIndex(file_path, SCHEME_SEPARATOR, [], stat.st_size, stat.st_mtime_ns)
+            batch = []
+            for entry in iter_index_entries(file_path, SCHEME_SEPARATOR):
+                worker_index.entries.append(entry)
+                batch.append(entry)
+                if len(batch) >= 200:
+                    task.report((batch, entry.offset + entry.length))
+                    batch = []
+            task.report((batch, stat.st_size))
+            worker_index.save()
+            return worker_index, images
+        
+        def show_loaded():
+            # 第一次有可显示的题目时立即显示
+            if self.current_question_index < 0 and len(self.questions) > start_index:
+                self.current_question_index = start_index
+                self.display_current_question()
+            self.update_navigation_buttons()
+        
+        def on_progress(progress):
+            batch, done_bytes = progress
+            index.entries.extend(batch)
+            show_loaded()
+            self.show_task_progress("提取题目", done_bytes, stat.st_size, f"，已加载 {len(index)} 题")
+        
+        def on_done(result):
+            result, self.question_images = result
+            if len(index.entries) < len(result.entries):
+                index.entries.extend(result.entries[len(index.entries):])
+            store.complete = True
             
             if not self.questions:
                 # 在状态栏显示提示信息，而不是弹窗
                 self.status_bar.config(text="未找到有效的题目")
-                print("[调试] 状态栏更新: 未找到有效的题目")
+                logger.debug("状态栏更新: 未找到有效的题目")
                 return
             
-            # 显示第一题
-            self.current_question_index = 0
-            self.display_current_question()
-            
-            # 更新导航按钮状态
+            if self.current_question_index < 0:
+                self.current_question_index = min(start_index, len(self.questions) - 1)
+                self.display_current_question()
+            else:
+                self.show_question_images()
             self.update_navigation_buttons()
             
             # 在状态栏显示加载题目数量，而不是弹窗
             self.status_bar.config(text=f"成功提取 {len(self.questions)} 道题目")
-            print(f"[调试] 状态栏更新: 成功提取 {len(self.questions)} 道题目")
+            logger.debug("状态栏更新: 成功提取 %s 道题目", len(self.questions))
             
-        except Exception as e:
-            print(f"[错误] 提取题目时出错: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            messagebox.showerror("错误", f"提取题目时出错: {str(e)}")
+            if on_loaded is not None:
+                on_loaded()
+        
+        def on_cancel():
+            self.status_bar.config(text=f"已取消提取，已加载 {len(self.questions)} 道题目")
+            logger.debug("已取消提取，已加载 %s 道题目", len(self.questions))
+        
+        self.run_background_task("提取题目", work, on_done=on_done, on_progress=on_progress, on_cancel=on_cancel)
     
     
     def display_current_question(self):
         """显示当前题目内容"""
+        # 直接渲染时不再需要等待中的合并渲染
+        self.render_scheduler.cancel()
         if 0 <= self.current_question_index < len(self.questions):
             question = self.questions[self.current_question_index]
             
@@ -902,7 +969,7 @@ class QuestionExtractor:
             
             # 根据当前渲染模式显示内容
             if self.render_mode.get() == "text":
-                print("[渲染] 文本模式显示")
+                logger.debug("文本模式显示")
                 # 显示原始文本
                 self.no_quote_text.delete(1.0, tk.END)
                 self.no_quote_text.insert(1.0, question['without_quotes'])
@@ -910,262 +977,214 @@ class QuestionExtractor:
                 self.quote_text.delete(1.0, tk.END)
                 self.quote_text.insert(1.0, question['with_quotes'])
             else:
-                print("[渲染] HTML渲染模式显示")
+                logger.debug("HTML渲染模式显示")
                 # 显示渲染后的HTML
                 try:
-                    print("[渲染] 开始生成无引用部分HTML")
+                    logger.debug("开始生成无引用部分HTML")
                     no_quote_html = self.markdown_to_html(question['without_quotes'])
                     self.no_quote_html.set_html(no_quote_html)
                     
-                    print("[渲染] 开始生成带引用部分HTML")
+                    logger.debug("开始生成带引用部分HTML")
                     quote_html = self.markdown_to_html(question['with_quotes'])
                     self.quote_html.set_html(quote_html)
                     
-                    print("[渲染] HTML渲染完成")
+                    logger.debug("HTML渲染完成")
+                    self.prefetch_neighbors()
                 except Exception as e:
-                    print(f"[渲染错误] HTML渲染失败: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.exception("HTML渲染失败: %s", e)
+            
+            # 题目有图片时在图片面板中显示，图片在后台解码
+            self.show_question_images()
+    
+    def show_question_preview(self, position):
+        """连续切换题目时的轻量预览：只更新题号和类型，不读取和渲染题目内容"""
+        number, option_type, error_reason = self.question_metadata(position)
+        option_type_info = f" - {option_type}" if option_type else ""
+        if error_reason:
+            option_type_info += f" ({error_reason[:50]}...)" if len(error_reason) > 50 else f" ({error_reason})"
+        self.question_info.config(text=f"共{len(self.questions)}题，当前第{number}题{option_type_info}")
+    
+    def release_current_checkboxes(self):
+        """离开当前题目时把复选框缓冲区中的修改写回题目内容"""
+        if 0 <= self.current_question_index < len(self.questions) and isinstance(self.questions, LazyQuestionStore):
+            if self.questions.is_loaded(self.current_question_index):
+                self.questions[self.current_question_index].release_checkboxes()
+    
+    def navigate_to(self, position):
+        """切换到指定位置的题目，连续切换时合并渲染"""
+        self.release_current_checkboxes()
+        self.current_question_index = position
+        self.update_navigation_buttons()
+        self.render_scheduler.request(position)
     
     def markdown_to_html(self, markdown_text):
-        print("[渲染] 开始Markdown转HTML转换")
+        """把Markdown转换为适合HTMLLabel显示的HTML片段，渲染结果按内容和主题缓存"""
+        logger.debug("开始Markdown转HTML转换")
         
         if not markdown_text or not markdown_text.strip():
             return ""
         
         try:
-            # 为文件保存生成完整的HTML文档
             theme = 'dark' if self.dark_mode_var.get() else 'light'
-            colors = self.color_schemes[theme]
-            
-            # 使用markdown库处理
-            md_html_content = markdown.markdown(markdown_text, 
-                                        extensions=['extra'],
-                                        output_format='html5')
-            
-            # 处理复选框和公式
-            md_html_content = re.sub(r'<li>- \[([ x])\]', 
-                                r'<li><input type="checkbox" disabled style="margin-right:8px;" \1>', 
-                                md_html_content)
-            md_html_content = re.sub(r'(?<!\$)\$([^$]+?)\$(?!\$)', 
-                                r'<span class="math inline">\\(\1\\)</span>', 
-                                md_html_content)
-            md_html_content = re.sub(r'\$\$([\s\S]*?)\$\$', 
-                                r'<div class="math display">\\[\1\\]</div>', 
-                                md_html_content)
-            
-            # 生成完整HTML
-            final_html = f'''
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <style>
-                    body {{
-                        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-                        font-size: 16px;
-                        line-height: 1.6;
-                        padding: 20px;
-                        margin: 0;
-                        background-color: {colors['html_bg']};
-                        color: {colors['html_text']};
-                    }}
-                    .math.inline {{
-                        font-size: 1.1em;
-                        padding: 0.1em 0.2em;
-                        margin: 0 0.1em;
-                    }}
-                    .math.display {{
-                        margin: 1.5em 0;
-                        padding: 0.8em;
-                        overflow-x: auto;
-                        text-align: center;
-                        background-color: {colors.get('formula_bg', 'rgba(0,0,0,0.05)')};
-                    }}
-                </style>
-                <script src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-chtml.js"></script>
-                <script>
-                    MathJax = {{
-                        tex: {{
-                            inlineMath: [['\\\\(', '\\\\)']],
-                            displayMath: [['\\\\[', '\\\\]']],
-                            processEscapes: true
-                        }},
-                        svg: {{
-                            fontCache: 'global'
-                        }},
-                        chtml: {{
-                            scale: 1.1,
-                            minScale: 0.8,
-                            maxScale: 1.5
-                        }}
-                    }};
-                </script>
-            </head>
-            <body>
-                {md_html_content}
-            </body>
-            </html>
-            '''
-            
-            # 保存渲染结果到文件
-            try:
-                output_dir = "render_output"
-                if not os.path.exists(output_dir):
-                    os.makedirs(output_dir)
-                
-                import time
-                timestamp = int(time.time())
-                filename = os.path.join(output_dir, f"rendered_{timestamp}.html")
-                
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(final_html)
-                
-                print(f"[渲染] HTML生成完成，渲染结果已保存到: {filename}")
-            except Exception as e:
-                print(f"[渲染错误] 保存渲染结果失败: {str(e)}")
-            
-            # 为HTMLLabel组件返回优化的HTML片段
-            # 添加标题加粗支持，保留公式的原始表示
-            
-            # 处理基本的Markdown元素
-            simple_html = markdown_text
-            
-            # 处理复选框
-            def replace_checkbox(match):
-                if match.group(1) == 'x':
-                    return '<span style="margin-right:5px;">✓</span>'
-                else:
-                    return '<span style="margin-right:5px;">□</span>'
-            
-            simple_html = re.sub(r'- \[([ x])\]', replace_checkbox, simple_html)
-            
-            # 处理二级标题，添加加粗效果 - 简化正则表达式
-            simple_html = re.sub(r'##\s+(.*?)\n', r'<strong>\1</strong><br>', simple_html)
-            
-            # 针对HTMLLabel组件的公式处理策略
-            # 1. 对于行内公式，使用更好的样式并添加数学标记
-            simple_html = re.sub(r'\$([^$]+?)\$', 
-                               r'<span style="font-family: monospace; background-color: #f0f0f0; padding: 2px 4px; border-radius: 3px; color: #0066cc; font-style: italic;">\( \1 \)</span>', 
-                               simple_html)
-            
-            # 2. 对于块级公式，使用更明显的区块样式并居中显示
-            simple_html = re.sub(r'\$\$([\s\S]*?)\$\$', 
-                               r'<div style="font-family: monospace; margin: 10px 0; padding: 8px; background-color: #f5f5f5; border-left: 3px solid #0066cc; text-align: center; color: #0066cc; font-style: italic;">\[ \1 \]</div>', 
-                               simple_html)
-            
-            # 转换换行符为<br>
-            simple_html = simple_html.replace('\n', '<br>')
-            
-            # 定义返回给HTMLLabel的HTML片段
-            for_htmllabel = f"<div>{simple_html}</div>"
-            
-            # 为保存到文件生成的完整HTML文档 - 保持原来的复杂处理
-            # 这里使用原始的markdown处理方式
-            md_html_content = markdown.markdown(markdown_text, 
-                                        extensions=['extra'],
-                                        output_format='html5')
-            
-            # 处理复选框
-            md_html_content = re.sub(r'<li>- \[([ x])\]', 
-                                r'<li><input type="checkbox" disabled style="margin-right:8px;" \1>', 
-                                md_html_content)
+            text_hash = content_hash(markdown_text)
             
-            # 公式处理
-            md_html_content = re.sub(r'(?<!\$)\$([^$]+?)\$(?!\$)', 
-                                r'<span class="math inline">\\(\1\\)</span>', 
-                                md_html_content)
-            md_html_content = re.sub(r'\$\$([\s\S]*?)\$\$', 
-                                r'<div class="math display">\\[\1\\]</div>', 
-                                md_html_content)
-            
-            final_html = f'''
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <style>
-                    body {{
-                        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-                        font-size: 16px;
-                        line-height: 1.6;
-                        padding: 20px;
-                        margin: 0;
-                        background-color: {colors['html_bg']};
-                        color: {colors['html_text']};
-                    }}
-                    .math.inline {{
-                        font-size: 1.1em;
-                        padding: 0.1em 0.2em;
-                        margin: 0 0.1em;
-                    }}
-                    .math.display {{
-                        margin: 1.5em 0;
-                        padding: 0.8em;
-                        overflow-x: auto;
-                        text-align: center;
-                        background-color: {colors.get('formula_bg', 'rgba(0,0,0,0.05)')};
-                    }}
-                </style>
-                <script src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-chtml.js"></script>
-                <script>
-                    MathJax = {{
-                        tex: {{
-                            inlineMath: [['\\\\(', '\\\\)']],
-                            displayMath: [['\\\\[', '\\\\]']],
-                            processEscapes: true
-                        }},
-                        svg: {{
-                            fontCache: 'global'
-                        }},
-                        chtml: {{
-                            scale: 1.1,
-                            minScale: 0.8,
-                            maxScale: 1.5
-                        }}
-                    }};
-                </script>
-            </head>
-            <body>
-                {md_html_content}
-            </body>
-            </html>
-            '''
-            
-            print("[渲染] HTML生成完成")
-            
-            # 保存渲染结果到文件，便于查看
-            try:
-                # 创建渲染输出目录
-                output_dir = "render_output"
-                if not os.path.exists(output_dir):
-                    os.makedirs(output_dir)
-                
-                # 生成唯一的文件名，基于当前时间戳
-                import time
-                timestamp = int(time.time())
-                filename = os.path.join(output_dir, f"rendered_{timestamp}.html")
-                
-                # 保存HTML到文件
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(final_html)
-                
-                print(f"[渲染] 渲染结果已保存到: {filename}")
-            except Exception as e:
-                print(f"[渲染错误] 保存渲染结果失败: {str(e)}")
+            # 开启渲染存档时才生成完整HTML文档，由后台线程写入文件，相同内容只写一次
+            if self.render_archive_var.get():
+                final_html = self.render_cache.get_or_render(
+                    (text_hash, theme, 'document'), lambda: self.render_html_document(markdown_text, theme))
+                self.render_archive.submit(f"{text_hash}_{theme}", final_html)
             
             # 返回适合HTMLLabel的HTML片段
-            print("[渲染] HTML生成完成，返回适合HTMLLabel的HTML片段")
+            for_htmllabel = self.render_cache.get_or_render(
+                (text_hash, theme, 'label'), lambda: self.render_label_html(markdown_text))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("HTML生成完成，%s", self.render_cache.stats())
             return for_htmllabel
             
         except Exception as e:
-            print(f"[渲染错误] {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Markdown转HTML失败: %s", e)
             return f"<html><body><p>{html.escape(markdown_text)}</p></body></html>"
-
+    
+    def prefetch_neighbors(self):
+        """安排后台线程预先渲染当前题目后面和前面几道题的两个部分"""
+        theme = 'dark' if self.dark_mode_var.get() else 'light'
+        archive = self.render_archive_var.get()
+        current = self.current_question_index
+        # 顺序复习时最先需要下一题，其次是上一题
+        positions = [current + offset for offset in range(1, PREFETCH_AHEAD + 1)]
+        positions[1:1] = [current - offset for offset in range(1, PREFETCH_BEHIND + 1)]
+        
+        jobs = []
+        for position in positions:
+            if not 0 <= position < len(self.questions):
+                continue
+            question = self.questions[position]
+            for markdown_text in (question['without_quotes'], question['with_quotes']):
+                if not markdown_text or not markdown_text.strip():
+                    continue
+                text_hash = content_hash(markdown_text)
+                jobs.append(((text_hash, theme, 'label'), lambda text=markdown_text: self.render_label_html(text)))
+                if archive:
+                    jobs.append(((text_hash, theme, 'document'),
+                                 lambda text=markdown_text: self.render_html_document(text, theme)))
+        self.render_prefetcher.schedule(jobs)
+    
+    def render_html_document(self, markdown_text, theme):
+        """生成带MathJax支持的完整HTML文档，用于保存到文件"""
+        head, tail = self.html_document_parts(theme)
+        return f"{head}{self.render_html_body(markdown_text)}{tail}"
+    
+    def render_html_body(self, markdown_text):
+        """使用markdown库把题目转换为HTML，并处理复选框和公式"""
+        md_html_content = markdown.markdown(markdown_text, 
+                                    extensions=['extra'],
+                                    output_format='html5')
+        
+        # 处理复选框和公式
+        md_html_content = grammar.HTML_CHECKBOX_RE.sub(
+                            r'<li><input type="checkbox" disabled style="margin-right:8px;" \1>', 
+                            md_html_content)
+        md_html_content = grammar.HTML_INLINE_MATH_RE.sub(
+                            r'<span class="math inline">\\(\1\\)</span>', 
+                            md_html_content)
+        md_html_content = grammar.DISPLAY_MATH_RE.sub(
+                            r'<div class="math display">\\[\1\\]</div>', 
+                            md_html_content)
+        return md_html_content
+    
+    def html_document_parts(self, theme):
+        """完整HTML文档在正文前后的部分，正文可以分段写入两者之间"""
+        colors = self.color_schemes[theme]
+        
+        head = f'''
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <style>
+                body {{
+                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
+                    font-size: 16px;
+                    line-height: 1.6;
+                    padding: 20px;
+                    margin: 0;
+                    background-color: {colors['html_bg']};
+                    color: {colors['html_text']};
+                }}
+                .math.inline {{
+                    font-size: 1.1em;
+                    padding: 0.1em 0.2em;
+                    margin: 0 0.1em;
+                }}
+                .math.display {{
+                    margin: 1.5em 0;
+                    padding: 0.8em;
+                    overflow-x: auto;
+                    text-align: center;
+                    background-color: {colors.get('formula_bg', 'rgba(0,0,0,0.05)')};
+                }}
+            </style>
+            <script src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-chtml.js"></script>
+            <script>
+                MathJax = {{
+                    tex: {{
+                        inlineMath: [['\\\\(', '\\\\)']],
+                        displayMath: [['\\\\[', '\\\\]']],
+                        processEscapes: true
+                    }},
+                    svg: {{
+                        fontCache: 'global'
+                    }},
+                    chtml: {{
+                        scale: 1.1,
+                        minScale: 0.8,
+                        maxScale: 1.5
+                    }}
+                }};
+            </script>
+        </head>
+        <body>
+        '''
+        tail = '''
+        </body>
+        </html>
+        '''
+        return head, tail
+    
+    def render_label_html(self, markdown_text):
+        """生成适合HTMLLabel组件显示的HTML片段，添加标题加粗支持，保留公式的原始表示"""
+        # 处理基本的Markdown元素
+        simple_html = markdown_text
+        
+        # 处理复选框
+        def replace_checkbox(match):
+            if match.group(1) == 'x':
+                return '<span style="margin-right:5px;">✓</span>'
+            else:
+                return '<span style="margin-right:5px;">□</span>'
+        
+        simple_html = grammar.LABEL_CHECKBOX_RE.sub(replace_checkbox, simple_html)
+        
+        # 处理二级标题，添加加粗效果 - 简化正则表达式
+        simple_html = grammar.LABEL_HEADING_RE.sub(r'<strong>\1</strong><br>', simple_html)
+        
+        # 针对HTMLLabel组件的公式处理策略
+        # 1. 对于行内公式，使用更好的样式并添加数学标记
+        simple_html = grammar.LABEL_INLINE_MATH_RE.sub(
+                           r'<span style="font-family: monospace; background-color: #f0f0f0; padding: 2px 4px; border-radius: 3px; color: #0066cc; font-style: italic;">\( \1 \)</span>', 
+                           simple_html)
+        
+        # 2. 对于块级公式，使用更明显的区块样式并居中显示
+        simple_html = grammar.DISPLAY_MATH_RE.sub(
+                           r'<div style="font-family: monospace; margin: 10px 0; padding: 8px; background-color: #f5f5f5; border-left: 3px solid #0066cc; text-align: center; color: #0066cc; font-style: italic;">\[ \1 \]</div>', 
+                           simple_html)
+        
+        # 转换换行符为<br>
+        simple_html = simple_html.replace('\n', '<br>')
+        
+        return f"<div>{simple_html}</div>"
+    
     def update_navigation_buttons(self):
         # 更新导航按钮状态
         self.prev_button.config(state=tk.NORMAL if self.current_question_index > 0 else tk.DISABLED)
@@ -1178,7 +1197,84 @@ class QuestionExtractor:
         else:
             self.progress_bar.config(state=tk.DISABLED, to=1)
             self.progress_var.set(0)
-        print(f"[调试] 进度条更新: 当前第{self.current_question_index + 1}题，共{len(self.questions)}题")
+        logger.debug("进度条更新: 当前第%s题，共%s题", self.current_question_index + 1, len(self.questions))
+        
+        # 更新题目列表的题目数和选中行
+        self.question_list.count = len(self.questions)
+        self.question_list.select(self.current_question_index if self.current_question_index >= 0 else None)
+    
+    def go_to_question(self, position):
+        """显示指定位置的题目（题目列表中双击时调用）"""
+        if 0 <= position < len(self.questions) and position != self.current_question_index:
+            self.navigate_to(position)
+    
+    def question_metadata(self, position):
+        """题目列表中一行的内容：(题目序号, 选项类型, 错误原因)，不读取题目内容"""
+        if isinstance(self.questions, LazyQuestionStore):
+            return self.questions.metadata(position)
+        question = self.questions[position]
+        return question['index'], question.get('option_type'), question.get('error_reason')
+    
+    def update_question_list_filter(self):
+        """切换题目列表是否只显示非标准格式的题目"""
+        if not self.nonstandard_only_var.get():
+            self.question_list.set_positions(None)
+            return
+        
+        positions = [i for i in range(len(self.questions))
+                     if self.question_metadata(i)[1] == question_core.TYPE_NONSTANDARD]
+        self.question_list.set_positions(positions)
+        
+        # 还有未分析的题目时，在后台分析并逐步加入列表
+        self.analyze_all_questions()
+    
+    def analyze_all_questions(self):
+        """在后台线程中分析所有还没有分析过的题目的选项类型"""
+        if not isinstance(self.questions, LazyQuestionStore):
+            return
+        
+        store = self.questions
+        pending = {i for i in range(len(store)) if store.metadata(i)[1] is None}
+        if not pending:
+            return
+        questions = store.snapshot()
+        total = len(pending)
+        
+        def work(task):
+            batch = []
+            done = 0
+            for i, question in enumerate(questions):
+                if i not in pending:
+                    continue
+                option_type, error_reason = question_core.analyze_option_type(question['with_quotes'])
+                batch.append((i, option_type, error_reason))
+                if len(batch) >= 500:
+                    done += len(batch)
+                    task.report((batch, done))
+                    batch = []
+            return batch
+        
+        def apply(batch):
+            # 在界面线程中记录分析结果，非标准格式的题目按顺序插入列表
+            positions = self.question_list.positions if self.nonstandard_only_var.get() else None
+            for i, option_type, error_reason in batch:
+                if self.questions is not store:
+                    return
+                store.record_analysis(i, option_type, error_reason)
+                if positions is not None and option_type == question_core.TYPE_NONSTANDARD:
+                    bisect.insort(positions, i)
+            self.question_list.refresh()
+        
+        def on_progress(progress):
+            batch, done = progress
+            apply(batch)
+            self.show_task_progress("分析题目类型", done, total)
+        
+        def on_done(batch):
+            apply(batch)
+            self.status_bar.config(text=f"已分析 {total} 道题目的选项类型")
+        
+        self.run_background_task("分析题目类型", work, on_done=on_done, on_progress=on_progress)
     
     def jump_to_question(self):
         """跳转到指定序号的题目"""
@@ -1186,20 +1282,76 @@ class QuestionExtractor:
             jump_num = int(self.jump_entry.get())
             if 1 <= jump_num <= len(self.questions):
                 # 转换为索引（索引从0开始）
+                self.release_current_checkboxes()
                 self.current_question_index = jump_num - 1
                 self.display_current_question()
                 self.update_navigation_buttons()
-                print(f"[调试] 跳转到题目 #{jump_num}")
+                logger.debug("跳转到题目 #%s", jump_num)
             else:
                 messagebox.showerror("错误", f"请输入1-{len(self.questions)}之间的数字")
         except ValueError:
             messagebox.showerror("错误", "请输入有效的数字")
     
+    def jump_to_similar_question(self):
+        """跳转到与当前题目相似的下一道题目（G键触发），连续按下时在同一组相似题目中循环"""
+        if not (0 <= self.current_question_index < len(self.questions)):
+            self.status_bar.config(text="没有加载的题目")
+            return
+        
+        if self.similar_questions is None or not self.similar_questions.grouped:
+            # 第一次查找时在后台计算所有题目的签名并分组，修改过题目后在后台重新分组，完成后再跳转
+            self.find_similar_questions(on_found=self.jump_to_similar_question)
+            return
+        
+        position = self.current_question_index
+        group = self.similar_questions.group_of(position)
+        if not group:
+            self.status_bar.config(text=f"第{position + 1}题没有相似题目")
+            return
+        
+        target = group[(group.index(position) + 1) % len(group)]
+        similarity = self.similar_questions.similarity(position, target)
+        self.navigate_to(target)
+        self.status_bar.config(text=f"相似题目 {group.index(target) + 1}/{len(group)}：第{target + 1}题"
+                                    f"（与第{position + 1}题的相似度 {similarity:.2f}），按G跳转到下一道")
+        logger.debug("从第%s题跳转到相似的第%s题，相似度 %.2f", position + 1, target + 1, similarity)
+    
+    def find_similar_questions(self, on_found=None):
+        """
+        在后台线程中计算所有题目的 MinHash 签名，按 LSH 分桶找出相似题目
+        
+        已经计算过签名时（之后修改过题目）只在后台重新分组
+        """
+        store = self.questions
+        existing = self.similar_questions
+        questions = self.snapshot_questions() if existing is None else []
+        total = len(questions)
+        
+        def work(task):
+            finder = existing if existing is not None else SimilarQuestions()
+            for i, question in enumerate(questions, 1):
+                finder.add(question['original'])
+                if i % 1000 == 0:
+                    task.report((i, total))
+            groups = finder.clusters(check=task.check_cancelled)
+            return finder, len(groups)
+        
+        def on_done(result):
+            # 查找期间重新加载或批量修改了题库时丢弃结果
+            finder, group_count = result
+            if self.questions is not store or self.similar_questions is not existing:
+                return
+            self.similar_questions = finder
+            self.status_bar.config(text=f"找到 {group_count} 组相似题目")
+            if on_found is not None:
+                on_found()
+        
+        self.run_background_task("查找相似题目", work, on_done=on_done,
+                                 on_progress=lambda progress: self.show_task_progress("查找相似题目", *progress))
+    
     def prev_question(self):
         if self.current_question_index > 0:
-            self.current_question_index -= 1
-            self.display_current_question()
-            self.update_navigation_buttons()
+            self.navigate_to(self.current_question_index - 1)
     
     def get_current_question_option_count(self):
         """获取当前题目的选项数量"""
@@ -1208,13 +1360,13 @@ class QuestionExtractor:
             option_type = question['option_type']
             
             if option_type == '判断题':
-                print("[调试] 当前是判断题，有2个选项")
+                logger.debug("当前是判断题，有2个选项")
                 return 2
             elif option_type == '普通选择题':
-                print("[调试] 当前是普通选择题，有4个选项")
+                logger.debug("当前是普通选择题，有4个选项")
                 return 4
             else:
-                print(f"[调试] 当前是非标准格式题目，类型: {option_type}")
+                logger.debug("当前是非标准格式题目，类型: %s", option_type)
                 return 0
         return 0
     
@@ -1225,18 +1377,14 @@ class QuestionExtractor:
             new_index = int(float(value)) - 1  # 转换为0-based索引
             # 确保索引有效且与当前题目不同
             if 0 <= new_index < len(self.questions) and new_index != self.current_question_index:
-                print(f"[调试] 拖动滑动框切换题目: {self.current_question_index + 1} -> {new_index + 1}")
-                self.current_question_index = new_index
-                self.display_current_question()
-                self.update_navigation_buttons()
+                logger.debug("拖动滑动框切换题目: %s -> %s", self.current_question_index + 1, new_index + 1)
+                self.navigate_to(new_index)
         except ValueError:
-            print("[调试] 输入不是有效的数字")
+            logger.debug("输入不是有效的数字")
     
     def next_question(self):
         if self.current_question_index < len(self.questions) - 1:
-            self.current_question_index += 1
-            self.display_current_question()
-            self.update_navigation_buttons()
+            self.navigate_to(self.current_question_index + 1)
     
     def export_without_quotes(self):
         if not self.questions:
@@ -1249,14 +1397,7 @@ class QuestionExtractor:
         )
         
         if filename:
-            try:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    for question in self.questions:
-                        f.write(question['without_quotes'])
-                        f.write('\n\n---\n\n')
-                messagebox.showinfo("成功", "不带引用部分已导出")
-            except Exception as e:
-                messagebox.showerror("错误", f"导出失败: {str(e)}")
+            self.export_questions('without_quotes', filename, "不带引用部分已导出")
     
     def export_with_quotes(self):
         """导出带引用部分的题目"""
@@ -1270,14 +1411,61 @@ class QuestionExtractor:
         )
         
         if filename:
-            try:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    for question in self.questions:
-                        f.write(question['with_quotes'])
-                        f.write('\n\n---\n\n')
-                messagebox.showinfo("成功", "带引用部分已导出")
-            except Exception as e:
-                messagebox.showerror("错误", f"导出失败: {str(e)}")
+            self.export_questions('with_quotes', filename, "带引用部分已导出")
+    
+    def export_questions(self, field, filename, success_message):
+        """在后台线程中把所有题目的指定部分导出到文件"""
+        questions = self.snapshot_questions()
+        total = len(self.questions)
+        
+        def work(task):
+            question_core.export_questions(questions, field, filename,
+                                           progress=lambda done: task.report((done, total)))
+        
+        def on_done(_):
+            self.status_bar.config(text=success_message)
+            messagebox.showinfo("成功", success_message)
+        
+        self.run_background_task("导出", work, on_done=on_done,
+                                 on_progress=lambda progress: self.show_task_progress("导出", *progress))
+    
+    def export_rendered_bank(self):
+        """把整个题库渲染为一个HTML文件，在后台线程中一次写完"""
+        if not self.questions:
+            messagebox.showerror("错误", "请先提取题目")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".html",
+            filetypes=[("HTML文件", "*.html")]
+        )
+        if not filename:
+            return
+        
+        questions = self.snapshot_questions()
+        total = len(self.questions)
+        theme = 'dark' if self.dark_mode_var.get() else 'light'
+        head, tail = self.html_document_parts(theme)
+        
+        def work(task):
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(head)
+                for i, question in enumerate(questions, 1):
+                    f.write(f'<section>\n<h2>第{question["index"]}题</h2>\n')
+                    for title, field in (("不带引用部分", 'without_quotes'), ("带引用部分", 'with_quotes')):
+                        if question[field].strip():
+                            f.write(f'<h3>{title}</h3>\n{self.render_html_body(question[field])}\n')
+                    f.write('</section>\n<hr>\n')
+                    if i % 100 == 0:
+                        task.report((i, total))
+                f.write(tail)
+        
+        def on_done(_):
+            self.status_bar.config(text=f"渲染题库已导出到: {filename}")
+            messagebox.showinfo("成功", f"渲染题库已导出到:\n{filename}")
+        
+        self.run_background_task("导出渲染题库", work, on_done=on_done,
+                                 on_progress=lambda progress: self.show_task_progress("导出渲染题库", *progress))
     
     def save_file_with_timestamp(self):
         """保存当前处理后的文件，不覆盖原文件，添加时间戳后缀"""
@@ -1289,6 +1477,14 @@ class QuestionExtractor:
             messagebox.showerror("错误", "请先提取题目")
             return
         
+        # 提取或批量处理还在进行时，题目列表不完整或正在被改写，保存会得到缺少题目的题库
+        if self.current_task is not None and not self.current_task.finished:
+            self.status_bar.config(text="请等待当前任务完成，或按Esc取消")
+            return
+        if isinstance(self.questions, LazyQuestionStore) and not self.questions.complete:
+            messagebox.showerror("错误", "题目尚未全部加载（提取已取消），请重新提取题目后再保存")
+            return
+        
         try:
             # 获取原文件信息
             file_dir, file_name = os.path.split(self.file_path)
@@ -1310,15 +1506,15 @@ class QuestionExtractor:
                         f.write('\n\n---\n\n')
             
             messagebox.showinfo("成功", f"文件已保存到:\n{new_filename}")
-            print(f"[调试] 文件保存成功: {new_filename}")
+            logger.debug("文件保存成功: %s", new_filename)
             
         except Exception as e:
             messagebox.showerror("错误", f"保存失败: {str(e)}")
-            print(f"[调试] 文件保存失败: {str(e)}")
+            logger.error("文件保存失败: %s", e)
     
     def switch_render_mode(self):
         """切换渲染模式（文本/HTML）"""
-        print(f"[渲染] 切换渲染模式，新模式: {self.render_mode.get()}")
+        logger.debug("切换渲染模式，新模式: %s", self.render_mode.get())
         mode = self.render_mode.get()
         
         if mode == "text":
@@ -1328,7 +1524,7 @@ class QuestionExtractor:
             
             self.quote_html_frame.pack_forget()
             self.quote_text_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            print("[渲染] 已切换到文本视图")
+            logger.debug("已切换到文本视图")
         else:
             # 切换到HTML视图
             self.no_quote_text_frame.pack_forget()
@@ -1336,61 +1532,62 @@ class QuestionExtractor:
             
             self.quote_text_frame.pack_forget()
             self.quote_html_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            print("[渲染] 已切换到HTML视图")
+            logger.debug("已切换到HTML视图")
         
         # 重新显示当前题目以适应新模式
         if self.questions:
-            print("[渲染] 重新显示当前题目以适应新模式")
+            logger.debug("重新显示当前题目以适应新模式")
             self.display_current_question()
     
     def update_question_content_with_selected(self, question_content, selected_option):
         """更新题目内容中的选项选中状态"""
-        # 检查并更新引用块内和块外的选项
-        content_with_quotes = question_content
-        
-        # 处理两种格式的选项
-        patterns = [
-            # 引用块内的选项格式
-            fr'>\s*-\s*\[([ x])\]\s*{selected_option}\.?\s*',
-            # 引用块外的选项格式
-            fr'^\s*-\s*\[([ x])\]\s*{selected_option}\.?\s*'
-        ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, content_with_quotes, re.MULTILINE)
-            for match in matches:
-                current_status = match.group(1)
-                new_status = 'x' if current_status == ' ' else ' '
-                old_str = match.group(0)
-                new_str = old_str.replace(f'[{current_status}]', f'[{new_status}]')
-                content_with_quotes = content_with_quotes.replace(old_str, new_str)
-                print(f"[调试] 更新选项{selected_option}状态从[{current_status}]到[{new_status}]")
-                return content_with_quotes  # 找到并更新后立即返回
-        
-        return content_with_quotes
-    
-    def auto_save(self):
-        """自动保存当前所有题目的选择状态"""
-        if self.auto_save_var.get() and self.file_path:
-            try:
-                # 创建保存路径（在原文件名后添加_autosave）
-                file_dir, file_name = os.path.split(self.file_path)
-                file_base, file_ext = os.path.splitext(file_name)
-                save_path = os.path.join(file_dir, f"{file_base}_autosave{file_ext}")
-                
-                # 保存所有题目的带引用部分
-                with open(save_path, 'w', encoding='utf-8') as f:
-                    for question in self.questions:
-                        f.write(question['with_quotes'])
-                        f.write('\n\n---\n\n')
-                
-                print(f"[调试] 自动保存成功，文件保存至: {save_path}")
-                return True
-            except Exception as e:
-                print(f"[调试] 自动保存失败: {str(e)}")
-                return False
+        return question_core.toggle_option(question_content, selected_option)
+    
+    def get_autosave_journal(self):
+        """当前题库对应的自动保存日志，切换题库时先写完上一个题库的日志"""
+        path = journal_path_for(self.file_path)
+        if self.autosave_journal is None or self.autosave_journal.path != path:
+            if self.autosave_journal is not None:
+                self.autosave_journal.flush()
+            self.autosave_journal = AutosaveJournal(path)
+        return self.autosave_journal
+    
+    def auto_save(self, position):
+        """自动保存一道题目的选择状态，只追加这道题的修改，由后台线程延迟写入"""
+        if self.auto_save_var.get() and self.file_path and 0 <= position < len(self.questions):
+            question = self.questions[position]
+            self.get_autosave_journal().record(
+                position, question['index'], content_hash(question['original']),
+                question['selected_options'], question['with_quotes'], question['without_quotes'])
+            return True
         return False
     
+    def replay_autosave_journal(self):
+        """按自动保存日志恢复上次未保存的选择状态，题目内容已变化的记录会被跳过"""
+        if not self.file_path:
+            return 0
+        
+        records = self.get_autosave_journal().load()
+        restored = 0
+        for position, record in sorted(records.items()):
+            if position >= len(self.questions):
+                continue
+            question = self.questions[position]
+            if record.get('hash') != content_hash(question['original']):
+                logger.debug("第%s题内容已变化，跳过自动保存记录", position + 1)
+                continue
+            question['selected_options'] = list(record.get('selected_options', []))
+            question['with_quotes'] = record.get('with_quotes', question['with_quotes'])
+            question['without_quotes'] = record.get('without_quotes', question['without_quotes'])
+            restored += 1
+        
+        if restored:
+            self.status_bar.config(text=f"已从自动保存日志恢复 {restored} 道题目的选择状态")
+            logger.debug("已从自动保存日志恢复 %s 道题目", restored)
+            if 0 <= self.current_question_index < len(self.questions):
+                self.display_current_question()
+        return restored
+    
     def save_config(self):
         """保存当前配置到配置文件"""
         try:
@@ -1400,28 +1597,41 @@ class QuestionExtractor:
                 "current_question_index": self.current_question_index,
                 "auto_save": self.auto_save_var.get(),
                 "single_choice": self.single_choice_var.get(),
-                "render_mode": self.render_mode.get()
+                "render_mode": self.render_mode.get(),
+                "render_archive": self.render_archive_var.get()
             }
             
             # 保存配置到文件
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(config_data, f, ensure_ascii=False, indent=2)
             
-            print(f"[调试] 配置保存成功: {self.config_file}")
+            logger.debug("配置保存成功: %s", self.config_file)
             return True
         except Exception as e:
-            print(f"[调试] 配置保存失败: {str(e)}")
+            logger.error("配置保存失败: %s", e)
             return False
             
     def on_closing(self):
         """处理窗口关闭事件"""
-        print("[调试] 窗口关闭事件触发，准备保存配置")
+        logger.debug("窗口关闭事件触发，准备保存配置")
         
         # 保存当前配置
+        self.render_scheduler.cancel()
         self.save_config()
         
+        # 把浏览过程中得到的选项类型分析结果写回索引文件
+        if isinstance(self.questions, LazyQuestionStore):
+            self.questions.save_index()
+        
+        # 写完自动保存日志和渲染存档
+        if self.autosave_journal is not None:
+            self.autosave_journal.flush(timeout=5)
+        self.render_prefetcher.stop()
+        self.image_prefetcher.stop()
+        self.render_archive.flush(timeout=5)
+        
         # 执行正常关闭
-        print("[调试] 配置保存完成，准备关闭程序")
+        logger.debug("配置保存完成，准备关闭程序")
         self.root.destroy()
     def load_config(self):
         """从配置文件加载配置"""
@@ -1433,123 +1643,74 @@ class QuestionExtractor:
                 # 恢复配置
                 if "last_file_path" in config_data:
                     self.file_path = config_data["last_file_path"]
-                    print(f"[调试] 加载上次文件路径: {self.file_path}")
+                    logger.debug("加载上次文件路径: %s", self.file_path)
                 
                 if "auto_save" in config_data:
                     self.auto_save_var.set(config_data["auto_save"])
-                    print(f"[调试] 加载自动保存设置: {config_data['auto_save']}")
+                    logger.debug("加载自动保存设置: %s", config_data['auto_save'])
                 
                 if "single_choice" in config_data:
                     self.single_choice_var.set(config_data["single_choice"])
-                    print(f"[调试] 加载单选模式设置: {config_data['single_choice']}")
+                    logger.debug("加载单选模式设置: %s", config_data['single_choice'])
                 
                 if "render_mode" in config_data:
                     self.render_mode.set(config_data["render_mode"])
-                    print(f"[调试] 加载渲染模式设置: {config_data['render_mode']}")
+                    logger.debug("加载渲染模式设置: %s", config_data['render_mode'])
+                
+                if "render_archive" in config_data:
+                    self.render_archive_var.set(config_data["render_archive"])
+                    logger.debug("加载渲染存档设置: %s", config_data['render_archive'])
                 
-                print(f"[调试] 配置加载成功: {self.config_file}")
+                logger.debug("配置加载成功: %s", self.config_file)
                 return config_data
             else:
-                print(f"[调试] 配置文件不存在: {self.config_file}")
+                logger.debug("配置文件不存在: %s", self.config_file)
                 return None
         except Exception as e:
-            print(f"[调试] 配置加载失败: {str(e)}")
+            logger.error("配置加载失败: %s", e)
             return None
     
     def restore_last_session(self):
         """恢复上次的工作会话"""
-        print("[调试] 尝试恢复上次会话")
+        logger.debug("尝试恢复上次会话")
         config_data = self.load_config()
         
         if config_data and self.file_path and os.path.exists(self.file_path):
             try:
-                print(f"[调试] 发现上次打开的文件: {self.file_path}，尝试自动打开")
+                logger.debug("发现上次打开的文件: %s，尝试自动打开", self.file_path)
                 
                 # 更新文件标签显示
                 self.file_label.config(text=os.path.basename(self.file_path), fg="black")
                 
-                # 自动提取题目
-                self.extract_questions()
-                
-                # 如果保存了上次的题目索引，尝试恢复到该位置
-                if "current_question_index" in config_data and config_data["current_question_index"] >= 0:
-                    saved_index = config_data["current_question_index"]
-                    # 确保索引有效
-                    if 0 <= saved_index < len(self.questions):
-                        self.current_question_index = saved_index
-                        self.display_current_question()
-                        print(f"[调试] 已恢复到第{saved_index + 1}题")
+                # 自动提取题目，加载到上次的题目位置后立即显示该题，全部加载后重放自动保存日志
+                saved_index = config_data.get("current_question_index", 0)
+                if not isinstance(saved_index, int) or saved_index < 0:
+                    saved_index = 0
+                self.extract_questions(start_index=saved_index, on_loaded=self.replay_autosave_journal)
+                logger.debug("将恢复到第%s题", saved_index + 1)
                 
-                print("[调试] 会话恢复成功")
+                logger.debug("会话恢复成功")
             except Exception as e:
-                print(f"[调试] 会话恢复失败: {str(e)}")
+                logger.error("会话恢复失败: %s", e)
         else:
-            print("[调试] 没有找到可恢复的会话或上次文件不存在")
+            logger.debug("没有找到可恢复的会话或上次文件不存在")
     
     def remove_answer_and_analysis(self, content):
         """移除答案和解析部分"""
-        # 匹配常见的答案和解析格式
-        # 匹配 '答案：' 或 '参考答案：' 开头的行，及其之后直到下一个部分的内容
-        patterns = [
-            # 移除'答案：' 或 '参考答案：' 及其后面的内容（包括多个空行）
-            r'(答案|参考答案)[:：].*?(?=\n\n|$)',
-            # 移除'> 解析：' 或 '解析：' 及其后面的内容（包括多个空行）
-            r'[>]?\s*(解析)[:：].*?(?=\n\n|$)',
-            # 移除'>'引用块中的答案部分
-            r'>\s*[A-D]\).*?(?=\n\n|$)',
-            # 移除'> 答案：' 或 '> 参考答案：' 及其后面的内容
-            r'>\s*(答案|参考答案)[:：].*?(?=\n\n|$)',
-            # 特别处理AI答案为"的"的文本
-            r'>\s*AI答案为(\s*"的"\s*)\.?.*?(?=\n\n|$)',
-            r'>\s*AI答案为的.*?(?=\n\n|$)'
-        ]
-        
-        result = content
-        for pattern in patterns:
-            # 使用DOTALL标志，让.匹配换行符
-            result = re.sub(pattern, '', result, flags=re.DOTALL)
-        
-        return result
+        return question_core.remove_answer_and_analysis(content)
     
     def replace_quote_options_without_quotes(self):
         """将引用部分的选项状态替换到不带引用部分的选项中"""
         if 0 <= self.current_question_index < len(self.questions):
             question = self.questions[self.current_question_index]
-            print(f"[调试] 开始替换第{question['index']}题的引用部分选项到无引用部分")
-            
-            # 获取带引用部分的题目内容
-            with_quotes_content = question['with_quotes']
-            # 获取不带引用部分的题目内容
-            without_quotes_content = question['without_quotes']
-            
-            # 查找引用块中的选项及其选中状态
-            quoted_options = {}
-            quote_pattern = r'>\s*-\s*\[([ x])\]\s*([A-D])\.?\s*'
-            for match in re.finditer(quote_pattern, with_quotes_content, re.MULTILINE):
-                status, option = match.group(1), match.group(2)
-                quoted_options[option] = status
-                print(f"[调试] 发现引用块中选项{option}，状态: [{status}]")
+            logger.debug("开始替换第%s题的引用部分选项到无引用部分", question['index'])
             
             # 将引用块中的选项状态应用到不带引用部分
-            new_without_quotes = without_quotes_content
-            for option, status in quoted_options.items():
-                # 查找不带引用部分的对应选项
-                option_pattern = r'^\s*-\s*\[([ x])\]\s*' + option + r'\.?\s*'
-                matches = list(re.finditer(option_pattern, new_without_quotes, re.MULTILINE))
-                if matches:
-                    match = matches[0]
-                    current_status = match.group(1)
-                    if current_status != status:
-                        old_str = match.group(0)
-                        new_str = old_str.replace(f'[{current_status}]', f'[{status}]')
-                        new_without_quotes = new_without_quotes.replace(old_str, new_str)
-                        print(f"[调试] 替换无引用部分选项{option}状态从[{current_status}]到[{status}]")
-                else:
-                    print(f"[调试] 在无引用部分未找到选项{option}")
+            new_without_quotes = question_core.sync_quoted_selection(question['with_quotes'], question['without_quotes'])
             
             # 更新题目内容
             question['without_quotes'] = new_without_quotes
-            print(f"[调试] 完成替换第{question['index']}题的引用部分选项到无引用部分")
+            logger.debug("完成替换第%s题的引用部分选项到无引用部分", question['index'])
             
             # 重新显示当前题目
             self.display_current_question()
@@ -1560,66 +1721,86 @@ class QuestionExtractor:
         """根据AI答案自动选择选项"""
         if 0 <= self.current_question_index < len(self.questions):
             question = self.questions[self.current_question_index]
-            print(f"[调试] 开始从第{question['index']}题中提取AI答案并自动选择")
+            logger.debug("开始从第%s题中提取AI答案并自动选择", question['index'])
             
             # 从带引用和不带引用部分中查找AI答案
             content = question['with_quotes']
             
             # 匹配AI答案格式，如 '> AI答案为A'、'> AI答案为B、C'、'> AI答案为 "A"' 等
-            ai_answer_pattern = r'>\s*AI答案为[:：]?\s*["']?([A-D]([,，]\s*[A-D])*)["']?\s*\.?\s*'
-            match = re.search(ai_answer_pattern, content)
+            answers = grammar.parse_ai_answer(content)
             
-            if match:
-                answer_text = match.group(1)
-                print(f"[调试] 提取到AI答案文本: {answer_text}")
-                
-                # 解析答案，支持多个答案（如A,B或A，B格式）
-                answers = []
-                for char in answer_text:
-                    if char.isalpha() and char.upper() in 'ABCD':
-                        answers.append(char.upper())
-                
-                print(f"[调试] 解析后的答案列表: {answers}")
+            if answers is not None:
+                logger.debug("解析后的答案列表: %s", answers)
                 
                 # 如果解析到答案，自动选择
                 if answers:
-                    # 清除之前的选中状态
-                    question['selected_options'] = []
-                    
-                    # 取消所有选项的选中状态
-                    for option in 'ABCD':
-                        question['with_quotes'] = self.update_question_content_with_selected(question['with_quotes'], option)
-                        question['without_quotes'] = self.update_question_content_with_selected(question['without_quotes'], option)
-                    
-                    # 选中解析出的答案选项
-                    for answer in answers:
-                        question['with_quotes'] = self.update_question_content_with_selected(question['with_quotes'], answer)
-                        question['without_quotes'] = self.update_question_content_with_selected(question['without_quotes'], answer)
-                        question['selected_options'].append(answer)
-                        print(f"[调试] 自动选中选项: {answer}")
+                    # 两个部分都只选中答案中的选项，其余选项取消选中（在题目的缓冲区中按位置修改）
+                    question.checkboxes().set_exact(answers)
+                    question['selected_options'] = list(answers)
+                    logger.debug("自动选中选项: %s", answers)
                     
                     # 重新显示当前题目
                     self.display_current_question()
-                    print(f"[调试] 完成第{question['index']}题的AI答案自动选择")
+                    logger.debug("完成第%s题的AI答案自动选择", question['index'])
                     return True
                 else:
-                    print(f"[调试] 未从'{answer_text}'中解析出有效答案")
+                    logger.debug("未解析出有效答案")
             else:
-                print(f"[调试] 未在题目中找到AI答案")
+                logger.debug("未在题目中找到AI答案")
         return False
     
+    def auto_select_all_by_ai_answer(self):
+        """按每道题的AI答案设置全部题目的选项（后台多进程处理，完成后才刷新显示）"""
+        if not self.questions:
+            self.status_bar.config(text="没有加载的题目")
+            logger.debug("没有加载的题目")
+            return
+        
+        questions = self.snapshot_questions()
+        total = len(self.questions)
+        
+        def work(task):
+            # 题目分块交给进程池，每道题只解析一次AI答案，按位置改写复选框状态
+            applied = []
+            done = 0
+            items = ((i, question['original']) for i, question in enumerate(questions))
+            with closing(question_fix.apply_answers(items, chunk_size=FIX_CHUNK_SIZE)) as chunks:
+                for results in chunks:
+                    applied.extend(results)
+                    done = min(done + FIX_CHUNK_SIZE, total)
+                    task.report((done, total))
+            return applied
+        
+        def on_done(applied):
+            # 在界面线程中更新有AI答案的题目，两部分内容由新的原始内容生成；
+            # 原始内容没有变化时也要重新设置，丢弃单独修改过的两部分内容和复选框缓冲区，
+            # 否则显示的选中状态与 selected_options、保存的内容不一致
+            for result in applied:
+                question = self.questions[result.position]
+                question['original'] = result.fixed
+                question['selected_options'] = list(result.answers)
+            
+            self.status_bar.config(text=f"已按AI答案设置 {len(applied)} 道题目的选项")
+            logger.debug("已按AI答案设置 %s 道题目的选项", len(applied))
+            
+            if self.questions and 0 <= self.current_question_index < len(self.questions):
+                self.display_current_question()
+        
+        self.run_background_task("按AI答案设置全部题目", work, on_done=on_done,
+                                 on_progress=lambda progress: self.show_task_progress("按AI答案设置全部题目", *progress))
+    
     def select_option(self, key):
         """根据按键选择对应选项"""
         option_map = {'1': 'A', '2': 'B', '3': 'C', '4': 'D'}
         option_count = self.get_current_question_option_count()
         
-        print(f"[调试] 进入select_option方法，按键: {key}")
+        logger.debug("进入select_option方法，按键: %s", key)
         
         if 0 <= self.current_question_index < len(self.questions) and option_count > 0:
             # 检查按键是否有效
             if key in option_map and int(key) <= option_count:
                 selected_option = option_map[key]
-                print(f"[调试] 按键{key}选择了选项{selected_option}")
+                logger.debug("按键%s选择了选项%s", key, selected_option)
                 
                 # 获取当前题目
                 question = self.questions[self.current_question_index]
@@ -1627,134 +1808,101 @@ class QuestionExtractor:
                 # 确保selected_options列表存在且类型正确
                 if not hasattr(question, 'selected_options') or not isinstance(question['selected_options'], list):
                     question['selected_options'] = []
-                    print(f"[调试] 创建缺失的selected_options列表")
+                    logger.debug("创建缺失的selected_options列表")
                 
                 # 打印更新前的状态
-                print(f"[调试] 更新前选中选项: {question['selected_options']}")
+                logger.debug("更新前选中选项: %s", question['selected_options'])
                 
                 # 检查是否是单选模式
                 is_single_choice = self.single_choice_var.get()
-                print(f"[调试] 当前是否为单选模式: {is_single_choice}")
+                logger.debug("当前是否为单选模式: %s", is_single_choice)
                 
                 # 先检查选项是否已经在选中列表中
                 is_already_selected = selected_option in question['selected_options']
-                print(f"[调试] 选项{selected_option}是否已选中: {is_already_selected}")
+                logger.debug("选项%s是否已选中: %s", selected_option, is_already_selected)
                 
                 # 标记是否需要清除答案和解析（仅当用户实际修改了选项状态时）
                 need_clear_analysis = False
                 
+                # 两个部分的复选框在题目的缓冲区中按位置修改，离开这道题目时才写回
+                checkboxes = question.checkboxes()
+                
                 # 处理单选模式的逻辑
                 if is_single_choice:
                     # 单选模式下的特殊处理
                     if not is_already_selected:
-                        print(f"[调试] 单选模式: 切换到选项{selected_option}")
+                        logger.debug("单选模式: 切换到选项%s", selected_option)
                         need_clear_analysis = True  # 用户切换了选项，需要清除答案和解析
                         
-                        # 先取消所有其他选项
-                        for option in list(question['selected_options']):
-                            # 更新题目内容中的其他选项为未选中状态
-                            question['with_quotes'] = self.update_question_content_with_selected(question['with_quotes'], option)
-                            question['without_quotes'] = self.update_question_content_with_selected(question['without_quotes'], option)
-                            print(f"[调试] 单选模式下取消选中选项{option}")
-                        
-                        # 清空选中选项列表
-                        question['selected_options'] = []
-                        
-                        # 更新题目内容中的当前选项为选中状态
-                        question['with_quotes'] = self.update_question_content_with_selected(question['with_quotes'], selected_option)
-                        question['without_quotes'] = self.update_question_content_with_selected(question['without_quotes'], selected_option)
-                        
-                        # 将当前选项添加到选中列表
-                        question['selected_options'].append(selected_option)
-                        print(f"[调试] 单选模式: 选中选项{selected_option}")
+                        # 只选中当前选项，其他选项全部取消选中
+                        checkboxes.set_exact([selected_option])
+                        question['selected_options'] = [selected_option]
+                        logger.debug("单选模式: 选中选项%s", selected_option)
                     else:
-                        print(f"[调试] 单选模式: 选项{selected_option}已选中，不执行任何操作")
+                        logger.debug("单选模式: 选项%s已选中，不执行任何操作", selected_option)
                         # 单选模式下不允许取消已选中的选项
                         # 直接返回，不进行任何修改
                         pass
                 else:
-                    # 多选模式的逻辑
-                    # 更新题目内容中的当前选项选中状态
-                    question['with_quotes'] = self.update_question_content_with_selected(question['with_quotes'], selected_option)
-                    question['without_quotes'] = self.update_question_content_with_selected(question['without_quotes'], selected_option)
-                    
-                    # 更新选中选项列表（切换选中状态）
+                    # 多选模式的逻辑：已选中的选项取消选中，否则选中
                     if is_already_selected:
+                        checkboxes.deselect(selected_option)
                         question['selected_options'].remove(selected_option)
-                        print(f"[调试] 多选模式: 取消选中选项{selected_option}")
+                        logger.debug("多选模式: 取消选中选项%s", selected_option)
                         need_clear_analysis = True  # 用户修改了选项状态，需要清除答案和解析
                     else:
+                        checkboxes.select(selected_option)
                         question['selected_options'].append(selected_option)
-                        print(f"[调试] 多选模式: 选中选项{selected_option}")
+                        logger.debug("多选模式: 选中选项%s", selected_option)
                         need_clear_analysis = True  # 用户修改了选项状态，需要清除答案和解析
                 
-                # 如果用户修改了选项状态，清除答案和解析部分
-                if need_clear_analysis:
-                    print(f"[调试] 清除第{question['index']}题的答案和解析部分")
-                    # 移除答案和解析部分
-                    question['with_quotes'] = self.remove_answer_and_analysis(question['with_quotes'])
-                    question['without_quotes'] = self.remove_answer_and_analysis(question['without_quotes'])
+                # 如果用户修改了选项状态，清除答案和解析部分（同一道题只需清除一次）
+                if need_clear_analysis and not checkboxes.answers_cleared:
+                    checkboxes.answers_cleared = True
+                    logger.debug("清除第%s题的答案和解析部分", question['index'])
+                    # 移除答案和解析部分，内容有变化时才写回（写回后缓冲区按新内容重建）
+                    for field in ('with_quotes', 'without_quotes'):
+                        content = question[field]
+                        cleaned = self.remove_answer_and_analysis(content)
+                        if cleaned != content:
+                            question[field] = cleaned
                 
                 # 打印更新后的状态
-                print(f"[调试] 更新后选中选项: {question['selected_options']}")
+                logger.debug("更新后选中选项: %s", question['selected_options'])
                 
                 # 重新显示当前题目以更新UI
-                print("[调试] 调用display_current_question更新UI")
+                logger.debug("调用display_current_question更新UI")
                 self.display_current_question()
                 
                 # 强制更新UI
                 self.root.update_idletasks()
-                print("[调试] 强制更新UI完成")
+                logger.debug("强制更新UI完成")
                 
                 # 检查是否需要自动保存
-                self.auto_save()
+                self.auto_save(self.current_question_index)
                 
                 return selected_option
             else:
-                print(f"[调试] 无效的按键{key}，当前题目只有{option_count}个选项")
+                logger.debug("无效的按键%s，当前题目只有%s个选项", key, option_count)
         else:
-            print("[调试] 当前题目不支持键盘选择选项")
+            logger.debug("当前题目不支持键盘选择选项")
         return None
     
     def run(self):
-        print("[调试] 启动主循环")
-        # 自动加载我们的测试文件
-        test_file = "test_question_extractor.md"  # 使用我们创建的测试文件
-        print(f"[调试] 自动加载新功能测试文件: {test_file}")
-        if os.path.exists(test_file):
-            self.file_path = test_file
-            # 读取文件内容并提取题目
-            with open(test_file, "r", encoding="utf-8") as f:
-                content = f.read()
-            self.questions = self.split_questions_by_separator(content)
-            self.extract_questions()
-            # 显示第一题
-            if self.questions:
-                self.current_question_index = 0
-                self.display_current_question()
-                self.update_navigation_buttons()
-                
-                print("\n[调试] 开始测试新功能:")
-                print("[测试] 1. 测试引用选项替换功能:")
-                self.replace_quote_options_without_quotes()
-                
-                print("\n[测试] 2. 测试AI答案自动选择功能:")
-                self.auto_select_by_ai_answer()
-                
-                print("\n[测试] 3. 切换到第二题测试多选答案:")
-                if len(self.questions) > 1:
-                    self.current_question_index = 1
-                    self.display_current_question()
-                    self.auto_select_by_ai_answer()
+        logger.debug("启动主循环")
         
         # 确保窗口获得焦点
         self.root.focus_set()
-        print("[调试] 确认窗口焦点设置")
+        logger.debug("确认窗口焦点设置")
         
         self.root.mainloop()
-        print("[调试] 主循环结束")
+        logger.debug("主循环结束")
 
 # 创建并运行应用
 if __name__ == "__main__":
+    # 默认只输出警告和错误，使用 --debug 参数或设置环境变量 QUESTION_EXTRACTOR_DEBUG=1 输出调试日志
+    debug = '--debug' in sys.argv[1:] or os.environ.get('QUESTION_EXTRACTOR_DEBUG') == '1'
+    logging.basicConfig(level=logging.DEBUG if debug else logging.WARNING,
+                        format='[%(levelname)s] %(name)s: %(message)s')
     app = QuestionExtractor()
     app.run()
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+批量修复选项格式、批量按AI答案设置选项
+
+题目分块后交给进程池修复，只有内容发生变化的题目才重新分析选项类型并传回结果。
+也可以不修改题库，只生成修复前后的统一差异（unified diff）供检查。
+按AI答案设置选项也按同样的方式分块并行处理，每道题只解析一次答案，按位置改写复选框状态。
+"""
+import difflib
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from process_pool import map_chunks
+from question_core import analyze_question, apply_ai_answer, fix_option_format
+from question_index import SCHEME_SEPARATOR, IndexEntry, QuestionIndex
+
+# 每个任务包含的题目数
+DEFAULT_CHUNK_SIZE = 500
+
+
+class FixResult(NamedTuple):
+    """一道被修复的题目"""
+    position: int                   # 题目在题库中的位置（从0开始）
+    fixed: str                      # 修复后的原始内容
+    option_type: str                # 修复后的选项类型
+    error_reason: Optional[str]
+
+
+def _fix(position: int, text: str) -> Optional[FixResult]:
+    fixed, modified = fix_option_format(text)
+    if not modified:
+        return None
+    option_type, error_reason = analyze_question(fixed)
+    return FixResult(position, fixed, option_type, error_reason)
+
+
+class AnswerResult(NamedTuple):
+    """一道有AI答案的题目"""
+    position: int                   # 题目在题库中的位置（从0开始）
+    fixed: str                      # 按AI答案设置选项后的原始内容
+    answers: List[str]              # AI答案字母
+
+
+def _apply_answer(position: int, text: str) -> Optional[AnswerResult]:
+    applied, answers = apply_ai_answer(text)
+    if not answers:
+        return None
+    return AnswerResult(position, applied, answers)
+
+
+def fix_chunk(items: List[Tuple[int, str]]) -> List[FixResult]:
+    """修复一块题目，只返回有变化的题目（在工作进程中执行）"""
+    return [result for result in (_fix(position, text) for position, text in items) if result is not None]
+
+
+def answer_chunk(items: List[Tuple[int, str]]) -> List[AnswerResult]:
+    """按AI答案设置一块题目的选项，只返回有AI答案的题目（在工作进程中执行）"""
+    return [result for result in (_apply_answer(position, text) for position, text in items) if result is not None]
+
+
+def _read_file_chunk(source_path: str, start: int, entries: List[IndexEntry]) -> List[Tuple[int, str]]:
+    index = QuestionIndex(source_path, SCHEME_SEPARATOR, entries, 0, 0)
+    return list(enumerate(index.iter_texts(), start))
+
+
+def fix_file_chunk(source_path: str, start: int, entries: List[IndexEntry]) -> List[FixResult]:
+    """按索引直接从题库文件读取一块题目并修复（在工作进程中执行）"""
+    return fix_chunk(_read_file_chunk(source_path, start, entries))
+
+
+def answer_file_chunk(source_path: str, start: int, entries: List[IndexEntry]) -> List[AnswerResult]:
+    """按索引直接从题库文件读取一块题目并按AI答案设置选项（在工作进程中执行）"""
+    return answer_chunk(_read_file_chunk(source_path, start, entries))
+
+
+def _fix_file_chunk_args(args) -> List[FixResult]:
+    return fix_file_chunk(*args)
+
+
+def _answer_file_chunk_args(args) -> List[AnswerResult]:
+    return answer_file_chunk(*args)
+
+
+def _index_chunks(index: QuestionIndex, chunk_size: int):
+    return ((index.source_path, start, index.entries[start:start + chunk_size])
+            for start in range(0, len(index), chunk_size))
+
+
+def _run(func, chunks, jobs: Optional[int]) -> Iterator[List[FixResult]]:
+    # 停止迭代（取消）时只等待正在运行的块，排队的块会被取消
+    yield from map_chunks(func, chunks, jobs)
+
+
+def _chunks(items: Iterable[Tuple[int, str]], chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    items = iter(items)
+    return iter(lambda: list(islice(items, chunk_size)), [])
+
+
+def fix_questions(items: Iterable[Tuple[int, str]], jobs: Optional[int] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[FixResult]]:
+    """
+    并行修复内存中的题目，每处理完一块产生这一块中被修复的题目
+
+    Args:
+        items: (题目位置, 原始内容)
+        jobs: 工作进程数，默认为CPU核数；为1时在当前进程中执行
+        chunk_size: 每个任务包含的题目数
+    """
+    yield from _run(fix_chunk, _chunks(items, chunk_size), jobs)
+
+
+def apply_answers(items: Iterable[Tuple[int, str]], jobs: Optional[int] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[AnswerResult]]:
+    """
+    并行按AI答案设置内存中题目的选项，每处理完一块产生这一块中有AI答案的题目
+
+    Args:
+        items: (题目位置, 原始内容)
+        jobs: 工作进程数，默认为CPU核数；为1时在当前进程中执行
+        chunk_size: 每个任务包含的题目数
+    """
+    yield from _run(answer_chunk, _chunks(items, chunk_size), jobs)
+
+
+def fix_index(index: QuestionIndex, jobs: Optional[int] = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[int, FixResult]:
+    """并行修复题库文件中的所有题目，返回 {题目位置: 修复结果}"""
+    fixes = {}
+    for results in _run(_fix_file_chunk_args, _index_chunks(index, chunk_size), jobs):
+        fixes.update((result.position, result) for result in results)
+    return fixes
+
+
+def apply_answers_index(index: QuestionIndex, jobs: Optional[int] = None,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[int, AnswerResult]:
+    """并行按AI答案设置题库文件中所有题目的选项，返回 {题目位置: 结果}（只包含有AI答案的题目）"""
+    results_by_position = {}
+    for results in _run(_answer_file_chunk_args, _index_chunks(index, chunk_size), jobs):
+        results_by_position.update((result.position, result) for result in results)
+    return results_by_position
+
+
+def iter_fixed_texts(index: QuestionIndex, fixes: Dict[int, Union[FixResult, AnswerResult]]) -> Iterator[str]:
+    """按顺序产生修复（或按AI答案设置选项）后的题库中每道题的内容，未修改的题目从文件读取"""
+    for position, text in enumerate(index.iter_texts()):
+        result = fixes.get(position)
+        yield result.fixed if result is not None else text
+
+
+def iter_fix_diff(index: QuestionIndex, fixes: Dict[int, FixResult], context: int = 3) -> Iterator[str]:
+    """产生所有被修复题目修复前后的统一差异"""
+    for position in sorted(fixes):
+        entry = index[position]
+        original = index.read(position)
+        label = f"{index.source_path} 第{entry.number}题"
+        for line in difflib.unified_diff(
+                original.splitlines(), fixes[position].fixed.splitlines(),
+                fromfile=f"a/{label}", tofile=f"b/{label}", n=context, lineterm=''):
+            yield line + '\n'
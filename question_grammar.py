@@ -0,0 +1,257 @@
+"""
+题目格式的语法定义
+
+所有解析题目用到的正则表达式都在这里预编译，另外提供按行一次扫描完题目的
+tokenize()，得到选项、AI答案、答案和解析的位置，避免对同一道题反复匹配。
+"""
+import re
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+# ---------------------------------------------------------------------------
+# 选项
+# ---------------------------------------------------------------------------
+
+# 单行选项：可选的引用前缀 + "- [ ]"/"- [x]" + 选项字母 + 选项内容
+OPTION_LINE_RE = re.compile(
+    r'^(?P<prefix>[^\n]*?>\s*|\s*)-\s*\[(?P<status>[ x])\]\s*(?P<letter>[A-D])\.?\s*(?P<content>.*)$'
+)
+
+# 选项行的开头：可选的引用前缀 + "- [ ]"/"- [x]"，后面的选项由 split_option_line 逐字符切分
+OPTION_HEAD_RE = re.compile(r'(?P<prefix>[\s>]*)-\s*\[(?P<status>[ x])\]\s*')
+
+# 选项字母后面的分隔符
+OPTION_LETTER_SEPARATORS = '.．、'
+
+# ---------------------------------------------------------------------------
+# AI答案、答案和解析
+# ---------------------------------------------------------------------------
+
+# AI答案，如 '> AI答案为A'、'> AI答案为B、C'、'> AI答案为 "A"'，引用符号在带引用部分中已被去掉，因此可省略
+AI_ANSWER_RE = re.compile(r""">?\s*AI答案为[:：]?\s*["']?([A-D](?:[,，、]\s*[A-D])*)["']?\s*\.?\s*""")
+
+# 以答案或解析开头的行
+ANSWER_LINE_RE = re.compile(r'^\s*>?\s*(?:答案|参考答案)[:：]')
+ANALYSIS_LINE_RE = re.compile(r'^\s*>?\s*解析[:：]')
+
+# 移除答案和解析时依次使用的模式（. 匹配换行符，一直删到空行或文本结尾）
+ANSWER_AND_ANALYSIS_RES = [
+    # 移除'答案：' 或 '参考答案：' 及其后面的内容（包括多个空行）
+    re.compile(r'(答案|参考答案)[:：].*?(?=\n\n|$)', re.DOTALL),
+    # 移除'> 解析：' 或 '解析：' 及其后面的内容（包括多个空行）
+    re.compile(r'[>]?\s*(解析)[:：].*?(?=\n\n|$)', re.DOTALL),
+    # 移除'>'引用块中的答案部分
+    re.compile(r'>\s*[A-D]\).*?(?=\n\n|$)', re.DOTALL),
+    # 移除'> 答案：' 或 '> 参考答案：' 及其后面的内容
+    re.compile(r'>\s*(答案|参考答案)[:：].*?(?=\n\n|$)', re.DOTALL),
+    # 特别处理AI答案为"的"的文本
+    re.compile(r'>\s*AI答案为(\s*"的"\s*)\.?.*?(?=\n\n|$)', re.DOTALL),
+    re.compile(r'>\s*AI答案为的.*?(?=\n\n|$)', re.DOTALL),
+]
+
+# ---------------------------------------------------------------------------
+# 渲染
+# ---------------------------------------------------------------------------
+
+HTML_CHECKBOX_RE = re.compile(r'<li>- \[([ x])\]')
+HTML_INLINE_MATH_RE = re.compile(r'(?<!\$)\$([^$]+?)\$(?!\$)')
+DISPLAY_MATH_RE = re.compile(r'\$\$([\s\S]*?)\$\$')
+LABEL_CHECKBOX_RE = re.compile(r'- \[([ x])\]')
+LABEL_HEADING_RE = re.compile(r'##\s+(.*?)\n')
+LABEL_INLINE_MATH_RE = re.compile(r'\$([^$]+?)\$')
+
+# ---------------------------------------------------------------------------
+# 文件切分
+# ---------------------------------------------------------------------------
+
+# QuestionExtractor 使用的题目分隔符
+SEPARATOR_SPLIT_RE = re.compile(r'(---\n)')
+
+# markdown_splitter 使用的题目块
+VALID_BLOCK_RE = re.compile(r'^> ## ', re.MULTILINE)
+BLOCK_RE = re.compile(r'(> ##.*?)(?=\n---\n> ##|\Z)', re.DOTALL)
+BLOCK_FALLBACK_RE = re.compile(r'(> ##.*?)(?=\n> ##|\Z)', re.DOTALL)
+
+# 文件名中的数字（自然排序时把文件名切分为文字和数字）
+DIGITS_SPLIT_RE = re.compile(r'(\d+)')
+
+# ---------------------------------------------------------------------------
+# 题目图片
+# ---------------------------------------------------------------------------
+
+# Markdown 图片引用 ![说明](路径 "标题")，路径可以用尖括号括起来
+MARKDOWN_IMAGE_RE = re.compile(r'!\[[^\]]*\]\(\s*<?([^)>\s]+)>?(?:\s+["\'][^)]*["\'])?\s*\)')
+
+# 按题号命名的图片文件名（不含扩展名）：12、12_1、12-2、第12题、第12题_1
+QUESTION_IMAGE_NAME_RE = re.compile(r'^(?:第)?(\d+)(?:题)?(?:[_\-](\d+))?$')
+
+# ---------------------------------------------------------------------------
+# 题目去重和相似题目
+# ---------------------------------------------------------------------------
+
+# 行首的引用符号和空白
+QUOTE_PREFIX_RE = re.compile(r'^[ \t>]+', re.MULTILINE)
+# 复选框（忽略选中状态）
+CHECKBOX_STATE_RE = re.compile(r'\[[ xX]\]')
+# 所有空白
+WHITESPACE_RE = re.compile(r'\s+')
+# 题号（第12题、行首的 12. 或 12、），相似题目比较时去掉
+QUESTION_NUMBER_RE = re.compile(r'第\s*\d+\s*题|^[ \t>#]*\d+\s*[.、]', re.MULTILINE)
+# 标点、符号和空白（相似题目比较时只保留文字和数字）
+NON_WORD_RE = re.compile(r'[\W_]+')
+
+# ---------------------------------------------------------------------------
+# 一次扫描的题目分词
+# ---------------------------------------------------------------------------
+
+TOKEN_OPTION = 'option'
+TOKEN_AI_ANSWER = 'ai_answer'
+TOKEN_ANSWER = 'answer'
+TOKEN_ANALYSIS = 'analysis'
+
+
+class Token(NamedTuple):
+    """题目中的一个语法单元，位置都是相对于题目文本的字符偏移"""
+    kind: str                       # TOKEN_OPTION / TOKEN_AI_ANSWER / TOKEN_ANSWER / TOKEN_ANALYSIS
+    start: int                      # 所在行的起始位置
+    end: int                        # 所在行的结束位置（不含换行符）
+    letter: str = ''                # 选项字母；AI答案为所有答案字母，如 'AC'
+    status: str = ''                # 选项的选中状态，' ' 或 'x'
+    content: str = ''               # 选项内容
+    checkbox: int = -1              # 选项状态字符的位置
+    quoted: bool = False            # 选项是否在引用块内
+
+
+def tokenize(text: str) -> Iterator[Token]:
+    """
+    按行扫描一遍题目，依次产生选项、AI答案、答案和解析的位置
+
+    Args:
+        text: 题目文本
+
+    Yields:
+        按出现顺序排列的 Token
+    """
+    start = 0
+    for line in text.split('\n'):
+        end = start + len(line)
+
+        if '[' in line:
+            match = OPTION_LINE_RE.match(line)
+            if match:
+                yield Token(
+                    TOKEN_OPTION, start, end,
+                    letter=match.group('letter'),
+                    status=match.group('status'),
+                    content=match.group('content'),
+                    checkbox=start + match.start('status'),
+                    quoted='>' in match.group('prefix'),
+                )
+                start = end + 1
+                continue
+
+        if 'AI答案为' in line:
+            match = AI_ANSWER_RE.search(line)
+            if match:
+                letters = ''.join(ch for ch in match.group(1) if ch in 'ABCD')
+                yield Token(TOKEN_AI_ANSWER, start, end, letter=letters)
+        elif '答案' in line and ANSWER_LINE_RE.match(line):
+            yield Token(TOKEN_ANSWER, start, end)
+        elif '解析' in line and ANALYSIS_LINE_RE.match(line):
+            yield Token(TOKEN_ANALYSIS, start, end)
+
+        start = end + 1
+
+
+def _is_first_anchor(line: str, pos: int) -> bool:
+    """选项行开头的字母是否为选项 A：后面是分隔符或空白"""
+    following = line[pos + 1:pos + 2]
+    return line[pos:pos + 1] == 'A' and following != '' and (
+        following in OPTION_LETTER_SEPARATORS or following.isspace())
+
+
+def _is_option_anchor(line: str, pos: int) -> bool:
+    """
+    line[pos] 处的字母是否为后面选项的开头：紧跟分隔符（如 'A.正确B.错误' 中的 B）
+
+    前后都是空白的字母（如 'Plan B is ok'）、紧跟在英文字母后面的字母（如 'PCB.'）
+    和分隔符后面是数字的字母（如 '见图B.1所示'）都不是选项开头
+    """
+    following = line[pos + 1:pos + 2]
+    if following == '' or following not in OPTION_LETTER_SEPARATORS:
+        return False
+    if line[pos + 2:pos + 3].isdigit():
+        return False
+    previous = line[pos - 1]
+    return not ('A' <= previous <= 'Z' or 'a' <= previous <= 'z')
+
+
+def split_option_line(line: str) -> Optional[Tuple[str, str, List[Tuple[str, str]]]]:
+    """
+    切分一行中的四个选项，如 '- [ ] A.内容 B.内容 C.内容 D.内容'
+
+    从开头的 A 开始，按顺序依次查找 B、C、D 的位置（字母后面紧跟分隔符），只扫描一遍；
+    与原来的正则一样，A、B、C、D 四个选项都找到时才切分，选项内容中的其他大写字母
+    （如 DNA、'Plan B is ok'、'见图B.1所示'）不会被误认为选项，只有一个选项的行保持不变。
+
+    Returns:
+        (前缀, 选中状态, [(选项字母, 选项内容), ...])；不是一行四个选项时返回 None
+    """
+    head = OPTION_HEAD_RE.match(line)
+    if head is None:
+        return None
+    start = head.end()
+    if not _is_first_anchor(line, start):
+        return None
+
+    anchors = [start]
+    pos = start + 1
+    for letter in 'BCD':
+        found = line.find(letter, pos)
+        while found != -1 and not _is_option_anchor(line, found):
+            found = line.find(letter, found + 1)
+        if found == -1:
+            return None
+        anchors.append(found)
+        pos = found + 1
+
+    options = []
+    for i, anchor in enumerate(anchors):
+        end = anchors[i + 1] if i + 1 < len(anchors) else len(line)
+        content = line[anchor + 1:end].strip()
+        if content[:1] in OPTION_LETTER_SEPARATORS:
+            content = content[1:].strip()
+        if content:
+            options.append((line[anchor], content))
+    if len(options) < 2:
+        return None
+    return head.group('prefix'), head.group('status'), options
+
+
+def parse_options(text: str) -> List[Token]:
+    """题目中所有的选项"""
+    return [token for token in tokenize(text) if token.kind == TOKEN_OPTION]
+
+
+def parse_ai_answer(text: str) -> Optional[List[str]]:
+    """解析题目中的AI答案，返回答案字母列表；没有AI答案时返回 None"""
+    for token in tokenize(text):
+        if token.kind == TOKEN_AI_ANSWER:
+            return list(token.letter)
+    return None
+
+
+def find_option(tokens: List[Token], letter: str, quoted: Optional[bool] = None) -> Optional[Token]:
+    """
+    查找指定字母的第一个选项
+
+    Args:
+        tokens: tokenize() 的结果
+        letter: 选项字母
+        quoted: 为 True/False 时只查找引用块内/外的选项，为 None 时优先引用块内的选项
+    """
+    candidates = [token for token in tokens if token.kind == TOKEN_OPTION and token.letter == letter]
+    if quoted is not None:
+        candidates = [token for token in candidates if token.quoted == quoted]
+    else:
+        candidates.sort(key=lambda token: not token.quoted)
+    return candidates[0] if candidates else None
@@ -0,0 +1,99 @@
+"""
+题目图片
+
+找出每道题目用到的图片：题目 Markdown 中的 ![](...) 引用，以及题库所在文件夹
+（和其中的 images 子文件夹）里按题号命名的图片文件，如 12.png、12_1.jpg、第12题.png。
+不依赖 tkinter 和 PIL，命令行提取时也可以使用。
+"""
+import logging
+import os
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+import question_grammar as grammar
+
+logger = logging.getLogger(__name__)
+
+# 支持的图片扩展名
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp')
+
+# 题库旁边存放图片的子文件夹
+IMAGE_SUBDIRS = ('images',)
+
+
+def is_image_file(path: str) -> bool:
+    return path.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def image_references(text: str) -> List[str]:
+    """题目中 ![](...) 引用的本地图片路径（按出现顺序，不含网络图片）"""
+    references = []
+    for match in grammar.MARKDOWN_IMAGE_RE.finditer(text):
+        reference = match.group(1)
+        if '://' in reference or reference.startswith('data:'):
+            continue
+        references.append(unquote(reference))
+    return references
+
+
+def scan_numbered_images(base_dir: str) -> Dict[int, List[str]]:
+    """列出文件夹（和 images 子文件夹）中按题号命名的图片，返回 {题号: [图片路径]}"""
+    found: Dict[int, List[tuple]] = {}
+    for folder in (base_dir, *(os.path.join(base_dir, name) for name in IMAGE_SUBDIRS)):
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            continue
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in IMAGE_EXTENSIONS:
+                continue
+            match = grammar.QUESTION_IMAGE_NAME_RE.match(stem)
+            if match is None:
+                continue
+            number = int(match.group(1))
+            part = int(match.group(2)) if match.group(2) else 0
+            found.setdefault(number, []).append((part, name, os.path.join(folder, name)))
+    # 同一题的图片按序号排列：12.png、12_1.png、12_2.png
+    return {number: [path for _, _, path in sorted(images)] for number, images in found.items()}
+
+
+class QuestionImages:
+    """
+    题目与图片的对应关系
+
+    Args:
+        base_dir: 题库所在文件夹，相对路径的图片引用以它为基准
+        numbered: 按题号命名的图片 {题号: [图片路径]}
+    """
+
+    def __init__(self, base_dir: str, numbered: Optional[Dict[int, List[str]]] = None):
+        self.base_dir = base_dir
+        self.numbered = numbered or {}
+
+    @classmethod
+    def build(cls, bank_path: str) -> "QuestionImages":
+        """扫描题库所在文件夹，建立题号与图片文件的对应关系"""
+        base_dir = os.path.dirname(os.path.abspath(bank_path))
+        numbered = scan_numbered_images(base_dir)
+        logger.debug("在 %s 中找到 %s 道题目的图片", base_dir, len(numbered))
+        return cls(base_dir, numbered)
+
+    def resolve(self, reference: str) -> Optional[str]:
+        """把图片引用转换为文件路径，文件不存在时返回 None"""
+        path = os.path.normpath(os.path.join(self.base_dir, os.path.expanduser(reference)))
+        return path if os.path.isfile(path) else None
+
+    def images_for(self, number: int, text: str) -> List[str]:
+        """一道题目的所有图片：先是题目中引用的图片，然后是按题号命名的图片"""
+        images = []
+        for reference in image_references(text):
+            path = self.resolve(reference)
+            if path is None:
+                logger.debug("第%s题引用的图片不存在: %s", number, reference)
+            elif path not in images:
+                images.append(path)
+        for path in self.numbered.get(number, ()):
+            if path not in images:
+                images.append(path)
+        return images
@@ -0,0 +1,375 @@
+"""
+题目索引文件（<题库文件>.idx）
+
+索引记录每个题目的字节偏移、长度、选项类型和内容哈希，并用题库文件的
+大小和修改时间校验是否过期。建立一次之后，统计题目数量、定位第N题都
+不需要重新解析整个文件，直接 seek() 到对应位置读取即可。
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.idx'
+
+# 切分方式：与 markdown_splitter 相同，按 '> ##' 题目块切分
+SCHEME_BLOCKS = 'blocks'
+# 切分方式：与 QuestionExtractor 相同，按 '---' 分隔符切分
+SCHEME_SEPARATOR = 'separator'
+
+# 选项类型分析函数：接收题目文本，返回 (选项类型, 错误原因)
+Analyzer = Callable[[str], Tuple[Optional[str], Optional[str]]]
+
+# 题目块的起始标记（引用格式的二级标题）
+QUESTION_MARKER = b'> ##'
+
+# 题目块之间的分隔行
+SEPARATOR_LINE = b'---'
+
+# 含有单独 \r 的行需要按通用换行规则进一步拆分
+_UNIVERSAL_LINE_RE = re.compile(rb'[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+')
+
+
+class IndexEntry(NamedTuple):
+    """索引中的一个题目"""
+    offset: int                  # 起始字节偏移
+    length: int                  # 字节长度
+    number: int                  # 题号（与原有提取逻辑的编号一致）
+    option_type: Optional[str]   # 选项类型，未分析时为 None
+    error_reason: Optional[str]  # 非标准格式的原因
+    content_hash: str            # 题目文本的哈希
+
+
+def content_hash(text: str) -> str:
+    """计算题目文本的内容哈希"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def index_path_for(source_path: str) -> str:
+    """获取题库文件对应的索引文件路径"""
+    return source_path + INDEX_SUFFIX
+
+
+def iter_lines(f: BinaryIO) -> Iterator[Tuple[int, bytes, bytes]]:
+    """
+    逐行读取二进制文件，换行规则与文本模式的通用换行一致（\\n、\\r\\n、\\r）
+
+    Args:
+        f: 以二进制模式打开的文件对象
+
+    Yields:
+        (行首字节偏移, 不含换行符的行内容, 换行符)
+    """
+    offset = 0
+    for raw in f:
+        pieces = _UNIVERSAL_LINE_RE.findall(raw) if b'\r' in raw else (raw,)
+        for piece in pieces:
+            body = piece.rstrip(b'\r\n')
+            yield offset, body, piece[len(body):]
+            offset += len(piece)
+
+
+def _scan_block_spans(f: BinaryIO, split_on_separator: bool) -> Iterator[Tuple[int, int]]:
+    """
+    用状态机扫描题目块的字节范围
+
+    Args:
+        f: 以二进制模式打开的文件对象
+        split_on_separator: True 时只在 '---' 行后紧跟 '> ##' 处切分，
+            False 时在每个以 '> ##' 开头的行处切分
+
+    Yields:
+        (块起始字节偏移, 块字节长度)
+    """
+    start = None    # 当前块的起始偏移，None 表示还没遇到第一个题目
+    pending = None  # 可能作为分隔符的 '---' 行的偏移
+    end = 0
+
+    for offset, body, newline in iter_lines(f):
+        end = offset + len(body) + len(newline)
+
+        if start is None:
+            # 第一个题目块可以从行中间开始，与正则的行为一致
+            pos = body.find(QUESTION_MARKER)
+            if pos >= 0:
+                start = offset + pos
+            continue
+
+        if not split_on_separator:
+            if body.startswith(QUESTION_MARKER):
+                yield start, offset - start
+                start = offset
+            continue
+
+        if pending is not None:
+            if body.startswith(QUESTION_MARKER):
+                yield start, pending - start
+                start = offset
+                pending = None
+                continue
+            pending = None
+
+        if body == SEPARATOR_LINE and newline:
+            pending = offset
+
+    if start is not None:
+        yield start, end - start
+
+
+def iter_block_spans(input_file: str) -> Iterator[Tuple[int, int]]:
+    """
+    流式查找所有题目块的字节范围，切分规则与 split_markdown_by_questions_v2 相同
+
+    Args:
+        input_file: 输入的Markdown文件路径
+
+    Yields:
+        (块起始字节偏移, 块字节长度)
+    """
+    with open(input_file, 'rb') as f:
+        spans = _scan_block_spans(f, split_on_separator=True)
+        first = next(spans, None)
+        if first is None:
+            return
+
+        second = next(spans, None)
+        if second is None:
+            # 只找到一个块时，改为按 '> ##' 行切分
+            f.seek(0)
+            yield from _scan_block_spans(f, split_on_separator=False)
+            return
+
+        yield first
+        yield second
+        yield from spans
+
+
+def read_block(f: BinaryIO, offset: int, length: int) -> str:
+    """
+    从二进制文件中读取一个题目块，并按通用换行规则转换换行符
+
+    Args:
+        f: 以二进制模式打开的文件对象
+        offset: 块起始字节偏移
+        length: 块字节长度
+
+    Returns:
+        题目块文本
+    """
+    f.seek(offset)
+    text = f.read(length).decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def iter_separator_spans(f: BinaryIO) -> Iterator[Tuple[int, int]]:
+    """
+    按 '---' 分隔符扫描题目的字节范围，切分规则与
+    QuestionExtractor.split_questions_by_separator 相同（任何以 '---' 结尾的行都是分隔符）
+
+    Args:
+        f: 以二进制模式打开的文件对象
+
+    Yields:
+        (起始字节偏移, 字节长度)，可能包含空白内容，由调用方过滤
+    """
+    start = 0
+    end = 0
+    for offset, body, newline in iter_lines(f):
+        end = offset + len(body) + len(newline)
+        if newline and body.endswith(b'---'):
+            yield start, offset + len(body) - 3 - start
+            start = end
+    yield start, end - start
+
+
+def _has_content(text: str) -> bool:
+    """判断题目的带引用部分或不带引用部分是否至少有一个不为空"""
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if stripped and stripped != '>':
+            return True
+    return False
+
+
+class QuestionIndex:
+    """题库文件的题目索引"""
+
+    def __init__(self, source_path: str, scheme: str, entries: List[IndexEntry], size: int, mtime_ns: int):
+        self.source_path = source_path
+        self.scheme = scheme
+        self.entries = entries
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, i: int) -> IndexEntry:
+        return self.entries[i]
+
+    def is_fresh(self) -> bool:
+        """检查索引是否与题库文件的大小和修改时间一致"""
+        try:
+            stat = os.stat(self.source_path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def _read_entry(self, f: BinaryIO, entry: IndexEntry) -> str:
+        text = read_block(f, entry.offset, entry.length)
+        # 按分隔符切分的题目与 split_questions_by_separator 一样去除首尾空白
+        return text.strip() if self.scheme == SCHEME_SEPARATOR else text
+
+    def read(self, i: int) -> str:
+        """直接定位并读取第i个题目（从0开始）"""
+        with open(self.source_path, 'rb') as f:
+            return self._read_entry(f, self.entries[i])
+
+    def iter_texts(self, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """顺序读取一段题目，只打开一次文件"""
+        with open(self.source_path, 'rb') as f:
+            for entry in self.entries[start:stop]:
+                yield self._read_entry(f, entry)
+
+    def update_entry(self, i: int, option_type: Optional[str], error_reason: Optional[str]):
+        """更新第i个题目的选项类型分析结果"""
+        self.entries[i] = self.entries[i]._replace(option_type=option_type, error_reason=error_reason)
+
+    def to_dict(self) -> Dict:
+        return {
+            'size': self.size,
+            'mtime_ns': self.mtime_ns,
+            'entries': [list(entry) for entry in self.entries],
+        }
+
+    def save(self) -> bool:
+        """保存索引文件，同一个索引文件中可以同时保存多种切分方式的索引"""
+        path = index_path_for(self.source_path)
+        data = _read_index_file(path)
+        schemes = data.get('schemes', {}) if data.get('version') == INDEX_VERSION else {}
+        # 丢弃题库文件修改前留下的其他切分方式
+        schemes = {
+            name: value for name, value in schemes.items()
+            if value.get('size') == self.size and value.get('mtime_ns') == self.mtime_ns
+        }
+        schemes[self.scheme] = self.to_dict()
+
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': INDEX_VERSION, 'schemes': schemes}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            logger.warning("索引文件保存失败: %s", e)
+            return False
+
+    @classmethod
+    def load(cls, source_path: str, scheme: str = SCHEME_BLOCKS) -> Optional['QuestionIndex']:
+        """加载索引文件，索引不存在或已过期时返回 None"""
+        data = _read_index_file(index_path_for(source_path))
+        if data.get('version') != INDEX_VERSION:
+            return None
+
+        value = data.get('schemes', {}).get(scheme)
+        if not value:
+            return None
+
+        index = cls(
+            source_path,
+            scheme,
+            [IndexEntry(*entry) for entry in value['entries']],
+            value['size'],
+            value['mtime_ns'],
+        )
+        return index if index.is_fresh() else None
+
+    @classmethod
+    def build(cls, source_path: str, scheme: str = SCHEME_BLOCKS, analyzer: Optional[Analyzer] = None) -> 'QuestionIndex':
+        """
+        扫描题库文件建立索引
+
+        Args:
+            source_path: 题库文件路径
+            scheme: 切分方式，SCHEME_BLOCKS 或 SCHEME_SEPARATOR
+            analyzer: 选项类型分析函数，为 None 时不分析
+        """
+        stat = os.stat(source_path)
+        entries = list(iter_index_entries(source_path, scheme, analyzer))
+        return cls(source_path, scheme, entries, stat.st_size, stat.st_mtime_ns)
+
+
+def iter_index_entries(source_path: str, scheme: str = SCHEME_BLOCKS, analyzer: Optional[Analyzer] = None) -> Iterator[IndexEntry]:
+    """
+    逐个扫描出题目的索引项，可以边扫描边使用已经找到的题目
+
+    Args:
+        source_path: 题库文件路径
+        scheme: 切分方式，SCHEME_BLOCKS 或 SCHEME_SEPARATOR
+        analyzer: 选项类型分析函数，为 None 时不分析
+
+    Yields:
+        索引项，按题目在文件中的顺序
+    """
+    number = 0
+    with open(source_path, 'rb') as reader:
+        for offset, length in _iter_spans(source_path, scheme):
+            text = read_block(reader, offset, length)
+            if scheme == SCHEME_SEPARATOR:
+                text = text.strip()
+                # 与 split_questions_by_separator 一致，空白部分和单独的 '---' 不算题目
+                if not text or text == '---':
+                    continue
+                number += 1
+                if not _has_content(text):
+                    continue
+            else:
+                number += 1
+
+            option_type, error_reason = analyzer(text) if analyzer else (None, None)
+            yield IndexEntry(offset, length, number, option_type, error_reason, content_hash(text))
+
+
+def _iter_spans(source_path: str, scheme: str) -> Iterator[Tuple[int, int]]:
+    if scheme == SCHEME_SEPARATOR:
+        with open(source_path, 'rb') as f:
+            yield from iter_separator_spans(f)
+    else:
+        yield from iter_block_spans(source_path)
+
+
+def _read_index_file(path: str) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def load_or_build_index(source_path: str, scheme: str = SCHEME_BLOCKS, analyzer: Optional[Analyzer] = None) -> QuestionIndex:
+    """
+    加载题库的索引，索引不存在、已过期或缺少选项类型分析结果时重新建立并保存
+
+    Args:
+        source_path: 题库文件路径
+        scheme: 切分方式，SCHEME_BLOCKS 或 SCHEME_SEPARATOR
+        analyzer: 选项类型分析函数，为 None 时不分析
+
+    Returns:
+        题目索引
+    """
+    index = QuestionIndex.load(source_path, scheme)
+    if index is not None and (analyzer is None or all(entry.option_type for entry in index.entries)):
+        return index
+
+    index = QuestionIndex.build(source_path, scheme, analyzer)
+    index.save()
+    return index
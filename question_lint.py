@@ -0,0 +1,98 @@
+"""
+题库选项格式批量检查
+
+按与界面相同的规则把每道题分为判断题、普通选择题和非标准格式，题目按索引分块后
+交给进程池并行分析，每个工作进程自己按字节偏移读取题目，结果可以输出为
+JSON Lines 或 CSV 报告。
+"""
+import csv
+import json
+import os
+import time
+from typing import Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from process_pool import map_chunks
+from question_core import analyze_question
+from question_index import SCHEME_SEPARATOR, IndexEntry, QuestionIndex, load_or_build_index
+
+# 每个任务包含的题目数
+DEFAULT_CHUNK_SIZE = 500
+
+REPORT_FIELDS = ('file', 'index', 'option_type', 'error_reason', 'elapsed_ms')
+
+
+class LintResult(NamedTuple):
+    """一道题目的检查结果"""
+    file: str
+    index: int                      # 题目序号
+    option_type: str
+    error_reason: Optional[str]
+    elapsed_ms: float               # 分析这道题用的时间（毫秒）
+
+
+def lint_chunk(source_path: str, entries: List[IndexEntry]) -> List[LintResult]:
+    """分析一块题目（在工作进程中执行）"""
+    index = QuestionIndex(source_path, SCHEME_SEPARATOR, entries, 0, 0)
+    results = []
+    for entry, text in zip(entries, index.iter_texts()):
+        start = time.perf_counter()
+        option_type, error_reason = analyze_question(text)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        results.append(LintResult(source_path, entry.number, option_type, error_reason, elapsed_ms))
+    return results
+
+
+def _lint_chunk_args(args: Tuple[str, List[IndexEntry]]) -> List[LintResult]:
+    return lint_chunk(*args)
+
+
+def iter_chunks(files: Iterable[str], chunk_size: int) -> Iterator[Tuple[str, List[IndexEntry]]]:
+    """按题目索引把所有文件切成任务块，小文件整个作为一块"""
+    for source_path in files:
+        entries = load_or_build_index(source_path, SCHEME_SEPARATOR).entries
+        for start in range(0, len(entries), chunk_size):
+            yield source_path, entries[start:start + chunk_size]
+
+
+def lint_files(files: Iterable[str], jobs: Optional[int] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[LintResult]:
+    """
+    检查多个题库文件，按文件和题目顺序产生结果
+
+    Args:
+        files: 题库文件路径
+        jobs: 工作进程数，默认为CPU核数；为1时在当前进程中执行
+        chunk_size: 每个任务包含的题目数
+    """
+    # 按提交顺序返回结果，报告中的题目顺序与文件一致；停止迭代时排队的块会被取消
+    for results in map_chunks(_lint_chunk_args, iter_chunks(files, chunk_size), jobs):
+        yield from results
+
+
+def report_format_for(path: str) -> str:
+    """根据报告文件扩展名判断格式"""
+    return 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'jsonl'
+
+
+def write_report(results: Iterable[LintResult], f: TextIO, report_format: str = 'jsonl') -> Iterator[LintResult]:
+    """
+    把检查结果写入报告，同时原样产生每条结果，便于边写报告边统计
+
+    Args:
+        results: 检查结果
+        f: 报告文件（CSV 需要以 newline='' 打开）
+        report_format: 'jsonl' 或 'csv'
+    """
+    if report_format == 'csv':
+        writer = csv.writer(f)
+        writer.writerow(REPORT_FIELDS)
+        for result in results:
+            writer.writerow(result._replace(elapsed_ms=f"{result.elapsed_ms:.3f}"))
+            yield result
+    else:
+        for result in results:
+            record = result._asdict()
+            record['elapsed_ms'] = round(result.elapsed_ms, 3)
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            yield result
@@ -0,0 +1,192 @@
+"""
+虚拟化的题目列表
+
+列表只为可见的几十行创建画布元素，滚动时复用这些元素显示其他题目，
+行内容通过回调按需获取，十万道题目的列表也能流畅滚动。
+"""
+import bisect
+import tkinter as tk
+from typing import Callable, Optional, Sequence, Tuple
+
+# 行内容：(题目序号, 选项类型, 错误原因)
+RowData = Tuple[int, Optional[str], Optional[str]]
+
+TYPE_COLORS = {
+    '判断题': '#2e7d32',
+    '普通选择题': '#1565c0',
+    '非标准格式': '#c62828',
+}
+
+
+class VirtualQuestionList(tk.Frame):
+    """
+    只创建可见行的题目列表
+
+    Args:
+        master: 父组件
+        get_row: 根据题目位置返回 (题目序号, 选项类型, 错误原因)，不需要读取或渲染题目内容
+        on_activate: 双击或回车选中一行时调用，参数为题目位置
+        row_height: 行高（像素）
+        font: 行文字的字体
+    """
+
+    def __init__(self, master, get_row: Callable[[int], RowData], on_activate: Callable[[int], None],
+                 row_height: int = 22, font=None, width: int = 280, **kwargs):
+        super().__init__(master, **kwargs)
+        self.get_row = get_row
+        self.on_activate = on_activate
+        self.row_height = row_height
+        self.font = font
+
+        self.count = 0              # 全部题目数
+        self.positions = None       # 过滤后显示的题目位置（升序），为 None 时显示全部题目
+        self.top = 0                # 第一个可见行
+        self.selected = None        # 选中的题目位置
+        self._rows = []             # 可见行的画布元素 (背景, 文字)
+        self.colors = {'bg': 'white', 'fg': 'black', 'select_bg': '#cce5ff'}
+
+        self.canvas = tk.Canvas(self, width=width, highlightthickness=0, bg=self.colors['bg'])
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind('<Configure>', lambda event: self._layout())
+        self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<Double-Button-1>', self._on_double_click)
+        self.canvas.bind('<Return>', lambda event: self.selected is not None and self.on_activate(self.selected))
+        self.canvas.bind('<MouseWheel>', self._on_mousewheel)
+        self.canvas.bind('<Button-4>', lambda event: self.yview('scroll', -3, 'units'))
+        self.canvas.bind('<Button-5>', lambda event: self.yview('scroll', 3, 'units'))
+
+    def __len__(self) -> int:
+        return len(self.positions) if self.positions is not None else self.count
+
+    def position_at(self, row: int) -> int:
+        """第row行显示的题目位置"""
+        return self.positions[row] if self.positions is not None else row
+
+    def row_of(self, position: int) -> Optional[int]:
+        """题目所在的行，题目被过滤掉时返回 None"""
+        if self.positions is None:
+            return position if 0 <= position < self.count else None
+        row = bisect.bisect_left(self.positions, position)
+        if row < len(self.positions) and self.positions[row] == position:
+            return row
+        return None
+
+    def set_count(self, count: int):
+        """设置题目总数（加载过程中可以多次调用）"""
+        self.count = count
+        self._redraw()
+
+    def set_positions(self, positions: Optional[Sequence[int]]):
+        """只显示指定位置的题目（升序），为 None 时显示全部题目"""
+        self.positions = positions
+        self.top = 0
+        if self.selected is not None:
+            self.see(self.selected)
+        self._redraw()
+
+    def select(self, position: Optional[int]):
+        """选中并滚动到指定题目"""
+        self.selected = position
+        if position is not None:
+            self.see(position)
+        self._redraw()
+
+    def see(self, position: int):
+        """确保题目所在的行可见"""
+        row = self.row_of(position)
+        if row is None:
+            return
+        visible = self._visible_rows()
+        if row < self.top:
+            self.top = row
+        elif row >= self.top + visible - 1:
+            self.top = max(0, row - visible + 2)
+
+    def refresh(self):
+        """题目的类型等信息变化后重新绘制可见行"""
+        self._redraw()
+
+    def set_colors(self, bg: str, fg: str, select_bg: str):
+        self.colors = {'bg': bg, 'fg': fg, 'select_bg': select_bg}
+        self.canvas.config(bg=bg)
+        self._redraw()
+
+    def yview(self, *args):
+        """滚动条和鼠标滚轮的滚动"""
+        total = len(self)
+        visible = self._visible_rows()
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            self.top += step * max(1, visible - 1) if args[2] == 'pages' else step
+        self.top = max(0, min(self.top, total - visible + 1))
+        self._redraw()
+
+    def _visible_rows(self) -> int:
+        return max(1, self.canvas.winfo_height() // self.row_height + 1)
+
+    def _layout(self):
+        """窗口大小变化时调整画布元素的数量"""
+        visible = self._visible_rows()
+        while len(self._rows) < visible:
+            y = len(self._rows) * self.row_height
+            background = self.canvas.create_rectangle(0, y, 0, y + self.row_height, width=0)
+            text = self.canvas.create_text(4, y + self.row_height // 2, anchor=tk.W, font=self.font)
+            self._rows.append((background, text))
+        while len(self._rows) > visible:
+            for item in self._rows.pop():
+                self.canvas.delete(item)
+        self._redraw()
+
+    def _redraw(self):
+        total = len(self)
+        visible = len(self._rows)
+        self.top = max(0, min(self.top, total - visible + 1))
+        width = self.canvas.winfo_width()
+
+        for i, (background, text) in enumerate(self._rows):
+            row = self.top + i
+            if row >= total:
+                self.canvas.itemconfig(background, state=tk.HIDDEN)
+                self.canvas.itemconfig(text, state=tk.HIDDEN)
+                continue
+
+            position = self.position_at(row)
+            number, option_type, error_reason = self.get_row(position)
+            label = f"{number:>6}  {option_type or '未分析'}"
+            if error_reason:
+                label += f"  {error_reason}"
+            y = i * self.row_height
+            selected = position == self.selected
+            self.canvas.coords(background, 0, y, width, y + self.row_height)
+            self.canvas.itemconfig(background, state=tk.NORMAL,
+                                   fill=self.colors['select_bg'] if selected else self.colors['bg'])
+            self.canvas.itemconfig(text, state=tk.NORMAL, text=label,
+                                   fill=TYPE_COLORS.get(option_type, self.colors['fg']))
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + visible) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _row_at(self, y: int) -> Optional[int]:
+        row = self.top + int(self.canvas.canvasy(y)) // self.row_height
+        return row if 0 <= row < len(self) else None
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        row = self._row_at(event.y)
+        if row is not None:
+            self.select(self.position_at(row))
+
+    def _on_double_click(self, event):
+        row = self._row_at(event.y)
+        if row is not None:
+            self.on_activate(self.position_at(row))
+
+    def _on_mousewheel(self, event):
+        self.yview('scroll', -3 if event.delta > 0 else 3, 'units')
@@ -0,0 +1,235 @@
+"""
+题目数据模型
+
+每道题只保存一份原始文本，以及引用行/非引用行的行范围，带引用部分和不带引用部分
+在用到时才根据行范围拼出来，不再为每道题常驻三份几乎相同的文本。
+"""
+from array import array
+from typing import List, Optional, Tuple
+
+from question_checkboxes import QuestionCheckboxes
+
+# 尚未分析选项类型
+_UNSET = object()
+
+
+def line_spans(text: str) -> Tuple[array, array]:
+    """
+    计算题目中引用行和非引用行的行范围
+
+    Returns:
+        (引用行范围, 非引用行范围)，每个范围在数组中按 起始, 结束 依次排列
+    """
+    quoted = array('I')
+    plain = array('I')
+    start = 0
+    for line in text.split('\n'):
+        end = start + len(line)
+        spans = quoted if line.strip().startswith('>') else plain
+        spans.append(start)
+        spans.append(end)
+        start = end + 1
+    return quoted, plain
+
+
+def extract_without_quotes(question_content: str) -> str:
+    """提取不带引用的部分（不以>开头的行）"""
+    lines = question_content.split('\n')
+    non_quote_lines = [line for line in lines if not line.strip().startswith('>')]
+    return '\n'.join(non_quote_lines).strip()
+
+
+def extract_with_quotes(question_content: str) -> str:
+    """提取带引用的部分（以>开头的行）并去除>符号"""
+    lines = question_content.split('\n')
+    quote_lines = []
+    for line in lines:
+        if line.strip().startswith('>'):
+            # 去除>符号和可能的空格
+            content = line.strip()[1:].strip()
+            quote_lines.append(content)
+    return '\n'.join(quote_lines).strip()
+
+
+class Question:
+    """
+    一道题目
+
+    兼容原来的题目字典用法：question['with_quotes']、question['option_type'] = ... 等
+    都会转到对应的属性上。
+    """
+
+    __slots__ = (
+        'index', 'selected_options',
+        '_source', '_quote_spans', '_plain_spans',
+        '_without_quotes', '_with_quotes',
+        '_option_type', '_error_reason',
+        '_store', '_position', '_checkboxes',
+    )
+
+    FIELDS = ('index', 'original', 'without_quotes', 'with_quotes', 'option_type', 'error_reason', 'selected_options')
+
+    def __init__(self, index: int, original: str, store=None, position: int = -1):
+        self.index = index
+        self.selected_options: List[str] = []
+        self._source = original
+        self._quote_spans = None
+        self._plain_spans = None
+        # 被单独修改过的视图，为 None 时根据原始文本生成
+        self._without_quotes: Optional[str] = None
+        self._with_quotes: Optional[str] = None
+        self._option_type = _UNSET
+        self._error_reason = None
+        self._store = store
+        self._position = position
+        # 正在显示时的复选框编辑缓冲区，两部分内容从这里读取
+        self._checkboxes: Optional[QuestionCheckboxes] = None
+
+    # -- 原始文本和两种视图 ------------------------------------------------
+
+    @property
+    def original(self) -> str:
+        return self._source
+
+    @original.setter
+    def original(self, value: str):
+        self._checkboxes = None
+        self._source = value
+        self._quote_spans = None
+        self._plain_spans = None
+        self._without_quotes = None
+        self._with_quotes = None
+
+    def _spans(self) -> Tuple[array, array]:
+        if self._quote_spans is None:
+            self._quote_spans, self._plain_spans = line_spans(self._source)
+        return self._quote_spans, self._plain_spans
+
+    def _derive_without_quotes(self) -> str:
+        source = self._source
+        spans = self._spans()[1]
+        return '\n'.join(source[spans[i]:spans[i + 1]] for i in range(0, len(spans), 2)).strip()
+
+    def _derive_with_quotes(self) -> str:
+        source = self._source
+        spans = self._spans()[0]
+        return '\n'.join(source[spans[i]:spans[i + 1]].strip()[1:].strip() for i in range(0, len(spans), 2)).strip()
+
+    @property
+    def without_quotes(self) -> str:
+        if self._checkboxes is not None:
+            return self._checkboxes.text('without_quotes')
+        if self._without_quotes is not None:
+            return self._without_quotes
+        return self._derive_without_quotes()
+
+    @without_quotes.setter
+    def without_quotes(self, value: str):
+        self.release_checkboxes()
+        # 与原始文本拆分结果相同时不单独保存
+        self._without_quotes = None if value == self._derive_without_quotes() else value
+
+    @property
+    def with_quotes(self) -> str:
+        if self._checkboxes is not None:
+            return self._checkboxes.text('with_quotes')
+        if self._with_quotes is not None:
+            return self._with_quotes
+        return self._derive_with_quotes()
+
+    @with_quotes.setter
+    def with_quotes(self, value: str):
+        self.release_checkboxes()
+        self._with_quotes = None if value == self._derive_with_quotes() else value
+
+    # -- 复选框编辑 -------------------------------------------------------
+
+    def checkboxes(self) -> QuestionCheckboxes:
+        """
+        两部分内容的复选框编辑缓冲区，第一次调用时建立
+
+        题目显示期间一直保留，选中、取消选中只修改缓冲区中的一个字符；
+        离开这道题目（release_checkboxes()）或直接设置内容时才写回。
+        """
+        if self._checkboxes is None:
+            self._checkboxes = QuestionCheckboxes(self)
+        return self._checkboxes
+
+    def release_checkboxes(self):
+        """把复选框缓冲区中的修改写回两部分内容，并丢弃缓冲区"""
+        checkboxes, self._checkboxes = self._checkboxes, None
+        if checkboxes is not None:
+            checkboxes.apply()
+
+    # -- 选项类型 ---------------------------------------------------------
+
+    def _analyze(self):
+        store = self._store
+        entry = store.index[self._position] if store is not None else None
+        if entry is not None and entry.option_type is not None:
+            # 索引中已有分析结果
+            self._option_type, self._error_reason = entry.option_type, entry.error_reason
+        elif store is not None:
+            self._option_type, self._error_reason = store.analyzer(self.with_quotes)
+            store.record_analysis(self._position, self._option_type, self._error_reason)
+        else:
+            self._option_type, self._error_reason = None, None
+
+    @property
+    def analyzed(self) -> bool:
+        """是否已经有选项类型分析结果（不会触发分析）"""
+        return self._option_type is not _UNSET
+
+    @property
+    def option_type(self) -> Optional[str]:
+        if self._option_type is _UNSET:
+            self._analyze()
+        return self._option_type
+
+    @option_type.setter
+    def option_type(self, value: Optional[str]):
+        self._option_type = value
+
+    @property
+    def error_reason(self) -> Optional[str]:
+        if self._option_type is _UNSET:
+            self._analyze()
+        return self._error_reason
+
+    @error_reason.setter
+    def error_reason(self, value: Optional[str]):
+        self._error_reason = value
+
+    # -- 字典兼容接口 -----------------------------------------------------
+
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS
+
+    def keys(self):
+        return self.FIELDS
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def copy(self) -> 'Question':
+        """复制题目的当前状态（共享不可变的原始文本）"""
+        question = Question.__new__(Question)
+        for name in self.__slots__:
+            setattr(question, name, getattr(self, name))
+        question.selected_options = list(self.selected_options)
+        # 复制时固定缓冲区中的当前内容，副本可以交给后台线程
+        if self._checkboxes is not None:
+            question._checkboxes = None
+            for field in QuestionCheckboxes.FIELDS:
+                setattr(question, field, self._checkboxes.text(field))
+        return question
@@ -0,0 +1,269 @@
+"""
+相似题目
+
+只差标点、全角半角或选项顺序的题目，规范化哈希（question_dedup）找不出来。
+这里把题干和每个选项分别规范化后切成字符片段，计算 MinHash 签名，
+再按 LSH 分段分桶，只比较落在同一个桶里的题目，十万道以上的题目也不需要两两比较。
+签名用单次哈希的 MinHash（每个片段只计算一次哈希，按哈希值分到各个槽中取最小值），
+不依赖 numpy。
+"""
+import hashlib
+import logging
+import random
+import unicodedata
+from array import array
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import question_grammar as grammar
+from question_core import remove_answer_and_analysis
+
+logger = logging.getLogger(__name__)
+
+# 字符片段长度
+SHINGLE_SIZE = 3
+# 签名长度（槽数）
+DEFAULT_NUM_PERM = 128
+# 默认的相似度阈值（估计的 Jaccard 相似度）
+DEFAULT_THRESHOLD = 0.8
+
+# 一个桶中最多保留的代表题目数，模板相同的题目大量落在同一个桶里时，
+# 比较次数不会随桶的大小平方增长（真正相似的题目通常会在其他段中相遇）
+MAX_BUCKET_REPRESENTATIVES = 32
+
+_EMPTY = 0xFFFFFFFF
+_PROBES = 32
+
+
+def fold_text(text: str) -> str:
+    """全角转半角、统一大小写，去掉题号、标点和空白"""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = grammar.QUESTION_NUMBER_RE.sub('', text)
+    return grammar.NON_WORD_RE.sub('', text)
+
+
+def question_features(text: str) -> Tuple[str, Set[str]]:
+    """
+    题目的 (题干, 选项内容集合)
+
+    去掉答案和解析；选项不论顺序、字母和选中状态，只比较内容，
+    引用块内外重复出现的选项只算一次。
+    """
+    text = remove_answer_and_analysis(text)
+    options = set()
+    stem_parts = []
+    start = 0
+    for token in grammar.tokenize(text):
+        stem_parts.append(text[start:token.start])
+        start = token.end
+        if token.kind == grammar.TOKEN_OPTION:
+            content = fold_text(token.content)
+            if content:
+                options.add(content)
+    stem_parts.append(text[start:])
+    return fold_text(''.join(stem_parts)), options
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """文本的所有长度为 size 的字符片段，文本较短时为整个文本"""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def question_shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """题干和各个选项的字符片段（片段不跨越选项，选项顺序不影响结果）"""
+    stem, options = question_features(text)
+    result = shingles(stem, size)
+    for option in options:
+        result |= shingles(option, size)
+    return result
+
+
+@lru_cache(maxsize=None)
+def _probe_sequences(num_perm: int) -> Tuple[Tuple[int, ...], ...]:
+    """每个槽为空时依次尝试借用的槽（固定的随机顺序，所有题目相同）"""
+    rng = random.Random(num_perm)
+    return tuple(tuple(rng.randrange(num_perm) for _ in range(_PROBES)) for _ in range(num_perm))
+
+
+def minhash_signature(items: Iterable[str], num_perm: int = DEFAULT_NUM_PERM) -> Optional[array]:
+    """
+    单次哈希的 MinHash 签名，没有片段时返回 None
+
+    每个片段计算一次64位哈希，低位决定槽，高位作为值，每个槽保留最小值；
+    空槽按固定的随机顺序借用其他非空槽的值（每个空槽的顺序不同，相邻的槽互不相关），
+    两个签名相同槽相等的比例即为相似度的估计。
+    """
+    slots = [_EMPTY] * num_perm
+    for item in items:
+        h = int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'little')
+        slot = h % num_perm
+        value = (h // num_perm) % _EMPTY
+        if value < slots[slot]:
+            slots[slot] = value
+    if min(slots) == _EMPTY:
+        return None
+
+    signature = array('I', slots)
+    for slot, probes in enumerate(_probe_sequences(num_perm)):
+        if slots[slot] != _EMPTY:
+            continue
+        for probe in probes:
+            if slots[probe] != _EMPTY:
+                signature[slot] = slots[probe]
+                break
+        else:
+            # 片段很少时按顺序找右边最近的非空槽
+            probe = next(i % num_perm for i in range(slot + 1, slot + num_perm) if slots[i % num_perm] != _EMPTY)
+            signature[slot] = slots[probe]
+    return signature
+
+
+def estimate_similarity(a: array, b: array) -> float:
+    """按两个签名相同槽相等的比例估计 Jaccard 相似度"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    LSH 的 (段数, 每段槽数)
+
+    相似度为 s 的两道题目至少有一段完全相同的概率为 1 - (1 - s^r)^b，
+    在 (1/b)^(1/r) 附近急剧上升；选择不超过阈值的最大转折点，阈值以上的题目几乎都会成为候选。
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class _DisjointSet:
+    """并查集，把相似的题目合并为一组"""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        i, j = self.find(i), self.find(j)
+        if i != j:
+            self.parent[max(i, j)] = min(i, j)
+
+
+class SimilarQuestions:
+    """
+    题库中的相似题目
+
+    依次 add() 所有题目后调用 clusters()。每一段中签名相同的题目放在一个桶里，
+    新题目只和桶中已有的代表题目比较签名，相似度达到阈值时合并为一组。
+
+    Args:
+        threshold: 相似度阈值（0-1）
+        num_perm: 签名长度，越长估计越准确，内存占用为每道题 4*num_perm 字节
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = DEFAULT_NUM_PERM):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"相似度阈值应在0到1之间: {threshold}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        self.signatures: List[Optional[array]] = []
+        self._groups: Optional[List[List[int]]] = None
+        self._group_of: Dict[int, int] = {}
+        # 每次加入或修改题目时加1，分组期间题目有变化时不缓存分组结果
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    @property
+    def grouped(self) -> bool:
+        """是否已有最新的分组结果（为 False 时 clusters() 需要重新分组，题目多时可以放到后台线程中调用）"""
+        return self._groups is not None
+
+    def add(self, text: str) -> int:
+        """加入一道题目，返回它的位置（从0开始）"""
+        self.signatures.append(minhash_signature(question_shingles(text), self.num_perm))
+        self._generation += 1
+        self._groups = None
+        return len(self.signatures) - 1
+
+    def update(self, position: int, text: str):
+        """题目内容修改后重新计算它的签名，下次调用 clusters() 时重新分组"""
+        self.signatures[position] = minhash_signature(question_shingles(text), self.num_perm)
+        self._generation += 1
+        self._groups = None
+
+    def similarity(self, i: int, j: int) -> float:
+        """两道题目的估计相似度"""
+        a, b = self.signatures[i], self.signatures[j]
+        if a is None or b is None:
+            return 0.0
+        return estimate_similarity(a, b)
+
+    def clusters(self, check: Optional[Callable[[], None]] = None) -> List[List[int]]:
+        """
+        所有包含两道以上题目的相似题目组，每组按位置排序，各组按第一道题目的位置排序
+
+        Args:
+            check: 每处理完一段调用一次，可以在其中抛出异常中止（如后台任务被取消）
+        """
+        cached = self._groups
+        if cached is not None:
+            return cached
+
+        # 在后台线程中分组时界面线程可能同时 update()，按开始时的签名分组
+        generation = self._generation
+        signatures = list(self.signatures)
+        groups = _DisjointSet(len(signatures))
+        comparisons = 0
+        for band in range(self.bands):
+            low, high = band * self.rows, (band + 1) * self.rows
+            buckets: Dict[bytes, List[int]] = {}
+            for position, signature in enumerate(signatures):
+                if signature is None:
+                    continue
+                representatives = buckets.setdefault(signature[low:high].tobytes(), [])
+                root = groups.find(position)
+                for representative in representatives:
+                    if groups.find(representative) == root:
+                        break
+                    comparisons += 1
+                    if estimate_similarity(signatures[representative], signature) >= self.threshold:
+                        groups.union(representative, position)
+                        break
+                else:
+                    if len(representatives) < MAX_BUCKET_REPRESENTATIVES:
+                        representatives.append(position)
+            if check is not None:
+                check()
+
+        members: Dict[int, List[int]] = {}
+        for position in range(len(signatures)):
+            members.setdefault(groups.find(position), []).append(position)
+        result = sorted((group for group in members.values() if len(group) > 1), key=lambda group: group[0])
+        logger.debug("%s 道题目分为 %s 段（每段 %s 个槽），比较 %s 次，找到 %s 组相似题目",
+                     len(signatures), self.bands, self.rows, comparisons, len(result))
+        if generation == self._generation:
+            self._group_of = {position: n for n, group in enumerate(result) for position in group}
+            self._groups = result
+        return result
+
+    def group_of(self, position: int) -> List[int]:
+        """与指定题目相似的一组题目（包含它本身），没有相似题目时为空列表"""
+        groups = self.clusters()
+        if groups is not self._groups:
+            # 分组期间题目有变化，结果没有缓存，也没有位置到组的对应表
+            return next((group for group in groups if position in group), [])
+        n = self._group_of.get(position)
+        return groups[n] if n is not None else []
@@ -0,0 +1,99 @@
+"""
+按需加载的题目存储
+
+打开题库时只通过索引获取每个题目的位置，题目内容在被访问时才从文件中读取，
+题目的两部分内容和选项类型分析也只在第一次用到时才生成（见 question_model.Question）。
+"""
+from typing import Dict, Iterator, Optional, Tuple
+
+from question_index import Analyzer, QuestionIndex
+from question_model import Question
+
+
+class LazyQuestionStore:
+    """
+    按需加载题目的列表，可以代替原来的题目字典列表使用
+
+    Args:
+        index: 题库的题目索引
+        analyzer: 选项类型分析函数，分析题目的带引用部分
+        complete: 索引是否已包含题库的全部题目；边扫描边加载时为 False，
+            扫描完成后再设为 True，未完成的索引不会被保存
+    """
+
+    def __init__(self, index: QuestionIndex, analyzer: Analyzer, complete: bool = True):
+        self.index = index
+        self.analyzer = analyzer
+        self.complete = complete
+        self._loaded: Dict[int, Question] = {}
+        self._index_dirty = False
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __bool__(self) -> bool:
+        return len(self.index) > 0
+
+    def __getitem__(self, position: int) -> Question:
+        if position < 0:
+            position += len(self)
+        question = self._loaded.get(position)
+        if question is None:
+            question = self._create(position, self.index.read(position))
+            # 访问过的题目保留在内存中，后续的修改才不会丢失
+            self._loaded[position] = question
+        return question
+
+    def __iter__(self) -> Iterator[Question]:
+        # 批量遍历时顺序读取文件，未访问过的题目不常驻内存
+        for position, original in enumerate(self.index.iter_texts()):
+            question = self._loaded.get(position)
+            yield question if question is not None else self._create(position, original)
+
+    def _create(self, position: int, original: str) -> Question:
+        return Question(self.index[position].number, original, store=self, position=position)
+
+    def snapshot(self) -> Iterator[Question]:
+        """
+        返回所有题目的快照迭代器，供后台线程批量处理
+
+        调用时（在界面线程中）复制已加载题目的当前内容，未加载的题目在遍历时
+        才从文件读取，因此遍历过程可以放在工作线程中进行。
+        """
+        loaded = {position: question.copy() for position, question in self._loaded.items()}
+        return self._iter_snapshot(loaded, len(self.index))
+
+    def _iter_snapshot(self, loaded: Dict[int, Question], count: int) -> Iterator[Question]:
+        for position, original in enumerate(self.index.iter_texts(0, count)):
+            question = loaded.get(position)
+            yield question if question is not None else self._create(position, original)
+
+    def metadata(self, position: int) -> Tuple[int, Optional[str], Optional[str]]:
+        """
+        题目的序号、选项类型和错误原因，不读取题目内容也不进行分析
+
+        还没有分析过的题目，选项类型和错误原因为 None。
+        """
+        entry = self.index[position]
+        question = self._loaded.get(position)
+        if question is not None and question.analyzed:
+            return entry.number, question.option_type, question.error_reason
+        return entry.number, entry.option_type, entry.error_reason
+
+    def is_loaded(self, position: int) -> bool:
+        """题目是否已经读入内存"""
+        return position in self._loaded
+
+    def record_analysis(self, position: int, option_type, error_reason):
+        """记录选项类型分析结果，保存索引后下次打开无需重新分析"""
+        entry = self.index[position]
+        if entry.option_type != option_type or entry.error_reason != error_reason:
+            self.index.update_entry(position, option_type, error_reason)
+            self._index_dirty = True
+
+    def save_index(self) -> bool:
+        """把新的分析结果写回索引文件（索引还没有扫描完成时不保存）"""
+        if not self.complete or not self._index_dirty or not self.index.is_fresh():
+            return False
+        self._index_dirty = False
+        return self.index.save()
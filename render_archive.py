@@ -0,0 +1,96 @@
+"""
+渲染结果存档
+
+把渲染好的HTML文档交给后台线程批量写入 render_output 目录，文件名使用内容哈希，
+相同内容只写一次，界面线程不会因为写文件而卡顿。
+"""
+import logging
+import os
+import queue
+import threading
+from typing import Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class RenderArchive:
+    """
+    后台写入渲染结果的存档
+
+    Args:
+        output_dir: 存档目录
+        batch_size: 每批最多写入的文件数
+    """
+
+    def __init__(self, output_dir: str = "render_output", batch_size: int = 32):
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._submitted: Set[str] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def path_for(self, content_hash: str) -> str:
+        return os.path.join(self.output_dir, f"rendered_{content_hash}.html")
+
+    def submit(self, content_hash: str, document: str) -> bool:
+        """
+        提交一个渲染结果，已经提交过或已存在于目录中的内容会被忽略
+
+        Returns:
+            是否加入了写入队列
+        """
+        with self._lock:
+            if content_hash in self._submitted:
+                return False
+            self._submitted.add(content_hash)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put((content_hash, document))
+        return True
+
+    def flush(self, timeout: Optional[float] = None):
+        """等待队列中的渲染结果全部写入（退出程序前调用）"""
+        with self._lock:
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            # 一次取出队列中已有的所有结果，批量写入
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write_batch(batch)
+                    return
+                batch.append(item)
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+        except OSError as e:
+            logger.error("创建渲染输出目录失败: %s", e)
+            return
+
+        for content_hash, document in batch:
+            filename = self.path_for(content_hash)
+            if os.path.exists(filename):
+                continue
+            try:
+                with open(filename, 'w', encoding='utf-8') as f:
+                    f.write(document)
+                logger.debug("渲染结果已保存到: %s", filename)
+            except OSError as e:
+                logger.error("保存渲染结果失败: %s", e)
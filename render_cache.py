@@ -0,0 +1,68 @@
+"""
+渲染结果缓存
+
+按 (内容哈希, 主题, 渲染目标) 缓存 Markdown 渲染结果，容量有限，超出时淘汰最久未使用的条目。
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+
+class RenderCache:
+    """
+    线程安全的 LRU 渲染缓存
+
+    Args:
+        max_entries: 最多缓存的条目数
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """读取缓存，未命中时返回 None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: str):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> str:
+        """读取缓存，未命中时调用 render 生成并写入缓存"""
+        value = self.get(key)
+        if value is None:
+            value = render()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> str:
+        """缓存命中情况的说明文字"""
+        total = self.hits + self.misses
+        rate = self.hits * 100 / total if total else 0
+        return f"渲染缓存: {len(self._entries)}/{self.max_entries} 条，命中 {self.hits} 次，未命中 {self.misses} 次，命中率 {rate:.0f}%"
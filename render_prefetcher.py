@@ -0,0 +1,90 @@
+"""
+渲染预取
+
+按顺序复习题目时，在用户阅读当前题目的间隙，由后台线程预先渲染后面和前面几道题，
+结果写入渲染缓存，切换题目时直接取出渲染好的HTML片段。
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Hashable, Iterable, Optional, Tuple
+
+from render_cache import RenderCache
+
+logger = logging.getLogger(__name__)
+
+# 一个预取任务：(缓存键, 渲染函数)
+PrefetchJob = Tuple[Hashable, Callable[[], str]]
+
+
+class RenderPrefetcher:
+    """
+    在空闲的后台线程中预先渲染并写入缓存
+
+    Args:
+        cache: 渲染缓存
+        idle_delay: 最近一次安排任务后等待多久才开始渲染（秒），
+                    连续切换题目时不和界面线程抢占时间
+    """
+
+    def __init__(self, cache: RenderCache, idle_delay: float = 0.15):
+        self.cache = cache
+        self.idle_delay = idle_delay
+        self.rendered = 0               # 预先渲染的条目数
+        self._jobs = deque()
+        self._scheduled_at = 0.0
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, jobs: Iterable[PrefetchJob]):
+        """安排新的预取任务，替换还没有执行的旧任务（按给出的顺序执行）"""
+        with self._condition:
+            self._jobs = deque((key, render) for key, render in jobs if key not in self.cache)
+            self._scheduled_at = time.monotonic()
+            if self._jobs and (self._thread is None or not self._thread.is_alive()):
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def cancel(self):
+        """丢弃还没有执行的预取任务"""
+        with self._condition:
+            self._jobs.clear()
+
+    def stop(self):
+        """停止后台线程（退出程序前调用）"""
+        with self._condition:
+            self._jobs.clear()
+            self._stopped = True
+            self._condition.notify()
+
+    def _next_job(self) -> Optional[PrefetchJob]:
+        with self._condition:
+            while True:
+                if self._stopped:
+                    return None
+                if not self._jobs:
+                    self._condition.wait()
+                    continue
+                idle = time.monotonic() - self._scheduled_at
+                if idle < self.idle_delay:
+                    self._condition.wait(self.idle_delay - idle)
+                    continue
+                return self._jobs.popleft()
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            key, render = job
+            if key in self.cache:
+                continue
+            try:
+                self.cache.put(key, render())
+                self.rendered += 1
+            except Exception as e:
+                logger.debug("预取渲染失败 %s: %s", key, e)
@@ -0,0 +1,79 @@
+"""
+渲染调度
+
+拖动进度条或按住方向键、空格键时，导航事件的频率远高于完整渲染一道题的速度。
+调度器合并这些事件：输入间隔较长时立即渲染；连续输入时只显示轻量预览，
+等输入停止一段时间后只渲染最后一个目标题目。
+"""
+import logging
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RenderScheduler:
+    """
+    合并连续导航事件的渲染调度器（只在界面线程中使用）
+
+    Args:
+        widget: 用于 after/after_cancel 的 tkinter 组件
+        render: 完整渲染，参数为题目位置
+        preview: 轻量预览（如只更新题号和类型），参数为题目位置
+        delay_ms: 输入停止多久后渲染（毫秒）；两次请求的间隔超过这个时间时立即渲染
+    """
+
+    def __init__(self, widget, render: Callable[[int], None],
+                 preview: Optional[Callable[[int], None]] = None, delay_ms: int = 120):
+        self.widget = widget
+        self.render = render
+        self.preview = preview
+        self.delay_ms = delay_ms
+        self.pending = None             # 等待渲染的题目位置
+        self._job = None                # after 返回的定时任务
+        self._last_request = 0.0        # 上次请求的时间（秒）
+        self.coalesced = 0              # 被合并掉的请求数（调试用）
+
+    def request(self, position: int):
+        """请求渲染指定题目，连续请求时只渲染最后一个"""
+        now = time.monotonic()
+        settled = now - self._last_request >= self.delay_ms / 1000
+        self._last_request = now
+
+        if settled and self._job is None:
+            self.pending = None
+            self.render(position)
+            return
+
+        if self.pending is not None:
+            self.coalesced += 1
+        self.pending = position
+        if self.preview is not None:
+            self.preview(position)
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+        self._job = self.widget.after(self.delay_ms, self._fire)
+
+    def _fire(self):
+        self._job = None
+        position, self.pending = self.pending, None
+        if position is None:
+            return
+        if self.coalesced:
+            logger.debug("合并了 %s 次渲染请求，渲染第%s个位置", self.coalesced, position + 1)
+            self.coalesced = 0
+        self.render(position)
+
+    def flush(self):
+        """立即渲染等待中的题目"""
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+        self._fire()
+
+    def cancel(self):
+        """取消等待中的渲染（题目已经被直接渲染时调用）"""
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        self.pending = None
+        self.coalesced = 0